@@ -0,0 +1,52 @@
+# 跨进程桥接基准测试
+# Bridge benchmark
+# 测量通过 Unix 域套接字转发事件的吞吐量以及批量写入合并的帧数
+# Measures the throughput of events forwarded over a Unix domain socket and how many frames each write carries
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from loguru import logger
+
+from async_event_bus import BusBridge, EventBus
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+EVENTS = 100000
+
+
+async def main() -> None:
+    source, target = EventBus(max_concurrent_tasks=None), EventBus(max_concurrent_tasks=None)
+    counter = [0]
+
+    @target.on("telemetry")
+    def handler(*_, **__) -> None:
+        counter[0] += 1
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.sock")
+    server = BusBridge(target, [])
+    await server.serve_unix(path)
+    client = BusBridge(source, ["telemetry"])
+    peer = client.connect_unix(path)
+    while not peer.connected:
+        await asyncio.sleep(0.001)
+
+    start = time.perf_counter()
+    for index in range(EVENTS):
+        await source.emit("telemetry", index, host="worker-1")
+        if index % 1000 == 0:
+            # Let the flusher and the reader run, as a real producer would between bursts
+            await asyncio.sleep(0)
+    while counter[0] < EVENTS:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    print(f"{EVENTS / elapsed:>10.0f} events/s, {peer.sent / peer.flushes:.1f} frames per write")
+    await client.close()
+    await server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+# 回调调用基准测试
+# Callback invocation benchmark
+# 对比通过EventCallback包装调用与直接调用原始函数的开销, 以及事件总线的整体触发开销
+# Compares calling handlers through the EventCallback wrappers with calling the raw functions,
+# and measures the emit overhead of an event with many handlers
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from loguru import logger
+
+from async_event_bus import EventBus, EventCallbackFactory
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+CALLS = 200000
+HANDLERS = 100
+EMITS = 2000
+
+
+def sync_handler(*_, **__) -> None:
+    pass
+
+
+async def async_handler(*_, **__) -> None:
+    pass
+
+
+def measure(label: str, func) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40}{elapsed * 1e9 / CALLS:8.1f} ns/call")
+    return elapsed
+
+
+def call_all(callback) -> None:
+    for _ in range(CALLS):
+        callback("payload", user="Half")
+
+
+def await_all(loop: asyncio.AbstractEventLoop, callback) -> None:
+    async def run():
+        for _ in range(CALLS):
+            await callback("payload", user="Half")
+
+    loop.run_until_complete(run())
+
+
+def instance_size() -> int:
+    tracemalloc.start()
+    callbacks = [EventCallbackFactory.create(sync_handler) for _ in range(10000)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del callbacks
+    return size // 10000
+
+
+async def emit_many_handlers(max_concurrent_tasks) -> float:
+    bus = EventBus(max_concurrent_tasks)
+    for _ in range(HANDLERS):
+        async def handler(*_, **__) -> None:
+            pass
+
+        def blocking_handler(*_, **__) -> None:
+            pass
+
+        bus.subscribe("hot", handler)
+        bus.subscribe("hot", blocking_handler)
+    await bus.emit("hot", "payload")
+    start = time.perf_counter()
+    for _ in range(EMITS):
+        await bus.emit("hot", "payload")
+    return time.perf_counter() - start
+
+
+def main():
+    loop = asyncio.new_event_loop()
+    wrapped_sync = EventCallbackFactory.create(sync_handler)
+    wrapped_async = EventCallbackFactory.create(async_handler)
+    measure("sync handler through wrapper", lambda: call_all(wrapped_sync))
+    measure("sync handler called directly", lambda: call_all(sync_handler))
+    measure("async handler through wrapper", lambda: await_all(loop, wrapped_async))
+    measure("async handler called directly", lambda: await_all(loop, async_handler))
+    print(f"{'EventCallback instance size':<40}{instance_size():8d} bytes")
+    for limit in (10, None):
+        elapsed = loop.run_until_complete(emit_many_handlers(limit))
+        label = f"emit, {HANDLERS}+{HANDLERS} handlers, limit={limit}"
+        print(f"{label:<40}{elapsed * 1e6 / EMITS:8.1f} us/emit")
+
+
+if __name__ == "__main__":
+    main()
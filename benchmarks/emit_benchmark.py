@@ -0,0 +1,69 @@
+# 事件分发基准测试
+# Emit benchmark
+# 对比缓存的分发计划与每次触发都重新构建分发计划的开销
+# Compares emitting with a cached dispatch plan against rebuilding the plan on every emit
+import asyncio
+import sys
+import time
+
+from loguru import logger
+
+from async_event_bus import EventBus
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+EMITS = 20000
+# (sync handlers, async handlers, filters, injectors), filters and injectors are split into event and global ones
+SCENARIOS = [
+    (1, 0, 2, 2),
+    (10, 0, 10, 10),
+    (20, 20, 10, 10),
+]
+
+
+def make_bus(sync_handlers: int, async_handlers: int, filters: int, injects: int) -> EventBus:
+    bus = EventBus()
+    for i in range(async_handlers):
+        async def async_handler(*_, **__) -> None:
+            pass
+
+        bus.subscribe("hot", async_handler, weight=i)
+    for i in range(sync_handlers):
+        def sync_handler(*_, **__) -> None:
+            pass
+
+        bus.subscribe("hot", sync_handler, weight=i)
+    for i in range(filters // 2):
+        bus.add_filter("hot", lambda *_, **__: False, i)
+        bus.add_global_filter(lambda *_, **__: False, i)
+    for i in range(injects // 2):
+        bus.add_inject("hot", lambda *_, **__: {"event_value": 1}, i)
+        bus.add_global_inject(lambda *_, **__: {"global_value": 1}, i)
+    return bus
+
+
+async def run(bus: EventBus, rebuild: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(EMITS):
+        if rebuild:
+            bus._invalidate_plan("hot")
+        await bus.emit("hot", "payload")
+    return time.perf_counter() - start
+
+
+async def main():
+    for scenario in SCENARIOS:
+        bus = make_bus(*scenario)
+        await run(bus, False)
+        rebuilt = await run(bus, True)
+        cached = await run(bus, False)
+        print("sync handlers={}, async handlers={}, filters={}, injectors={}".format(*scenario))
+        print(f"    plan rebuilt per emit: {rebuilt * 1e6 / EMITS:8.2f} us/emit")
+        print(f"    plan cached:           {cached * 1e6 / EMITS:8.2f} us/emit")
+        print(f"    speedup:               {rebuilt / cached:8.2f}x")
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(main())
@@ -0,0 +1,53 @@
+# 事件合并、防抖与节流基准测试
+# Coalescing, debouncing and throttling benchmark
+# 模拟按租户分布的缓存失效事件风暴，对比无策略、防抖、节流和合并时处理器的调用次数和总耗时
+# Simulates a storm of cache invalidations spread over tenants, and compares the number of handler runs
+# and the total time without a policy and with a debounce, a throttle and a coalesce policy
+import asyncio
+import sys
+import time
+from typing import Optional
+
+from loguru import logger
+
+from async_event_bus import Coalesce, Debounce, EventBus, RatePolicy, Throttle
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+EVENTS = 10000
+TENANTS = 10
+# Seconds an expensive handler takes, like rebuilding a cache
+HANDLER_COST = 0.001
+
+
+async def run(name: str, policy: Optional[RatePolicy]) -> None:
+    bus = EventBus(max_concurrent_tasks=None)
+    runs = [0]
+
+    async def rebuild_cache(keys, *_, **__) -> None:
+        runs[0] += 1
+        await asyncio.sleep(HANDLER_COST)
+
+    bus.subscribe("cache_invalidated", rebuild_cache, policy=policy)
+    start = time.perf_counter()
+    # The storm comes in bursts of 500 events, the loop gets back to its timers between them
+    for index in range(EVENTS):
+        await bus.emit("cache_invalidated", index, tenant=index % TENANTS)
+        if index % 500 == 499:
+            await asyncio.sleep(0.001)
+    if policy is not None:
+        await policy.flush()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {runs[0]:>8} handler runs, {elapsed * 1000:>9.1f} ms")
+
+
+async def main() -> None:
+    await run("none", None)
+    await run("debounce", Debounce(0.01, key="tenant"))
+    await run("throttle", Throttle(0.01, key="tenant"))
+    await run("coalesce", Coalesce(lambda keys, key: keys | {key}, initial=set, key="tenant"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
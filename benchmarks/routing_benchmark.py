@@ -0,0 +1,64 @@
+# 内容路由基准测试
+# Routing benchmark
+# 对比在每个处理函数中判断负载与使用 where 索引路由的开销
+# Compares handlers that test the payload themselves against handlers indexed with where
+import asyncio
+import sys
+import time
+
+from loguru import logger
+
+from async_event_bus import EventBus
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+EMITS = 5000
+TENANTS = [10, 100, 1000]
+
+
+def make_predicate_bus(tenants: int) -> EventBus:
+    bus = EventBus()
+    for tenant in range(tenants):
+        def handler(order, *_, tenant=tenant, **__) -> None:
+            if order["tenant"] != tenant or order["region"] != "eu":
+                return
+
+        bus.subscribe("order", handler)
+    return bus
+
+
+def make_routed_bus(tenants: int) -> EventBus:
+    bus = EventBus()
+    for tenant in range(tenants):
+        def handler(order, *_, **__) -> None:
+            pass
+
+        bus.subscribe("order", handler, where={"tenant": tenant, "region": "eu"})
+    return bus
+
+
+async def run(bus: EventBus, tenants: int) -> float:
+    start = time.perf_counter()
+    for index in range(EMITS):
+        await bus.emit("order", {"tenant": index % tenants, "region": "eu"})
+    return time.perf_counter() - start
+
+
+async def main():
+    for tenants in TENANTS:
+        predicate_bus = make_predicate_bus(tenants)
+        routed_bus = make_routed_bus(tenants)
+        await run(predicate_bus, tenants)
+        await run(routed_bus, tenants)
+        predicate = await run(predicate_bus, tenants)
+        routed = await run(routed_bus, tenants)
+        print(f"tenants={tenants}")
+        print(f"    predicate per handler: {predicate * 1e6 / EMITS:8.2f} us/emit")
+        print(f"    where index:           {routed * 1e6 / EMITS:8.2f} us/emit")
+        print(f"    speedup:               {predicate / routed:8.2f}x")
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(main())
@@ -0,0 +1,88 @@
+# 共享内存环形缓冲区基准测试
+# Shared memory ring benchmark
+# 对比通过 Unix 域套接字桥接与共享内存环形缓冲区向多个消费进程扇出事件的吞吐量和生产者 CPU 开销
+# Compares fanning events out to consumer processes over the Unix socket bridge and over the shared memory ring,
+# by throughput and by CPU time spent in the producer
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from loguru import logger
+
+from async_event_bus import BusBridge, EventBus, ShmPublisher, ShmSubscriber
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+EVENTS = 100000
+CONSUMERS = 4
+
+
+def consume(transport: str, address: str, ready, done) -> None:
+    async def run() -> None:
+        bus = EventBus(max_concurrent_tasks=None)
+        counter = [0]
+
+        @bus.on("telemetry")
+        def handler(*_, **__) -> None:
+            counter[0] += 1
+
+        if transport == "bridge":
+            bridge = BusBridge(bus, [])
+            peer = bridge.connect_unix(address)
+            while not peer.connected:
+                await asyncio.sleep(0.001)
+        else:
+            subscriber = ShmSubscriber(bus, address)
+            subscriber.start()
+        ready.release()
+        while counter[0] < EVENTS:
+            await asyncio.sleep(0.001)
+        done.release()
+
+    asyncio.run(run())
+
+
+async def produce(source: EventBus, transport: str, address: str) -> None:
+    context = multiprocessing.get_context("spawn")
+    ready, done = context.Semaphore(0), context.Semaphore(0)
+    consumers = [context.Process(target=consume, args=(transport, address, ready, done)) for _ in range(CONSUMERS)]
+    for consumer in consumers:
+        consumer.start()
+    for _ in consumers:
+        await asyncio.to_thread(ready.acquire)
+    await asyncio.sleep(0.1)
+
+    start, cpu = time.perf_counter(), time.process_time()
+    for index in range(EVENTS):
+        await source.emit("telemetry", index, host="worker-1", value=index * 0.5)
+        if index % 1000 == 0:
+            await asyncio.sleep(0)
+    cpu = time.process_time() - cpu
+    for _ in consumers:
+        await asyncio.to_thread(done.acquire)
+    elapsed = time.perf_counter() - start
+    print(f"{transport:<8} {EVENTS / elapsed:>10.0f} events/s to {CONSUMERS} consumers, "
+          f"producer {cpu / EVENTS * 1e6:.2f} us cpu/event")
+    for consumer in consumers:
+        consumer.join()
+
+
+async def main() -> None:
+    source = EventBus(max_concurrent_tasks=None)
+    path = os.path.join(tempfile.mkdtemp(), "bench.sock")
+    hub = BusBridge(source, ["telemetry"])
+    await hub.serve_unix(path)
+    await produce(source, "bridge", path)
+    await hub.close()
+
+    publisher = ShmPublisher(source, ["telemetry"], slots=EVENTS, slot_size=256)
+    await produce(source, "ring", publisher.name)
+    publisher.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+# 跨线程触发基准测试
+# Cross-thread emit benchmark
+# 对比生产者线程逐个调用 run_coroutine_threadsafe 与通过 emit_threadsafe 批量唤醒事件循环的吞吐量和 CPU 开销
+# Compares one run_coroutine_threadsafe per event from producer threads against emit_threadsafe batched wake-ups
+import asyncio
+import sys
+import threading
+import time
+
+from loguru import logger
+
+from async_event_bus import EventBus
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+PRODUCERS = 4
+EVENTS = 20000
+
+
+def make_bus() -> tuple[EventBus, list[int]]:
+    bus = EventBus(max_concurrent_tasks=None)
+    counter = [0]
+
+    @bus.on("tick")
+    async def handler(*_, **__) -> None:
+        counter[0] += 1
+
+    return bus, counter
+
+
+async def run(name: str, produce) -> None:
+    bus, counter = make_bus()
+    bus.bind_loop()
+    loop = asyncio.get_running_loop()
+    total = PRODUCERS * EVENTS
+
+    def producer() -> None:
+        for index in range(EVENTS):
+            produce(bus, loop, index)
+
+    threads = [threading.Thread(target=producer) for _ in range(PRODUCERS)]
+    wall, cpu = time.perf_counter(), time.process_time()
+    for thread in threads:
+        thread.start()
+    while counter[0] < total:
+        await asyncio.sleep(0.001)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    for thread in threads:
+        thread.join()
+    batches = f", {bus.inbox.batches} wake-ups" if bus.inbox is not None else f", {total} wake-ups"
+    print(f"{name:<28} {total / wall:>10.0f} events/s, {cpu / total * 1e6:>6.2f} us cpu/event{batches}")
+
+
+def per_event(bus: EventBus, loop: asyncio.AbstractEventLoop, index: int) -> None:
+    asyncio.run_coroutine_threadsafe(bus.emit("tick", index), loop)
+
+
+def batched(bus: EventBus, loop: asyncio.AbstractEventLoop, index: int) -> None:
+    bus.emit_threadsafe("tick", index)
+
+
+async def main() -> None:
+    await run("run_coroutine_threadsafe", per_event)
+    await run("emit_threadsafe", batched)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
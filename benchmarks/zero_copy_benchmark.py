@@ -0,0 +1,50 @@
+# 零拷贝基准测试
+# Zero copy benchmark
+# 对比将 10 MB 负载扇出给 8 个进程处理函数时, 逐个序列化与通过共享内存带外缓冲区传递的耗时
+# Compares fanning a 10 MB payload out to 8 process handlers by pickling it for each of them
+# against passing it as an out-of-band buffer in shared memory
+import asyncio
+import sys
+import time
+from functools import partial
+
+from loguru import logger
+
+from async_event_bus import EventBus
+
+logger.remove()
+logger.add(sys.stderr, level="WARNING")
+
+PAYLOAD = bytes(10 * 1024 * 1024)
+SUBSCRIBERS = 8
+EMITS = 20
+
+
+def reader(index: int, frame, *_, **__) -> int:
+    return len(frame)
+
+
+async def run(name: str, threshold) -> None:
+    bus = EventBus(max_concurrent_tasks=None)
+    bus.executor.configure_process_pool(max_workers=4)
+    bus.executor.zero_copy_threshold = threshold
+    for index in range(SUBSCRIBERS):
+        bus.subscribe("frame", partial(reader, index), executor="process")
+    # Start the workers before measuring
+    await bus.emit("frame", b"warm up")
+
+    start, cpu = time.perf_counter(), time.process_time()
+    for _ in range(EMITS):
+        await bus.emit("frame", PAYLOAD)
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu
+    print(f"{name:<12} {elapsed / EMITS * 1000:>8.2f} ms/emit, {cpu / EMITS * 1000:>8.2f} ms cpu/emit in the bus process")
+    bus.executor.shutdown()
+
+
+async def main() -> None:
+    await run("pickled", None)
+    await run("zero copy", 1024 * 1024)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
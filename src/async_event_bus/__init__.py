@@ -1,6 +1,7 @@
 from .event import *
 from .event_bus import EventBus
 from .module import *
+from .transport import *
 
 __version__ = "0.4.0"
 __author__ = "Half_nothing"
@@ -14,10 +15,35 @@ __ALL__ = [
     AsyncEventCallback,
     EventCallbackFactory,
     SyncEventCallback,
+    RouteIndex,
+    TopicTrie,
     BaseBus,
     BaseModule,
+    BusExecutor,
     BusFilter,
     BusInject,
+    BusMetrics,
+    BusProfiler,
+    Coalesce,
+    Debounce,
+    CallbackCache,
+    CallbackProfile,
+    Histogram,
+    ConcurrencyLimiter,
+    DispatchPlan,
+    EventQueue,
+    OverflowPolicy,
     MultipleError,
+    QueueFullError,
+    RatePolicy,
+    SlowCall,
+    Throttle,
+    ThreadInbox,
+    BridgePeer,
+    BusBridge,
+    FrameError,
+    HandshakeError,
+    ShmPublisher,
+    ShmSubscriber,
     EventBus
 ]
@@ -3,7 +3,9 @@ from .event import EnumEvent, AbstractEvent, EventType
 from .event_callback import EventCallback
 from .event_callback_container import EventCallbackContainer
 from .event_callback_factory import EventCallbackFactory
+from .route_index import RouteIndex
 from .sync_event_callback import SyncEventCallback
+from .topic_trie import TopicTrie
 
 __ALL__ = [
     EnumEvent,
@@ -13,5 +15,7 @@ __ALL__ = [
     SyncEventCallback,
     AsyncEventCallback,
     EventCallbackFactory,
-    SyncEventCallback
+    SyncEventCallback,
+    RouteIndex,
+    TopicTrie
 ]
@@ -1,26 +1,33 @@
-from typing import Any, Callable, Generic, TypeVar
+from typing import Any, Callable, Generic, Optional, TypeVar
 
 T = TypeVar('T', bound=Callable)
 
 
 class EventCallback(Generic[T]):
     """
-    A basic class that encapsulates a callback function
+    A basic class that encapsulates a callback function\n
+    The event bus only uses it to describe a registration,
+    emitting calls the underlying callback function directly
     """
 
-    def __init__(self, callback: T, weight: int = 1) -> None:
+    __slots__ = ("_callback", "_weight", "_async", "_executor", "_timeout")
+
+    def __init__(self, callback: T, weight: int = 1, *, executor: Optional[str] = None,
+                 timeout: Optional[float] = None) -> None:
         self._callback = callback
         self._weight = weight
         self._async = False
+        self._executor = executor
+        self._timeout = timeout
 
     @property
     def weight(self) -> int:
+        """
+        Fixed once the callback is created, containers keep their callbacks sorted by it,
+        subscribe the function again to change it
+        """
         return self._weight
 
-    @weight.setter
-    def weight(self, weight: int) -> None:
-        self._weight = weight
-
     @property
     def callback(self) -> T:
         return self._callback
@@ -29,6 +36,20 @@ class EventCallback(Generic[T]):
     def is_async(self) -> bool:
         return self._async
 
+    @property
+    def executor(self) -> Optional[str]:
+        """
+        Where the callback runs, None means the default of the event bus
+        """
+        return self._executor
+
+    @property
+    def timeout(self) -> Optional[float]:
+        """
+        Seconds the callback may run before it is cancelled, None means no limit
+        """
+        return self._timeout
+
     def __eq__(self, __value: Any) -> bool:
         if isinstance(__value, self.__class__):
             return self._callback == __value._callback and self._weight == __value._weight
@@ -1,5 +1,6 @@
 from asyncio import iscoroutinefunction
-from typing import Callable, Union
+from bisect import insort
+from typing import Callable, Generic, Iterable, TypeVar, Union
 
 from loguru import logger
 
@@ -8,6 +9,75 @@ from .event_callback import EventCallback
 from .event_callback_factory import EventCallbackFactory
 from .sync_event_callback import SyncEventCallback
 
+C = TypeVar('C', bound=EventCallback)
+
+
+def _descending_weight(callback: EventCallback) -> int:
+    return -callback.weight
+
+
+class _SortedCallbacks(Generic[C]):
+    """
+    Callbacks kept in descending weight order, callbacks of the same weight keep their insertion order\n
+    A dict indexes the callbacks by their function, so lookups and removals do not scan the list.
+    Removed callbacks are only dropped from the list the next time it is read
+    """
+
+    __slots__ = ("_index", "_ordered", "_removed")
+
+    def __init__(self):
+        self._index: dict[Callable, C] = {}
+        self._ordered: list[C] = []
+        self._removed = 0
+
+    def __contains__(self, callback: Union[C, Callable]) -> bool:
+        if isinstance(callback, EventCallback):
+            return self._index.get(callback.callback) is callback
+        return callback in self._index
+
+    def add(self, callback: C) -> bool:
+        if callback.callback in self._index:
+            return False
+        if self._removed:
+            # Drop the removed callbacks first, a callback that is added again must not be listed twice
+            _ = self.items
+        self._index[callback.callback] = callback
+        insort(self._ordered, callback, key=_descending_weight)
+        return True
+
+    def extend(self, callbacks: Iterable[C]) -> None:
+        if self._removed:
+            _ = self.items
+        added = False
+        for callback in callbacks:
+            if callback.callback not in self._index:
+                self._index[callback.callback] = callback
+                self._ordered.append(callback)
+                added = True
+        if added:
+            self._ordered.sort(key=_descending_weight)
+
+    def remove(self, callback: Union[C, Callable]) -> bool:
+        key = callback.callback if isinstance(callback, EventCallback) else callback
+        if key not in self._index:
+            return False
+        del self._index[key]
+        self._removed += 1
+        return True
+
+    def clear(self) -> None:
+        self._index.clear()
+        self._ordered.clear()
+        self._removed = 0
+
+    @property
+    def items(self) -> list[C]:
+        if self._removed:
+            index = self._index
+            self._ordered = [callback for callback in self._ordered if index.get(callback.callback) is callback]
+            self._removed = 0
+        return self._ordered
+
 
 class EventCallbackContainer:
     """
@@ -15,44 +85,61 @@ class EventCallbackContainer:
     """
 
     def __init__(self):
-        self._sync_callback: list[SyncEventCallback] = []
-        self._async_callback: list[AsyncEventCallback] = []
+        self._sync_callback: _SortedCallbacks[SyncEventCallback] = _SortedCallbacks()
+        self._async_callback: _SortedCallbacks[AsyncEventCallback] = _SortedCallbacks()
 
     def add_sync_callback(self, callback: SyncEventCallback) -> None:
-        if callback not in self._sync_callback:
+        if self._sync_callback.add(callback):
             logger.trace(f"Adding sync callback: {callback}")
-            self._sync_callback.append(callback)
-            self._sync_callback.sort(key=lambda item: item.weight, reverse=True)
         else:
             logger.trace(f"Callback already exists: {callback}")
 
     def add_async_callback(self, callback: AsyncEventCallback) -> None:
-        if callback not in self._async_callback:
+        if self._async_callback.add(callback):
             logger.trace(f"Adding async callback: {callback}")
-            self._async_callback.append(callback)
-            self._async_callback.sort(key=lambda item: item.weight, reverse=True)
         else:
             logger.trace(f"Callback already exists: {callback}")
 
-    def add_callback(self, callback: Union[EventCallback, Callable], weight: int = 1) -> None:
+    @staticmethod
+    def _wrap(callback: Union[EventCallback, Callable], weight: int) -> EventCallback:
         if not isinstance(callback, EventCallback):
             callback = EventCallbackFactory.create(callback, weight)
+        if not isinstance(callback, (AsyncEventCallback, SyncEventCallback)):
+            raise TypeError(f'Callback type {type(callback)} not supported')
+        return callback
+
+    def add_callback(self, callback: Union[EventCallback, Callable], weight: int = 1) -> None:
+        callback = self._wrap(callback, weight)
         if isinstance(callback, AsyncEventCallback):
             self.add_async_callback(callback)
-        elif isinstance(callback, SyncEventCallback):
-            self.add_sync_callback(callback)
         else:
-            raise TypeError(f'Callback type {type(callback)} not supported')
+            self.add_sync_callback(callback)
+
+    def add_callbacks(self, callbacks: Iterable[Union[EventCallback, Callable]], weight: int = 1) -> None:
+        """
+        Add many callbacks at once, the callbacks are sorted once instead of once per callback
+        :param callbacks: Callbacks to add, plain functions get the given weight
+        :param weight: The weight of the plain functions
+        """
+        sync_callbacks = []
+        async_callbacks = []
+        for callback in callbacks:
+            callback = self._wrap(callback, weight)
+            if isinstance(callback, AsyncEventCallback):
+                async_callbacks.append(callback)
+            else:
+                sync_callbacks.append(callback)
+        self._sync_callback.extend(sync_callbacks)
+        self._async_callback.extend(async_callbacks)
+        logger.trace(f"Added {len(sync_callbacks)} sync callbacks and {len(async_callbacks)} async callbacks")
 
     def remove_sync_callback(self, callback: Union[SyncEventCallback, Callable]) -> None:
-        if callback in self._sync_callback:
+        if self._sync_callback.remove(callback):
             logger.trace(f"Removing sync callback: {callback}")
-            self._sync_callback.remove(callback)
 
     def remove_async_callback(self, callback: Union[AsyncEventCallback, Callable]) -> None:
-        if callback in self._async_callback:
+        if self._async_callback.remove(callback):
             logger.trace(f"Removing async callback: {callback}")
-            self._async_callback.remove(callback)
 
     def remove_callback(self, callback: Union[EventCallback, Callable]) -> None:
         if not isinstance(callback, EventCallback):
@@ -72,10 +159,21 @@ class EventCallbackContainer:
         self._sync_callback.clear()
         self._async_callback.clear()
 
+    def __contains__(self, callback: Union[EventCallback, Callable]) -> bool:
+        return callback in self._sync_callback or callback in self._async_callback
+
+    def flatten(self) -> tuple[tuple[Callable, bool], ...]:
+        """
+        The raw callback functions in execution order, synchronous ones first,
+        each paired with whether it is asynchronous
+        """
+        return (*((callback.callback, False) for callback in self._sync_callback.items),
+                *((callback.callback, True) for callback in self._async_callback.items))
+
     @property
     def sync_callback(self) -> list[SyncEventCallback]:
-        return self._sync_callback
+        return self._sync_callback.items
 
     @property
     def async_callback(self) -> list[AsyncEventCallback]:
-        return self._async_callback
+        return self._async_callback.items
@@ -1,4 +1,5 @@
 from asyncio import iscoroutinefunction
+from typing import Optional
 
 from .async_event_callback import AsyncEventCallback
 from .event_callback import EventCallback, T
@@ -11,8 +12,9 @@ class EventCallbackFactory:
     """
 
     @staticmethod
-    def create(callback: T, weight: int = 1) -> EventCallback:
+    def create(callback: T, weight: int = 1, *, executor: Optional[str] = None,
+               timeout: Optional[float] = None) -> EventCallback:
         if iscoroutinefunction(callback):
-            return AsyncEventCallback(callback, weight)
+            return AsyncEventCallback(callback, weight, executor=executor, timeout=timeout)
         else:
-            return SyncEventCallback(callback, weight)
+            return SyncEventCallback(callback, weight, executor=executor, timeout=timeout)
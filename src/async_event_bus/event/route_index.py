@@ -0,0 +1,92 @@
+from collections.abc import Mapping
+from itertools import product
+from typing import Any, Callable, Hashable, Iterator, Union
+
+from .event_callback import EventCallback
+from .event_callback_container import EventCallbackContainer
+
+# Marks a field that the payload does not have, it never equals a registered value
+MISSING = object()
+
+# A field value, or a collection of values any of which matches
+WhereValue = Union[Hashable, list, tuple, set, frozenset]
+
+
+def resolve_field(payload: Any, kwargs: dict[str, Any], field: str) -> Any:
+    """
+    Read a routed field of an emit, from the keyword arguments first,
+    then from the first positional argument, as a mapping key or an attribute
+    """
+    value = kwargs.get(field, MISSING)
+    if value is not MISSING:
+        return value
+    if isinstance(payload, Mapping):
+        return payload.get(field, MISSING)
+    return getattr(payload, field, MISSING)
+
+
+class RouteIndex:
+    """
+    Stores the callback containers of the subscriptions of one event that declared **where** predicates\n
+    Subscriptions are grouped by the set of fields they test,
+    and inside a group they are keyed by the tuple of values they expect,
+    so finding the handlers of an emit costs one dict lookup per group instead of one predicate per handler.
+    A predicate value that is a list, tuple or set matches any of its items
+    """
+
+    def __init__(self):
+        # Sorted field names to the containers keyed by the expected values
+        self._shapes: dict[tuple[str, ...], dict[tuple, EventCallbackContainer]] = {}
+        # Raw callback functions to the places they are registered at
+        self._locations: dict[Callable, list[tuple[tuple[str, ...], tuple]]] = {}
+
+    @staticmethod
+    def _keys(where: dict[str, WhereValue]) -> tuple[tuple[str, ...], Iterator[tuple]]:
+        if not where:
+            raise ValueError("where must test at least one field")
+        fields = tuple(sorted(where))
+        choices = [tuple(where[field]) if isinstance(where[field], (list, tuple, set, frozenset)) else (where[field],)
+                   for field in fields]
+        return fields, product(*choices)
+
+    def add(self, where: dict[str, WhereValue], callback: EventCallback) -> bool:
+        """
+        Register a callback under a predicate, an earlier predicate of the same callback is dropped
+        :return: True if an earlier predicate was replaced
+        """
+        fields, keys = self._keys(where)
+        replaced = self.remove(callback.callback)
+        table = self._shapes.setdefault(fields, {})
+        locations = self._locations[callback.callback] = []
+        for key in keys:
+            container = table.get(key)
+            if container is None:
+                container = table[key] = EventCallbackContainer()
+            container.add_callback(callback)
+            locations.append((fields, key))
+        return replaced
+
+    def remove(self, callback: Callable) -> bool:
+        locations = self._locations.pop(callback, None)
+        if locations is None:
+            return False
+        for fields, key in locations:
+            table = self._shapes[fields]
+            table[key].remove_callback(callback)
+            if not table[key].sync_callback and not table[key].async_callback:
+                del table[key]
+            if not table:
+                del self._shapes[fields]
+        return True
+
+    def tables(self) -> Iterator[tuple[tuple[str, ...], dict[tuple, EventCallbackContainer]]]:
+        """
+        The groups of subscriptions, as pairs of the tested fields and the containers keyed by their values
+        """
+        return iter(self._shapes.items())
+
+    def __contains__(self, callback: Callable) -> bool:
+        return callback in self._locations
+
+    def __len__(self) -> int:
+        return len(self._locations)
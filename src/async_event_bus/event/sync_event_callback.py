@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Optional
 
 from .event_callback import EventCallback, T
 
@@ -8,8 +8,11 @@ class SyncEventCallback(EventCallback):
     A class that encapsulates a sync callback function
     """
 
-    def __init__(self, callback: T, weight: int = 1):
-        super().__init__(callback, weight)
+    __slots__ = ()
+
+    def __init__(self, callback: T, weight: int = 1, *, executor: Optional[str] = None,
+                 timeout: Optional[float] = None):
+        super().__init__(callback, weight, executor=executor, timeout=timeout)
         self._async = False
 
     def __call__(self, *args, **kwargs) -> Any:
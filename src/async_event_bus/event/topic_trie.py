@@ -0,0 +1,116 @@
+from typing import Optional
+
+from .event_callback_container import EventCallbackContainer
+
+SEPARATOR = "."
+SINGLE_WILDCARD = "*"
+MULTI_WILDCARD = "#"
+
+
+class _TopicNode:
+    __slots__ = ("children", "container")
+
+    def __init__(self):
+        self.children: dict[str, _TopicNode] = {}
+        self.container: Optional[EventCallbackContainer] = None
+
+
+class TopicTrie:
+    """
+    A segment trie that stores the callback containers of wildcard topic patterns\n
+    Topics are split on dots,
+    **\\*** matches exactly one segment and **#** matches zero or more segments,
+    so **order.\\*** matches **order.created** and **order.#** also matches **order** and **order.eu.created**
+    """
+
+    def __init__(self):
+        self._root = _TopicNode()
+        self._size = 0
+
+    @staticmethod
+    def is_pattern(topic: str) -> bool:
+        return any(segment in (SINGLE_WILDCARD, MULTI_WILDCARD) for segment in topic.split(SEPARATOR))
+
+    def add(self, pattern: str) -> EventCallbackContainer:
+        """
+        Get the container of a pattern, creating it if needed
+        """
+        node = self._root
+        for segment in pattern.split(SEPARATOR):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _TopicNode()
+            node = child
+        if node.container is None:
+            node.container = EventCallbackContainer()
+            self._size += 1
+        return node.container
+
+    def remove(self, pattern: str) -> bool:
+        """
+        Drop the container of a pattern and the branches that lead only to it
+        :return: False if the pattern was not stored
+        """
+        path = [self._root]
+        segments = pattern.split(SEPARATOR)
+        for segment in segments:
+            node = path[-1].children.get(segment)
+            if node is None:
+                return False
+            path.append(node)
+        if path[-1].container is None:
+            return False
+        path[-1].container = None
+        self._size -= 1
+        for segment, parent, node in zip(reversed(segments), reversed(path[:-1]), reversed(path)):
+            if node.children or node.container is not None:
+                break
+            del parent.children[segment]
+        return True
+
+    def get(self, pattern: str) -> Optional[EventCallbackContainer]:
+        node = self._root
+        for segment in pattern.split(SEPARATOR):
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node.container
+
+    def match(self, topic: str) -> list[tuple[str, EventCallbackContainer]]:
+        """
+        Find every pattern that matches a concrete topic
+        :return: Pairs of pattern and container
+        """
+        segments = topic.split(SEPARATOR)
+        matches: dict[int, tuple[str, EventCallbackContainer]] = {}
+        self._match(self._root, segments, 0, [], matches)
+        return list(matches.values())
+
+    def _match(self, node: _TopicNode, segments: list[str], index: int, path: list[str],
+               matches: dict[int, tuple[str, EventCallbackContainer]]) -> None:
+        if index == len(segments):
+            if node.container is not None:
+                # The same pattern can be reached more than once through "#"
+                matches[id(node)] = (SEPARATOR.join(path), node.container)
+            # "#" also matches zero trailing segments
+            multi = node.children.get(MULTI_WILDCARD)
+            if multi is not None and multi.container is not None:
+                matches[id(multi)] = (SEPARATOR.join(path + [MULTI_WILDCARD]), multi.container)
+            return
+        segment = segments[index]
+        for key in (segment, SINGLE_WILDCARD):
+            child = node.children.get(key)
+            if child is not None:
+                self._match(child, segments, index + 1, path + [key], matches)
+        multi = node.children.get(MULTI_WILDCARD)
+        if multi is not None:
+            # "#" swallows zero or more segments
+            for end in range(index, len(segments) + 1):
+                self._match(multi, segments, end, path + [MULTI_WILDCARD], matches)
+
+    def clear(self) -> None:
+        self._root = _TopicNode()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
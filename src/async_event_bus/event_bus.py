@@ -1,5 +1,10 @@
+from functools import partial
+from typing import Callable, Optional
+
 from .event import EventType
-from .module import BaseBus, BusFilter, BusInject
+from .module import BaseBus, BusFilter, BusInject, DispatchPlan
+from .module.bus_metrics import FILTER, INJECT
+from .module.dispatch_plan import CallbackEntry
 
 
 class EventBus(BaseBus, BusFilter, BusInject):
@@ -7,14 +12,51 @@ class EventBus(BaseBus, BusFilter, BusInject):
     Event bus
     """
 
-    def __init__(self, max_concurrent_tasks: int = 10):
-        BaseBus.__init__(self, max_concurrent_tasks)
+    def __init__(self, max_concurrent_tasks: Optional[int] = 10, *, sync_executor: str = "inline",
+                 thread_pool_size: Optional[int] = None, plan_cache_size: int = 4096, topic_cache_size: int = 1024):
+        BaseBus.__init__(self, max_concurrent_tasks, sync_executor=sync_executor, thread_pool_size=thread_pool_size,
+                         plan_cache_size=plan_cache_size, topic_cache_size=topic_cache_size)
         BusFilter.__init__(self)
         BusInject.__init__(self)
 
+    def _build_plan(self, event: EventType) -> DispatchPlan:
+        # Injectors and filters are measured one by one, before they are grouped to run concurrently
+        global_injects, injects = self._collect_injects(event, self._measure(event, INJECT))
+        global_filters, filters = self._collect_filters(event, self._measure(event, FILTER))
+        # before_emit is skipped entirely when there is nothing to inject or filter,
+        # unless a subclass has its own before_emit that must always run
+        intercept = (bool(global_injects or injects or global_filters or filters)
+                     or type(self).before_emit is not EventBus.before_emit)
+        return BaseBus._build_plan(self, event)._replace(
+            global_injects=global_injects,
+            injects=injects,
+            global_filters=global_filters,
+            filters=filters,
+            intercept=intercept
+        )
+
+    def _measure(self, event: EventType,
+                 stage: str) -> Optional[Callable[[tuple[CallbackEntry, ...]], tuple[CallbackEntry, ...]]]:
+        if self._metrics is None and self._profiler is None:
+            return None
+        return partial(self._instrument, event, stage)
+
+    def _instrument(self, event: EventType, stage: str,
+                    entries: tuple[CallbackEntry, ...]) -> tuple[CallbackEntry, ...]:
+        """
+        Wrap filters or injectors with the measuring wrappers of the metrics and the profiler
+        """
+        return tuple((self._instrument_async(event, stage, func), True) if is_async
+                     else (self._instrument_sync(event, stage, func), False)
+                     for func, is_async in entries)
+
     async def before_emit(self, event: EventType, *args, **kwargs) -> tuple[bool, dict]:
-        await BusInject.resolve(self, event, args, kwargs)
-        return await BusFilter.resolve(self, event, args, kwargs), kwargs
+        plan = self._get_plan(event)
+        if plan.global_injects:
+            kwargs.update(await self._apply_injects(plan.global_injects, args, kwargs))
+        if plan.injects:
+            kwargs.update(await self._apply_injects(plan.injects, args, kwargs))
+        return await self._apply_filters(event, plan.global_filters, plan.filters, args, kwargs), kwargs
 
     def clear(self):
         super().clear()
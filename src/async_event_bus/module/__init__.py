@@ -1,13 +1,39 @@
 from .base_bus import BaseBus
 from .base_module import BaseModule
+from .bus_executor import BusExecutor
 from .bus_filter import BusFilter
+from .bus_inbox import ThreadInbox
 from .bus_inject import BusInject
+from .bus_metrics import BusMetrics, Histogram
+from .bus_profiler import BusProfiler, CallbackProfile, SlowCall
+from .bus_queue import EventQueue, OverflowPolicy
+from .callback_cache import CallbackCache
+from .concurrency_limiter import ConcurrencyLimiter
+from .dispatch_plan import DispatchPlan
 from .module_exceptions import *
+from .rate_policy import Coalesce, Debounce, RatePolicy, Throttle
 
 __ALL__ = [
     BaseBus,
     BaseModule,
+    BusExecutor,
     BusFilter,
     BusInject,
-    MultipleError
+    BusMetrics,
+    BusProfiler,
+    Coalesce,
+    Debounce,
+    CallbackCache,
+    CallbackProfile,
+    Histogram,
+    ConcurrencyLimiter,
+    DispatchPlan,
+    EventQueue,
+    OverflowPolicy,
+    MultipleError,
+    QueueFullError,
+    RatePolicy,
+    SlowCall,
+    Throttle,
+    ThreadInbox
 ]
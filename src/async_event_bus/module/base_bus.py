@@ -1,11 +1,27 @@
 from abc import ABC, abstractmethod
-from asyncio import Semaphore, gather, get_event_loop, new_event_loop, run_coroutine_threadsafe, set_event_loop
-from typing import Any, Awaitable, Callable, Type, Union
+from collections import OrderedDict
+from asyncio import (AbstractEventLoop, CancelledError, TimeoutError as AsyncTimeoutError, ensure_future, gather,
+                     get_running_loop, run_coroutine_threadsafe, timeout as timeout_after, wait)
+from functools import partial
+from threading import Lock
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Coroutine, Iterable, Optional, Type, Union
 
 from loguru import logger
 
-from .module_exceptions import MultipleError
-from ..event import EventType, EventCallbackContainer
+from .bus_executor import BusExecutor, EXECUTORS, PROCESS, THREAD
+from .bus_inbox import ThreadInbox
+from .bus_loop import BackgroundLoop
+from .bus_metrics import BusMetrics, HANDLER
+from .bus_profiler import BusProfiler
+from .bus_queue import EventQueue, OverflowPolicy
+from .concurrency_limiter import ConcurrencyLimiter
+from .dispatch_plan import DispatchPlan
+from .module_exceptions import HandlerTimeoutError, MultipleError
+from .rate_policy import RatePolicy
+from ..event import (AbstractEvent, EventCallback, EventCallbackContainer, EventCallbackFactory, EventType,
+                     RouteIndex, TopicTrie)
+from ..event.route_index import WhereValue, resolve_field
 
 SubScriberCallback: Type = Callable[..., Union[Any, Awaitable[Any]]]
 
@@ -13,15 +29,49 @@ SubScriberCallback: Type = Callable[..., Union[Any, Awaitable[Any]]]
 class BaseBus(ABC):
     """
     Event base class, which provides the most basic event subscription and triggering services.
-    :param max_concurrent_tasks: The maximum number of tasks for an asynchronous task
+    :param max_concurrent_tasks: The maximum number of asynchronous handlers running at the same time on the whole bus,
+        None means no bus-wide limit
+    :param sync_executor: Where synchronous handlers run by default, "inline", "thread" or "process"
+    :param thread_pool_size: The maximum number of threads for synchronous handlers that run on the thread pool
+    :param plan_cache_size: The maximum number of cached dispatch plans, the least recently emitted one is evicted first
+    :param topic_cache_size: The maximum number of cached plans of topics that only wildcard patterns receive,
+        they are kept apart so that topics carrying ids can not evict the plans of the other events
     """
 
-    def __init__(self, max_concurrent_tasks: int = 10):
+    def __init__(self, max_concurrent_tasks: Optional[int] = 10, *, sync_executor: str = "inline",
+                 thread_pool_size: Optional[int] = None, plan_cache_size: int = 4096, topic_cache_size: int = 1024):
+        if plan_cache_size <= 0:
+            raise ValueError("plan_cache_size must be greater than 0")
+        if topic_cache_size <= 0:
+            raise ValueError("topic_cache_size must be greater than 0")
         self._subscribers: dict[str, EventCallbackContainer] = {}
-        self._semaphore = Semaphore(max_concurrent_tasks)
+        self._patterns = TopicTrie()
+        self._routes: dict[EventType, RouteIndex] = {}
+        self._plans: OrderedDict[EventType, DispatchPlan] = OrderedDict()
+        self._plan_cache_size = plan_cache_size
+        # Plans of the topics matched only by wildcard patterns
+        self._topic_plans: OrderedDict[str, DispatchPlan] = OrderedDict()
+        self._topic_cache_size = topic_cache_size
+        self._limiter = ConcurrencyLimiter(max_concurrent_tasks) if max_concurrent_tasks is not None else None
+        self._event_limiters: dict[EventType, ConcurrencyLimiter] = {}
+        self._subscriber_limiters: dict[tuple[EventType, Callable], ConcurrencyLimiter] = {}
+        self._event_policies: dict[EventType, RatePolicy] = {}
+        self._subscriber_policies: dict[tuple[EventType, Callable], RatePolicy] = {}
         self._raise_exception = False
+        self._queue: Optional[EventQueue] = None
+        self._sync_executor = self._check_executor(sync_executor)
+        self._executor = BusExecutor(thread_pool_size)
+        self._metrics: Optional[BusMetrics] = None
+        self._profiler: Optional[BusProfiler] = None
+        self._sync_loop = BackgroundLoop()
+        self._bound_loop: Optional[AbstractEventLoop] = None
+        self._inbox: Optional[ThreadInbox] = None
+        self._inbox_lock = Lock()
 
-    def on(self, event: EventType, *, weight: int = 1) -> Callable[[SubScriberCallback], SubScriberCallback]:
+    def on(self, event: EventType, *, weight: int = 1, executor: Optional[str] = None,
+           max_concurrent: Optional[int] = None, timeout: Optional[float] = None,
+           where: Optional[dict[str, WhereValue]] = None,
+           policy: Optional[RatePolicy] = None) -> Callable[[SubScriberCallback], SubScriberCallback]:
         """
         Subscribe to the event bus by decorator\n
         Use decorator to register an event handler to the event bus, which can be asynchronous or synchronous.\n
@@ -36,20 +86,50 @@ class BaseBus(ABC):
             @event_bus.on('message_create')
             async def message_recoder(message, *_, **__):
                 await ...
+            # Blocking synchronous functions can run on the thread pool
+            @event_bus.on('message_create', executor="thread")
+            def message_writer(message, *_, **__):
+                ...
+            # CPU-bound synchronous functions can run on the process pool,
+            # they must be importable and their arguments picklable
+            @event_bus.on('message_create', executor="process")
+            def message_scorer(message, *_, **__):
+                ...
+            # String events are dot separated topics, "*" matches one segment and "#" matches any number of them
+            @event_bus.on('message.*')
+            def message_observer(message, *_, **__):
+                ...
+            # Handlers can be routed on the content of the payload, lists match any of their values
+            @event_bus.on('order', where={"region": "eu", "tier": ["gold", "platinum"]})
+            def premium_eu_order(order, *_, **__):
+                ...
+            # Bursts of events can be debounced, throttled or coalesced per key
+            @event_bus.on('config_changed', policy=Debounce(0.5, key="tenant"))
+            async def reload_config(change, *_, **__):
+                ...
 
         :param event: Event to subscribe to
         :param weight: The selection weight of the event handler
+        :param executor: Where a synchronous handler runs, "inline", "thread" or "process", None means the bus default
+        :param max_concurrent: The maximum number of concurrent runs of this subscription, None means no limit
+        :param timeout: Seconds the handler may run before it is cancelled, None means no limit
+        :param where: Field values the emit must have for the handler to run, please check **BaseBus.subscribe**
+        :param policy: Holds back the runs of the handler during bursts, please check **BaseBus.subscribe**
         :return: The decorator function
         """
 
         def decorator(func: SubScriberCallback):
-            self.subscribe(event, func, weight=weight)
+            self.subscribe(event, func, weight=weight, executor=executor, max_concurrent=max_concurrent,
+                           timeout=timeout, where=where, policy=policy)
             logger.debug(f"{func.__name__} has subscribed to {event}, weight={weight}")
             return func
 
         return decorator
 
-    def subscribe(self, event: EventType, callback: SubScriberCallback, *, weight: int = 1) -> None:
+    def subscribe(self, event: EventType, callback: SubScriberCallback, *, weight: int = 1,
+                  executor: Optional[str] = None, max_concurrent: Optional[int] = None,
+                  timeout: Optional[float] = None, where: Optional[dict[str, WhereValue]] = None,
+                  policy: Optional[RatePolicy] = None) -> None:
         """
         Subscribe to the event bus\n
         Functions used to subscribe to functions inside, or can be used separately\n
@@ -66,10 +146,85 @@ class BaseBus(ABC):
         :param event: Event to subscribe to
         :param callback: Event callback function
         :param weight: The selection weight of the event handler
+        :param executor: Where a synchronous handler runs, "inline", "thread" or "process", None means the bus default
+        :param max_concurrent: The maximum number of concurrent runs of this subscription, None means no limit.
+            It applies to asynchronous and offloaded handlers, inline synchronous handlers never overlap
+        :param timeout: Seconds the handler may run before it is cancelled, None means no limit.
+            An overrun is reported as **HandlerTimeoutError**.
+            Inline synchronous handlers can not be interrupted and ignore it,
+            for offloaded handlers the bus stops waiting but the thread or process finishes the call
+        :param where: Field values the emit must have for the handler to run, a list, tuple or set matches any of
+            its items. A field is read from the keyword arguments of the emit, or else from the first positional
+            argument, as a mapping key or an attribute. Routed handlers are indexed by their values,
+            they run after the unconditional synchronous handlers of the event. Not available for patterns.
+            A handler has one predicate per event, subscribing it again with another where replaces the earlier one,
+            to match several combinations subscribe a separate function for each
+        :param policy: A **Debounce**, **Throttle** or **Coalesce** that decides when the handler runs,
+            it replaces the policy of the event set with **BaseBus.set_event_policy**.
+            The emit does not wait for a handler behind a policy, its errors are logged and counted by the policy
         """
-        if event not in self._subscribers:
-            self._subscribers[event] = EventCallbackContainer()
-        self._subscribers[event].add_callback(callback, weight)
+        event_callback = self._create_callback(callback, weight, executor, timeout)
+        if where is not None:
+            if self._is_pattern(event):
+                raise ValueError("where can not be used with a wildcard pattern")
+            if event not in self._routes:
+                self._routes[event] = RouteIndex()
+            if self._routes[event].add(where, event_callback):
+                name = getattr(callback, "__name__", callback)
+                logger.warning(f"{name} was already routed on {event}, its where is replaced by {where}")
+        elif self._is_pattern(event):
+            self._patterns.add(event).add_callback(event_callback)
+        else:
+            if event not in self._subscribers:
+                self._subscribers[event] = EventCallbackContainer()
+            self._subscribers[event].add_callback(event_callback)
+        if max_concurrent is not None:
+            self._subscriber_limiters[(event, callback)] = ConcurrencyLimiter(max_concurrent)
+        if policy is not None:
+            self._subscriber_policies[(event, callback)] = policy
+        self._invalidate_plan(self._affected_event(event))
+
+    @staticmethod
+    def _is_pattern(event: EventType) -> bool:
+        return isinstance(event, str) and TopicTrie.is_pattern(event)
+
+    def _affected_event(self, event: EventType) -> Optional[EventType]:
+        """
+        The event whose plan has to be dropped when a registration of this event changes,
+        None for a wildcard pattern or an event class, which can affect any topic or any subclass
+        """
+        if self._is_pattern(event) or self._is_event_class(event):
+            return None
+        return event
+
+    @staticmethod
+    def _is_event_class(event: EventType) -> bool:
+        return isinstance(event, type) and issubclass(event, AbstractEvent)
+
+    @staticmethod
+    def _normalize_event(event: Any, args: tuple) -> tuple[EventType, tuple]:
+        """
+        An emitted AbstractEvent instance is dispatched as its class and passed to the handlers as first argument
+        """
+        if isinstance(event, AbstractEvent):
+            return type(event), (event, *args)
+        return event, args
+
+    def _create_callback(self, callback: SubScriberCallback, weight: int, executor: Optional[str],
+                         timeout: Optional[float]) -> EventCallback:
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be greater than 0")
+        event_callback = EventCallbackFactory.create(callback, weight, executor=self._check_executor(executor),
+                                                     timeout=timeout)
+        if event_callback.is_async and executor not in (None, "inline"):
+            raise ValueError(f"Asynchronous handler {callback.__name__} can not run on executor {executor}")
+        return event_callback
+
+    @staticmethod
+    def _check_executor(executor: Optional[str]) -> Optional[str]:
+        if executor is not None and executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {executor}, expected one of {EXECUTORS}")
+        return executor
 
     def unsubscribe(self, event: EventType, callback: SubScriberCallback) -> None:
         """
@@ -82,49 +237,442 @@ class BaseBus(ABC):
         :param event: Event to subscribe to
         :param callback: Event callback function
         """
+        container = self._patterns.get(event) if self._is_pattern(event) else self._subscribers.get(event)
+        routes = self._routes.get(event)
+        if container is not None or routes is not None:
+            if container is not None:
+                container.remove_callback(callback)
+                if self._is_pattern(event) and not container.sync_callback and not container.async_callback:
+                    # Without patterns string emits skip the trie and the topic plans
+                    self._patterns.remove(event)
+            if routes is not None and routes.remove(callback) and len(routes) == 0:
+                del self._routes[event]
+            self._subscriber_limiters.pop((event, callback), None)
+            # Calls held back for the subscription must not run after it left, the other subscriptions keep theirs
+            policies = [self._subscriber_policies.pop((event, callback), None)]
+            if self._affected_event(event) is None:
+                # A pattern or an event class receives other events, whose policies may hold its calls
+                policies.extend(self._event_policies.values())
+            else:
+                policies.append(self._event_policies.get(event))
+            for policy in policies:
+                if policy is not None:
+                    policy.cancel(callback, event)
+            self._invalidate_plan(self._affected_event(event))
+
+    def set_event_concurrency(self, event: EventType, limit: Optional[int]) -> None:
+        """
+        Limit how many handlers of an event can run at the same time\n
+        Event limits are enforced together with the bus-wide limit and the limits of the subscriptions,
+        so a burst of a low priority event can not take every slot of the bus\n
+        Example:
+            event_bus.set_event_concurrency('metrics_flush', 2)
+
+        :param event: Event to limit
+        :param limit: The maximum number of concurrent handlers, None removes the limit
+        """
+        if limit is None:
+            self._event_limiters.pop(event, None)
+        else:
+            self._event_limiters[event] = ConcurrencyLimiter(limit)
+        self._invalidate_plan(event)
+
+    def set_event_policy(self, event: EventType, policy: Optional[RatePolicy]) -> None:
+        """
+        Hold back the runs of every handler of an event during bursts\n
+        Each handler gets its own state in the policy, subscriptions with a policy of their own keep it.
+        Filters and injectors still run for every emit\n
+        Example:
+            event_bus.set_event_policy('cache_invalidated', Throttle(1, key="tenant"))
+
+        :param event: Event whose handlers are held back
+        :param policy: A **Debounce**, **Throttle** or **Coalesce**, None removes the policy and drops the calls
+            it was holding back
+        """
+        previous = self._event_policies.pop(event, None)
+        if previous is not None and previous is not policy:
+            previous.cancel()
+        if policy is not None:
+            self._event_policies[event] = policy
+        self._invalidate_plan(event)
+
+    def get_policy(self, event: EventType, callback: Optional[SubScriberCallback] = None) -> Optional[RatePolicy]:
+        """
+        Get a rate policy to inspect its counters or flush it
+        :param event: The policy of this event
+        :param callback: Together with event, the policy of this subscription
+        """
+        if callback is None:
+            return self._event_policies.get(event)
+        return self._subscriber_policies.get((event, callback))
+
+    def get_limiter(self, event: Optional[EventType] = None,
+                    callback: Optional[SubScriberCallback] = None) -> Optional[ConcurrencyLimiter]:
+        """
+        Get a concurrency limiter to inspect its in-flight and waiter counts
+        :param event: None for the bus-wide limiter, otherwise the limiter of this event
+        :param callback: Together with event, the limiter of this subscription
+        """
+        if event is None:
+            return self._limiter
+        if callback is None:
+            return self._event_limiters.get(event)
+        return self._subscriber_limiters.get((event, callback))
+
+    def _build_plan(self, event: EventType) -> DispatchPlan:
+        """
+        Build the dispatch plan of an event from the current registrations\n
+        Subclasses that add their own stages should extend the plan returned here
+        :param event: Event to build the plan for
+        """
+        containers = self._match_subscribers(event)
+        routes = self._match_routes(event)
+        if not containers and not routes:
+            return DispatchPlan()
+        if len(containers) == 1:
+            subscribed, container = containers[0]
+            sync_callbacks = [(subscribed, callback) for callback in container.sync_callback]
+            async_callbacks = [(subscribed, callback) for callback in container.async_callback]
+        else:
+            # Merge the matching subscriptions by weight, sorted is stable so exact subscriptions stay first
+            sync_callbacks = sorted(((subscribed, callback) for subscribed, container in containers
+                                     for callback in container.sync_callback),
+                                    key=lambda item: item[1].weight, reverse=True)
+            async_callbacks = [(subscribed, callback) for subscribed, container in containers
+                               for callback in container.async_callback]
+        names: dict[Callable, str] = {}
+        sync_handlers, async_handlers = self._compile_handlers(event, sync_callbacks, async_callbacks, names)
+        routed = tuple((fields, {key: self._compile_handlers(event,
+                                                             [(subscribed, callback)
+                                                              for callback in container.sync_callback],
+                                                             [(subscribed, callback)
+                                                              for callback in container.async_callback],
+                                                             names)
+                                 for key, container in table.items()})
+                       for subscribed, index in routes for fields, table in index.tables())
+        return DispatchPlan(
+            sync_handlers=sync_handlers,
+            async_handlers=async_handlers,
+            routes=routed,
+            handler_names=names
+        )
+
+    def _compile_handlers(self, event: EventType, sync_callbacks: list[tuple[EventType, EventCallback]],
+                          async_callbacks: list[tuple[EventType, EventCallback]],
+                          names: Optional[dict[Callable, str]] = None
+                          ) -> tuple[tuple[Callable, ...], tuple[Callable, ...]]:
+        """
+        Turn subscriptions into the handlers of a plan, bound to their executor, timeout, limiters and instruments
+        :param sync_callbacks: Pairs of subscribed event and synchronous callback, in weight order
+        :param async_callbacks: Pairs of subscribed event and asynchronous callback
+        :param names: Filled with the name of the subscribed function of each awaited handler
+        :return: The inline synchronous handlers and the awaited handlers
+        """
+        sync_handlers = []
+        async_handlers = []
+        for subscribed, callback in sync_callbacks:
+            # Offloaded handlers are awaited together with the asynchronous ones,
+            # inline handlers keep running first in weight order
+            executor = callback.executor or self._sync_executor
+            if executor == THREAD:
+                handler = self._limit(event, subscribed, callback,
+                                      partial(self._executor.run_in_thread, callback.callback))
+            elif executor == PROCESS:
+                handler = self._limit(event, subscribed, callback,
+                                      partial(self._executor.run_in_process, callback.callback))
+            else:
+                handler = self._instrument_sync(event, HANDLER, callback.callback)
+            self._add_handler(event, subscribed, callback, handler, executor in (THREAD, PROCESS),
+                              sync_handlers, async_handlers, names)
+        for subscribed, callback in async_callbacks:
+            self._add_handler(event, subscribed, callback, self._limit(event, subscribed, callback, callback.callback),
+                              True, sync_handlers, async_handlers, names)
+        return tuple(sync_handlers), tuple(async_handlers)
+
+    def _add_handler(self, event: EventType, subscribed: EventType, callback: EventCallback, handler: Callable,
+                     is_async: bool, sync_handlers: list[Callable], async_handlers: list[Callable],
+                     names: Optional[dict[Callable, str]] = None) -> None:
+        """
+        Put a compiled handler into the handlers of a plan,
+        a handler behind a rate policy is replaced by the synchronous gate of the policy
+        """
+        policy = self._subscriber_policies.get((subscribed, callback.callback)) or self._event_policies.get(event)
+        if policy is not None:
+            sync_handlers.append(policy.bind(event, subscribed, callback.callback, handler, is_async))
+        elif is_async:
+            async_handlers.append(handler)
+            if names is not None:
+                names[handler] = callback.callback.__name__
+        else:
+            sync_handlers.append(handler)
+
+    def _match_routes(self, event: EventType) -> list[tuple[EventType, RouteIndex]]:
+        """
+        Find the routed subscriptions that may receive an event
+        :return: Pairs of the subscribed event and its route index
+        """
+        if not self._routes:
+            return []
+        if self._is_event_class(event):
+            return [(cls, self._routes[cls]) for cls in event.__mro__ if cls in self._routes]
+        return [(event, self._routes[event])] if event in self._routes else []
+
+    @staticmethod
+    def _route(plan: DispatchPlan, args: tuple,
+               kwargs: dict[str, Any]) -> tuple[tuple[Callable, ...], tuple[Callable, ...]]:
+        """
+        Add the routed handlers whose predicates match an emit to the handlers of its plan
+        :return: The inline synchronous handlers and the awaited handlers
+        """
+        sync_handlers, async_handlers = plan.sync_handlers, plan.async_handlers
+        payload = args[0] if args else None
+        for fields, table in plan.routes:
+            try:
+                handlers = table.get(tuple(resolve_field(payload, kwargs, field) for field in fields))
+            except TypeError:
+                # An unhashable value matches no registered value
+                continue
+            if handlers is not None:
+                sync_handlers += handlers[0]
+                async_handlers += handlers[1]
+        return sync_handlers, async_handlers
+
+    def _match_subscribers(self, event: EventType) -> list[tuple[EventType, EventCallbackContainer]]:
+        """
+        Find the subscriptions that receive an event
+        :return: Pairs of the subscribed event or pattern and its container, exact subscriptions first
+        """
+        if self._is_event_class(event):
+            # Handlers of base event classes also receive the events of their subclasses
+            return [(cls, self._subscribers[cls]) for cls in event.__mro__ if cls in self._subscribers]
+        containers = []
         if event in self._subscribers:
-            self._subscribers[event].remove_callback(callback)
+            containers.append((event, self._subscribers[event]))
+        if isinstance(event, str) and len(self._patterns) != 0:
+            containers.extend(self._patterns.match(event))
+        return containers
+
+    def _get_plan(self, event: EventType) -> DispatchPlan:
+        """
+        Get the cached dispatch plan of an event, building it on first use\n
+        Plans without any handler are not cached, so that emitting many distinct events nobody listens to
+        does not fill the cache, which holds at most **plan_cache_size** plans.
+        Topics that only wildcard patterns receive go to a separate cache of **topic_cache_size** plans
+        :param event: Event to get the plan for
+        """
+        plans, size = self._plans, self._plan_cache_size
+        if len(self._patterns) != 0 and isinstance(event, str) and event not in self._subscribers \
+                and event not in self._routes:
+            plans, size = self._topic_plans, self._topic_cache_size
+        plan = plans.get(event)
+        if plan is not None:
+            plans.move_to_end(event)
+            return plan
+        plan = self._build_plan(event)
+        if plan.sync_handlers or plan.async_handlers or plan.routes:
+            plans[event] = plan
+            if len(plans) > size:
+                plans.popitem(last=False)
+        return plan
 
-    def emit_sync(self, event: EventType, *args, **kwargs) -> None:
+    def _invalidate_plan(self, event: Optional[EventType] = None) -> None:
+        """
+        Drop cached dispatch plans, they will be rebuilt on the next emit
+        :param event: The event whose registrations changed, None means every event
         """
-        Trigger events in a blocking manner\n
+        if event is None:
+            self._plans.clear()
+            self._topic_plans.clear()
+        else:
+            self._plans.pop(event, None)
+            self._topic_plans.pop(event, None)
+
+    def emit_sync(self, event: EventType, *args, deadline: Optional[float] = None, **kwargs) -> None:
+        """
+        Trigger events in a blocking manner, for synchronous code\n
+        The emit runs on the loop bound with **BaseBus.bind_loop** if there is one,
+        otherwise on a background loop thread that the bus starts on first use and keeps for later calls.
+        Blocking the thread of a running event loop would deadlock it,
+        so calling this from a coroutine raises RuntimeError, await **BaseBus.emit** there instead\n
         Example:
             emit_sync('message_create', "This is a message", user="Half")
 
         :param event: Event to be triggered
+        :param deadline: Seconds the whole emit may take, please check **BaseBus.emit** for details
         """
         try:
-            loop = get_event_loop()
-            if loop and loop.is_running():
-                future = run_coroutine_threadsafe(
-                    self.emit(event, *args, **kwargs),
-                    loop
-                )
-                future.result()
+            get_running_loop()
         except RuntimeError:
-            loop = new_event_loop()
-            set_event_loop(loop)
-            try:
-                loop.run_until_complete(
-                    self.emit(event, *args, **kwargs)
-                )
-            finally:
-                loop.close()
-                set_event_loop(None)
+            pass
+        else:
+            raise RuntimeError("emit_sync can not block the thread of a running event loop, "
+                               "await emit or use emit_nowait instead")
+        coroutine = self.emit(event, *args, deadline=deadline, **kwargs)
+        loop = self._bound_loop
+        if loop is not None and loop.is_running():
+            run_coroutine_threadsafe(coroutine, loop).result()
+        else:
+            self._sync_loop.run(coroutine)
+
+    def bind_loop(self, loop: Optional[AbstractEventLoop] = None) -> None:
+        """
+        Run the emits of synchronous callers on the event loop of the application\n
+        Limiters, queues and handlers then all live on that loop,
+        while it is not running **BaseBus.emit_sync** falls back to the background loop\n
+        Example:
+            async def main():
+                event_bus.bind_loop()
+                await asyncio.to_thread(legacy_code_that_calls_emit_sync)
+
+        :param loop: The loop to bind, None binds the running loop
+        """
+        self._bound_loop = loop if loop is not None else get_running_loop()
+
+    def _target_loop(self) -> AbstractEventLoop:
+        """
+        The loop that callers on other threads emit on, the bound loop while it runs, otherwise the background loop
+        """
+        loop = self._bound_loop
+        if loop is not None and loop.is_running():
+            return loop
+        return self._sync_loop.loop
+
+    def shutdown_sync_loop(self, timeout: Optional[float] = 5) -> None:
+        """
+        Stop the background loop of **BaseBus.emit_sync**, it is started again by the next call
+        :param timeout: Seconds to wait for the loop thread, None waits forever
+        """
+        self._sync_loop.shutdown(timeout)
+
+    def _limit(self, event: EventType, subscribed: EventType, callback: EventCallback, coroutine: Callable) -> Callable:
+        """
+        Bind an asynchronous handler to its timeout and to the limiters that apply to it,
+        the most specific limiter is acquired first so that a waiting handler does not hold a bus-wide slot.
+        The timeout only counts the time the handler runs, not the time spent waiting for the limiters
+        :param event: The emitted event
+        :param subscribed: The event or pattern the handler subscribed to
+        :param coroutine: The asynchronous function that runs the handler
+        """
+        if callback.timeout is not None:
+            coroutine = partial(self._run_with_timeout, event, callback, coroutine)
+        coroutine = self._instrument_async(event, HANDLER, coroutine, callback.callback)
+        limiters = tuple(limiter for limiter in (self._subscriber_limiters.get((subscribed, callback.callback)),
+                                                 self._event_limiters.get(event),
+                                                 self._limiter) if limiter is not None)
+        if not limiters:
+            return coroutine
+        if self._metrics is not None:
+            return partial(self._run_limited_measured, self._metrics, event, limiters, coroutine)
+        return partial(self._run_limited, limiters, coroutine)
+
+    def _instrument_sync(self, event: EventType, stage: str, func: Callable) -> Callable:
+        """
+        Wrap a synchronous callback with the measuring wrappers of the metrics and the profiler that are enabled
+        :param stage: "handler", "filter" or "inject"
+        """
+        name = BusMetrics.callback_name(func)
+        if self._profiler is not None:
+            func = self._profiler.profile_sync(event, stage, func, name)
+        if self._metrics is not None:
+            func = self._metrics.measure_sync(event, stage, func, name)
+        return func
+
+    def _instrument_async(self, event: EventType, stage: str, coroutine: Callable,
+                          origin: Optional[Callable] = None) -> Callable:
+        """
+        Wrap an asynchronous callback with the measuring wrappers of the metrics and the profiler that are enabled
+        :param stage: "handler", "filter" or "inject"
+        :param origin: The function the callback is named after, when coroutine wraps it
+        """
+        name = BusMetrics.callback_name(origin or coroutine)
+        if self._profiler is not None:
+            coroutine = self._profiler.profile_async(event, stage, coroutine, name)
+        if self._metrics is not None:
+            coroutine = self._metrics.measure_async(event, stage, coroutine, name)
+        return coroutine
+
+    @staticmethod
+    async def _run_with_timeout(event: EventType, callback: EventCallback, coroutine: Callable, *args, **kwargs):
+        """
+        Asynchronous function executor that cancels the function when it overruns the timeout of its callback,
+        a TimeoutError raised by the function itself is passed on as it is
+        """
+        timer = timeout_after(callback.timeout)
+        try:
+            async with timer:
+                return await coroutine(*args, **kwargs)
+        except AsyncTimeoutError:
+            if not timer.expired():
+                raise
+            raise HandlerTimeoutError(event, callback.timeout, callback.callback.__name__) from None
 
-    async def _run_with_semaphore(self, coroutine: Callable, *args, **kwargs):
+    @staticmethod
+    async def _gather_until(event: EventType, coroutines: list[Coroutine], timeout: float, deadline: float,
+                            names: list[Optional[str]]) -> list[Any]:
         """
-        Asynchronous function executor with limiter
+        Like **asyncio.gather** with return_exceptions,
+        but cancels the coroutines still running after timeout and reports them as **HandlerTimeoutError**
+        :param timeout: Seconds left until the deadline
+        :param deadline: The deadline of the emit, as it is reported
+        :param names: The name of the handler of each coroutine
+        """
+        tasks = [ensure_future(coroutine) for coroutine in coroutines]
+        _, pending = await wait(tasks, timeout=max(timeout, 0))
+        if pending:
+            for task in pending:
+                task.cancel()
+            # Let the cancelled handlers run their cleanup so that they release their limiters
+            await gather(*pending, return_exceptions=True)
+        results = []
+        for task, name in zip(tasks, names):
+            if task in pending:
+                results.append(HandlerTimeoutError(event, deadline, name))
+            elif task.cancelled():
+                results.append(CancelledError())
+            else:
+                results.append(task.exception())
+        return results
+
+    @staticmethod
+    async def _run_limited(limiters: tuple[ConcurrencyLimiter, ...], coroutine: Callable, *args, **kwargs):
+        """
+        Asynchronous function executor with limiters
+        :param limiters: Limiters to hold while the function runs
         :param coroutine: Original asynchronous function
         """
-        async with self._semaphore:
+        acquired = 0
+        try:
+            for limiter in limiters:
+                await limiter.acquire()
+                acquired += 1
             return await coroutine(*args, **kwargs)
+        finally:
+            for index in range(acquired - 1, -1, -1):
+                limiters[index].release()
+
+    @staticmethod
+    async def _run_limited_measured(metrics: BusMetrics, event: EventType, limiters: tuple[ConcurrencyLimiter, ...],
+                                    coroutine: Callable, *args, **kwargs):
+        """
+        Same as **BaseBus._run_limited**, and records the time spent waiting for the limiters
+        """
+        acquired = 0
+        start = perf_counter()
+        try:
+            for limiter in limiters:
+                await limiter.acquire()
+                acquired += 1
+            metrics.record_wait(event, perf_counter() - start)
+            return await coroutine(*args, **kwargs)
+        finally:
+            for index in range(acquired - 1, -1, -1):
+                limiters[index].release()
 
     @abstractmethod
     async def before_emit(self, event: EventType, *args, **kwargs) -> tuple[bool, dict]:
         return False, {}
 
-    async def emit(self, event: EventType, *args, **kwargs) -> None:
+    async def emit(self, event: EventType, *args, deadline: Optional[float] = None, **kwargs) -> None:
         """
         Asynchronous trigger event\n
         Execution order:
@@ -135,17 +683,58 @@ class BaseBus(ABC):
             and the order of execution will be meaningless\n
         Example:
             await emit('message_create', "This is a message", user="Half")
+            # Bound the time the whole emit may take
+            await emit('message_create', "This is a message", deadline=0.5)
 
-        :param event: Event to be triggered
+        :param event: Event to be triggered, an AbstractEvent instance is dispatched as its class
+            and passed to the handlers as first argument
+        :param deadline: Seconds the whole emit may take, asynchronous and offloaded handlers still running then
+            are cancelled and reported as **HandlerTimeoutError**. Because of this parameter,
+            handlers can not receive a keyword argument named deadline
         """
-        skip, extra_kwargs = await self.before_emit(event, *args, **kwargs)
-        if skip:
-            return
-        kwargs.update(extra_kwargs)
-        if event in self._subscribers:
+        try:
+            plan = self._plans.get(event)
+        except TypeError:
+            # An unhashable event instance, such as a dataclass, is looked up by its class below
+            plan = None
+        if plan is None:
+            event, args = self._normalize_event(event, args)
+            plan = self._get_plan(event)
+        else:
+            self._plans.move_to_end(event)
+        metrics = self._metrics
+        if metrics is not None:
+            start = perf_counter()
+        profiler = self._profiler
+        if profiler is not None:
+            token = profiler.begin()
+        try:
+            if deadline is not None:
+                end = get_running_loop().time() + deadline
+            if plan.intercept:
+                if deadline is None:
+                    skip, extra_kwargs = await self.before_emit(event, *args, **kwargs)
+                else:
+                    timer = timeout_after(deadline)
+                    try:
+                        async with timer:
+                            skip, extra_kwargs = await self.before_emit(event, *args, **kwargs)
+                    except AsyncTimeoutError:
+                        if not timer.expired():
+                            raise
+                        raise HandlerTimeoutError(event, deadline, "before_emit") from None
+                if skip:
+                    if metrics is not None:
+                        metrics.record_drop(event)
+                    return
+                kwargs.update(extra_kwargs)
             exceptions = []
+            if plan.routes:
+                sync_handlers, async_handlers = self._route(plan, args, kwargs)
+            else:
+                sync_handlers, async_handlers = plan.sync_handlers, plan.async_handlers
 
-            for callback in self._subscribers[event].sync_callback:
+            for callback in sync_handlers:
                 try:
                     callback(*args, **kwargs)
                 except Exception as e:
@@ -153,24 +742,366 @@ class BaseBus(ABC):
                         raise e
                     exceptions.append(e)
 
-            async_handlers = [self._run_with_semaphore(callback, *args, **kwargs) for callback in
-                              self._subscribers[event].async_callback]
+            if deadline is None and len(async_handlers) == 1:
+                # A lone handler is awaited in place instead of being wrapped in a task by gather
+                try:
+                    await async_handlers[0](*args, **kwargs)
+                except Exception as e:
+                    if self._raise_exception:
+                        raise e
+                    exceptions.append(e)
+            elif async_handlers:
+                coroutines = [callback(*args, **kwargs) for callback in async_handlers]
 
+                if deadline is not None:
+                    names = plan.handler_names
+                    results = await self._gather_until(event, coroutines, end - get_running_loop().time(), deadline,
+                                                       [names.get(callback) for callback in async_handlers])
+                    for result in results:
+                        if result is not None:
+                            if self._raise_exception:
+                                raise result
+                            exceptions.append(result)
+                elif self._raise_exception:
+                    await gather(*coroutines, return_exceptions=False)
+                else:
+                    results = await gather(*coroutines, return_exceptions=True)
+                    exceptions.extend(result for result in results if isinstance(result, BaseException))
+
+            if (exception := self._collapse_exceptions(exceptions)) is not None:
+                raise exception
+        finally:
+            if metrics is not None:
+                metrics.record_emit(event, perf_counter() - start)
+            if profiler is not None:
+                profiler.end(token)
+
+    async def emit_many(self, event: EventType, payloads: Iterable[Any], **kwargs) -> list[Optional[Exception]]:
+        """
+        Trigger an event once for every payload\n
+        Each payload is passed as the first positional argument of the handlers,
+        keyword arguments are shared by the whole batch.
+        Please check **BaseBus.emit_batch** for details\n
+        Example:
+            errors = await emit_many('message_create', ["Hello", "World"], user="Half")
+
+        :param event: Event to be triggered
+        :param payloads: Payloads to deliver
+        :return: One entry per payload, None if it was handled without error
+        """
+        return await self.emit_batch(((event, payload) for payload in payloads), **kwargs)
+
+    async def emit_batch(self, items: Iterable[tuple[EventType, Any]], **kwargs) -> list[Optional[Exception]]:
+        """
+        Trigger a batch of events that may be of different types\n
+        The dispatch plan of each event type is resolved once per batch,
+        injectors and filters still run for every item.
+        Synchronous handlers run item by item,
+        then the asynchronous handlers of the whole batch are scheduled together in a single **asyncio.gather**.\n
+        Instead of raising, the errors are returned per item,
+        a single exception as is and several exceptions wrapped in a **MultipleError**.
+        When **raise_exception_immediately** is set, the first error is raised instead\n
+        Example:
+            errors = await emit_batch([('message_create', "Hello"), ('message_delete', "World")])
+
+        :param items: Pairs of event and payload
+        :return: One entry per item, None if it was handled without error
+        """
+        plans: dict[EventType, DispatchPlan] = {}
+        exceptions: list[list[Exception]] = []
+        async_handlers = []
+        owners: list[int] = []
+
+        for index, (event, payload) in enumerate(items):
+            item_exceptions = []
+            exceptions.append(item_exceptions)
+            args = (payload,)
+            event, args = self._normalize_event(event, args)
+            plan = plans.get(event)
+            if plan is None:
+                plan = plans[event] = self._get_plan(event)
+            item_kwargs = kwargs.copy()
+            if self._metrics is not None:
+                self._metrics.record_emit(event)
+
+            if plan.intercept:
+                try:
+                    skip, extra_kwargs = await self.before_emit(event, *args, **item_kwargs)
+                except Exception as e:
+                    if self._raise_exception:
+                        self._discard(async_handlers)
+                        raise e
+                    item_exceptions.append(e)
+                    continue
+                if skip:
+                    if self._metrics is not None:
+                        self._metrics.record_drop(event)
+                    continue
+                item_kwargs.update(extra_kwargs)
+            if plan.routes:
+                sync_handlers, item_handlers = self._route(plan, args, item_kwargs)
+            else:
+                sync_handlers, item_handlers = plan.sync_handlers, plan.async_handlers
+
+            for callback in sync_handlers:
+                try:
+                    callback(*args, **item_kwargs)
+                except Exception as e:
+                    if self._raise_exception:
+                        self._discard(async_handlers)
+                        raise e
+                    item_exceptions.append(e)
+
+            for callback in item_handlers:
+                async_handlers.append(callback(*args, **item_kwargs))
+                owners.append(index)
+
+        if async_handlers:
             if self._raise_exception:
                 await gather(*async_handlers, return_exceptions=False)
             else:
                 results = await gather(*async_handlers, return_exceptions=True)
-                if not (len(results) == 1 and results[0] is None):
-                    exceptions.extend(results)
+                for index, result in zip(owners, results):
+                    if isinstance(result, BaseException):
+                        exceptions[index].append(result)
 
-            if (exception_size := len(exceptions)) != 0:
-                if exception_size == 1:
-                    raise exceptions[0]
-                else:
-                    raise MultipleError(exceptions)
+        return [self._collapse_exceptions(item_exceptions) for item_exceptions in exceptions]
+
+    def enable_queue(self, maxsize: int = 1024, workers: int = 4,
+                     policy: OverflowPolicy = OverflowPolicy.BLOCK) -> EventQueue:
+        """
+        Enable the queued mode\n
+        Events passed to **BaseBus.publish** or **BaseBus.emit_nowait** are put on a bounded queue
+        and emitted by a pool of worker tasks, so the producer does not wait for the handlers.
+        Errors raised while handling a queued event are logged and counted by the queue\n
+        Example:
+            queue = event_bus.enable_queue(maxsize=10000, workers=8, policy=OverflowPolicy.DROP_OLDEST)
+            event_bus.emit_nowait('message_create', "This is a message")
+            print(queue.depth, queue.dropped)
+
+        :param maxsize: The maximum number of queued events
+        :param workers: The number of worker tasks
+        :param policy: What to do when the queue is full
+        :return: The queue, which exposes the queue depth and the drop counters
+        """
+        if self._queue is not None:
+            raise RuntimeError("Queued mode is already enabled")
+        self._queue = EventQueue(self, maxsize, workers, policy)
+        return self._queue
+
+    async def disable_queue(self, drain: bool = True) -> None:
+        """
+        Disable the queued mode and stop its workers
+        :param drain: Handle the events that are still queued before stopping
+        """
+        if self._queue is None:
+            return
+        queue, self._queue = self._queue, None
+        await queue.close(drain)
+
+    def _require_queue(self) -> EventQueue:
+        if self._queue is None:
+            raise RuntimeError("Queued mode is not enabled, call enable_queue first")
+        return self._queue
+
+    async def publish(self, event: EventType, *args, **kwargs) -> bool:
+        """
+        Put an event on the queue without waiting for its handlers\n
+        With the BLOCK policy this waits until there is room in the queue\n
+        Example:
+            await publish('message_create', "This is a message", user="Half")
+
+        :param event: Event to be triggered
+        :return: False if the event was dropped
+        """
+        return await self._require_queue().put(event, args, kwargs)
+
+    def emit_nowait(self, event: EventType, *args, **kwargs) -> bool:
+        """
+        Put an event on the queue without waiting at all\n
+        Must be called from the thread of the running event loop.
+        As this never waits, the BLOCK policy raises **QueueFullError** when the queue is full\n
+        Example:
+            emit_nowait('message_create', "This is a message", user="Half")
+
+        :param event: Event to be triggered
+        :return: False if the event was dropped
+        """
+        return self._require_queue().put_nowait(event, args, kwargs)
+
+    @property
+    def queue(self) -> Optional[EventQueue]:
+        return self._queue
+
+    def enable_inbox(self, maxsize: int = 65536, policy: OverflowPolicy = OverflowPolicy.BLOCK) -> ThreadInbox:
+        """
+        Configure the buffer of **BaseBus.emit_threadsafe**, it is created with the default settings otherwise\n
+        Example:
+            inbox = event_bus.enable_inbox(maxsize=100000, policy=OverflowPolicy.DROP_OLDEST)
+
+        :param maxsize: The maximum number of buffered events
+        :param policy: What to do when the buffer is full, BLOCK makes the producer thread wait
+        :return: The inbox, which exposes the buffer depth and the drop counters
+        """
+        with self._inbox_lock:
+            if self._inbox is not None:
+                raise RuntimeError("The thread inbox is already enabled")
+            self._inbox = ThreadInbox(self, self._target_loop, maxsize, policy)
+            return self._inbox
+
+    async def disable_inbox(self, drain: bool = True) -> None:
+        """
+        Remove the buffer of **BaseBus.emit_threadsafe**, must be awaited on the loop the events are emitted on
+        :param drain: Handle the events that are still buffered before removing it
+        """
+        if self._inbox is None:
+            return
+        inbox, self._inbox = self._inbox, None
+        await inbox.close(drain)
+
+    def emit_threadsafe(self, event: EventType, *args, **kwargs) -> bool:
+        """
+        Hand an event over to the event loop from any thread, without waiting for its handlers\n
+        The event is put on a bounded buffer that the loop takes in batches,
+        the loop is woken up once per batch instead of once per event.
+        Events are emitted on the loop bound with **BaseBus.bind_loop** while it runs, otherwise on the background loop.
+        Errors raised while handling the event are logged and counted by the inbox\n
+        Example:
+            emit_threadsafe('message_create', "This is a message", user="Half")
+
+        :param event: Event to be triggered
+        :return: False if the event was dropped
+        """
+        inbox = self._inbox
+        if inbox is None:
+            # Several producer threads may be the first to emit at the same time, only one inbox must be created
+            with self._inbox_lock:
+                if self._inbox is None:
+                    self._inbox = ThreadInbox(self, self._target_loop)
+                inbox = self._inbox
+        return inbox.put(event, args, kwargs)
+
+    @property
+    def inbox(self) -> Optional[ThreadInbox]:
+        return self._inbox
+
+    def enable_metrics(self, buckets: Optional[Iterable[float]] = None) -> BusMetrics:
+        """
+        Start collecting metrics
+
+        Emits are counted and timed end to end, handlers, filters and injectors get latency histograms
+        and error counters, and handlers behind a concurrency limit record how long they waited for it.
+        While disabled, the bus runs no measuring code besides one check per emit\n
+        Example:
+            metrics = event_bus.enable_metrics()
+            ...
+            print(metrics.to_prometheus())
+
+        :param buckets: Upper bounds of the latency histograms in seconds, None uses **DEFAULT_BUCKETS**
+        :return: The metrics being collected, the same object is returned if metrics are already enabled
+        """
+        if self._metrics is None:
+            self._metrics = BusMetrics(buckets)
+            # Measuring wrappers are compiled into the plans
+            self._invalidate_plan()
+        return self._metrics
+
+    def disable_metrics(self) -> Optional[BusMetrics]:
+        """
+        Stop collecting metrics
+        :return: The metrics collected so far
+        """
+        metrics, self._metrics = self._metrics, None
+        if metrics is not None:
+            self._invalidate_plan()
+        return metrics
+
+    @property
+    def metrics(self) -> Optional[BusMetrics]:
+        return self._metrics
+
+    def enable_profiler(self, sample_rate: float = 0.01, threshold: Optional[float] = None,
+                        keep_slowest: int = 5) -> BusProfiler:
+        """
+        Start profiling a sample of the emits\n
+        Handlers, filters and injectors of the sampled emits record their wall and on-CPU time,
+        the arguments of their slowest calls are kept and calls over the threshold are logged.
+        Only emits through **BaseBus.emit** are sampled, which includes **emit_sync** and the queued mode\n
+        Example:
+            profiler = event_bus.enable_profiler(sample_rate=0.05, threshold=0.1)
+            ...
+            print(profiler.format_report(top=10))
+
+        :param sample_rate: Fraction of emits to sample, between 0 and 1
+        :param threshold: Seconds of wall time above which a sampled call is logged, None disables the log
+        :param keep_slowest: How many of the slowest calls to keep the arguments of, per callback
+        :return: The profiler, an already enabled profiler is returned as is
+        """
+        if self._profiler is None:
+            self._profiler = BusProfiler(sample_rate, threshold, keep_slowest)
+            # Profiling wrappers are compiled into the plans
+            self._invalidate_plan()
+        return self._profiler
+
+    def disable_profiler(self) -> Optional[BusProfiler]:
+        """
+        Stop profiling
+        :return: The profiler with what it recorded so far
+        """
+        profiler, self._profiler = self._profiler, None
+        if profiler is not None:
+            self._invalidate_plan()
+        return profiler
+
+    @property
+    def profiler(self) -> Optional[BusProfiler]:
+        return self._profiler
+
+    @staticmethod
+    def _discard(coroutines: list[Coroutine]) -> None:
+        """
+        Close coroutines that will never be awaited because the emit was aborted
+        """
+        for coroutine in coroutines:
+            coroutine.close()
+
+    @staticmethod
+    def _collapse_exceptions(exceptions: list[Exception]) -> Optional[Exception]:
+        if (exception_size := len(exceptions)) == 0:
+            return None
+        if exception_size == 1:
+            return exceptions[0]
+        return MultipleError(exceptions)
 
     def clear(self):
         self._subscribers.clear()
+        self._patterns.clear()
+        self._routes.clear()
+        self._subscriber_limiters.clear()
+        for policy in (*self._subscriber_policies.values(), *self._event_policies.values()):
+            policy.cancel()
+        self._subscriber_policies.clear()
+        self._plans.clear()
+        self._topic_plans.clear()
+
+    @property
+    def sync_executor(self) -> str:
+        return self._sync_executor
+
+    @sync_executor.setter
+    def sync_executor(self, value: str) -> None:
+        if value is None:
+            raise ValueError("The default executor can not be None")
+        self._sync_executor = self._check_executor(value)
+        self._invalidate_plan()
+
+    @property
+    def executor(self) -> BusExecutor:
+        return self._executor
+
+    @property
+    def sync_loop(self) -> BackgroundLoop:
+        return self._sync_loop
 
     @property
     def raise_exception_immediately(self) -> bool:
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import Callable, Optional
 
+from .dispatch_plan import CallbackEntry
 from ..event import EventType
 
 
@@ -15,3 +17,23 @@ class BaseModule(ABC):
     @abstractmethod
     def clear(self) -> None:
         raise NotImplementedError
+
+    def _invalidate_plan(self, event: Optional[EventType] = None) -> None:
+        """
+        Called whenever the registrations of a module change\n
+        The event bus overrides it to drop the cached dispatch plans,
+        a module that is used on its own has nothing to invalidate
+        :param event: The event whose registrations changed, None means every event
+        """
+        pass
+
+    def _measure(self, event: EventType,
+                 stage: str) -> Optional[Callable[[tuple[CallbackEntry, ...]], tuple[CallbackEntry, ...]]]:
+        """
+        The wrapper that measures the callbacks of a module, applied to them before they run\n
+        The event bus overrides it while metrics or the profiler are enabled,
+        a module that is used on its own is not measured
+        :param event: The event the callbacks run for
+        :param stage: "filter" or "inject"
+        """
+        return None
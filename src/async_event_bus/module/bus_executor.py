@@ -0,0 +1,324 @@
+import os
+import pickle
+from asyncio import get_running_loop
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pickle import PickleBuffer
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+EXECUTORS = (INLINE, THREAD, PROCESS)
+
+
+def _call_pickled(payload: bytes) -> Any:
+    """
+    Entry point of the process pool workers, the handler and its arguments arrive pickled together
+    """
+    func, args, kwargs = pickle.loads(payload)
+    return func(*args, **kwargs)
+
+
+def _attach(name: str) -> SharedMemory:
+    try:
+        return SharedMemory(name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching always registers the block with the resource tracker,
+        # the workers share the tracker of the bus process, which already tracks it, so this changes nothing
+        return SharedMemory(name)
+
+
+def _call_shared(payload: bytes, buffers: tuple[tuple[str, int], ...]) -> Any:
+    """
+    Entry point of the process pool workers for calls whose large buffers were placed in shared memory\n
+    The buffers are handed to the unpickler as read-only views of the shared blocks, nothing is copied
+    :param payload: The handler and its arguments, pickled with protocol 5 and the large buffers left out
+    :param buffers: Name and size of the shared block of every out-of-band buffer, in pickling order
+    """
+    memories = [_attach(name) for name, _ in buffers]
+    views = [memory.buf[:size].toreadonly() for memory, (_, size) in zip(memories, buffers)]
+    try:
+        func, args, kwargs = pickle.loads(payload, buffers=views)
+        return func(*args, **kwargs)
+    finally:
+        args = kwargs = None
+        for view, memory in zip(views, memories):
+            try:
+                view.release()
+                memory.close()
+            except BufferError:
+                # The handler kept a view, the mapping stays valid until it is collected
+                pass
+
+
+class _SharedBlock:
+    """
+    A buffer copied into shared memory, shared by the calls that are sending it at the same time
+    """
+    __slots__ = ("memory", "source", "users")
+
+    def __init__(self, raw: memoryview):
+        self.memory = SharedMemory(create=True, size=max(raw.nbytes, 1))
+        self.memory.buf[:raw.nbytes] = raw
+        # Keeps the source alive, so that its id is not reused while the block is registered under it
+        self.source = raw.obj
+        self.users = 0
+
+
+class BusExecutor:
+    """
+    Manages the pools that handlers are offloaded to, so that blocking handlers do not freeze the event loop\n
+    Pools are created on first use and can be sized before that
+    :param thread_pool_size: The maximum number of threads, None lets ThreadPoolExecutor decide
+    :param zero_copy_threshold: Size in bytes from which binary arguments are passed without copies,
+        please check **BusExecutor.zero_copy_threshold** for details, None disables it
+    """
+
+    def __init__(self, thread_pool_size: Optional[int] = None, zero_copy_threshold: Optional[int] = None):
+        self._thread_pool_size = thread_pool_size
+        self._zero_copy_threshold = self._check_threshold(zero_copy_threshold)
+        # Shared blocks of the buffers being sent, keyed by the id of the object exporting the buffer
+        self._shared: dict[int, _SharedBlock] = {}
+        self._shared_copies = 0
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool_size: Optional[int] = None
+        self._process_initializer: Optional[Callable] = None
+        self._process_initargs: tuple = ()
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(self._thread_pool_size, thread_name_prefix="event-bus")
+            logger.debug(f"Thread pool started, max_workers={self._thread_pool._max_workers}")
+        return self._thread_pool
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            if os.name == "posix":
+                # Workers started after this share the resource tracker of the bus process,
+                # otherwise each would start its own and remove the shared blocks it saw when it exits
+                resource_tracker.ensure_running()
+            self._process_pool = ProcessPoolExecutor(self._process_pool_size, initializer=self._process_initializer,
+                                                     initargs=self._process_initargs)
+            logger.debug(f"Process pool started, max_workers={self._process_pool._max_workers}")
+        return self._process_pool
+
+    def configure_process_pool(self, max_workers: Optional[int] = None, initializer: Optional[Callable] = None,
+                               initargs: tuple = ()) -> None:
+        """
+        Configure the process pool before it is started\n
+        Example:
+            def load_model():
+                global model
+                model = ...
+            event_bus.executor.configure_process_pool(max_workers=4, initializer=load_model)
+
+        :param max_workers: The maximum number of processes, None lets ProcessPoolExecutor decide
+        :param initializer: Called once in every worker process, used to warm up worker state
+        :param initargs: Arguments passed to the initializer
+        """
+        if self._process_pool is not None:
+            raise RuntimeError("The process pool is already running, shut it down before configuring it")
+        self._process_pool_size = max_workers
+        self._process_initializer = initializer
+        self._process_initargs = initargs
+
+    @staticmethod
+    def _check_threshold(threshold: Optional[int]) -> Optional[int]:
+        if threshold is not None and threshold <= 0:
+            raise ValueError("zero_copy_threshold must be greater than 0")
+        return threshold
+
+    @staticmethod
+    def _is_large_buffer(value: Any, threshold: int) -> bool:
+        return (isinstance(value, (bytes, bytearray, memoryview)) and len(value) >= threshold
+                and (not isinstance(value, memoryview) or value.contiguous))
+
+    @classmethod
+    def _wrap_buffer(cls, value: Any, threshold: int) -> Any:
+        """
+        Wrap an argument so that pickle may send its buffer out of band,
+        memoryviews are always wrapped as they can not be pickled otherwise
+        """
+        if cls._is_large_buffer(value, threshold) or (isinstance(value, memoryview) and value.contiguous):
+            return PickleBuffer(value)
+        return value
+
+    def _as_views(self, args: tuple, kwargs: dict[str, Any]) -> tuple[tuple, dict[str, Any]]:
+        """
+        Replace the large binary arguments with read-only memoryviews
+        """
+        threshold = self._zero_copy_threshold
+        is_large = self._is_large_buffer
+        return (tuple(memoryview(arg).toreadonly() if is_large(arg, threshold) else arg for arg in args),
+                {key: memoryview(value).toreadonly() if is_large(value, threshold) else value
+                 for key, value in kwargs.items()})
+
+    def _share(self, raw: memoryview) -> _SharedBlock:
+        key = id(raw.obj)
+        block = self._shared.get(key)
+        if block is None or block.source is not raw.obj or block.memory.size < raw.nbytes:
+            block = self._shared[key] = _SharedBlock(raw)
+            self._shared_copies += 1
+        block.users += 1
+        return block
+
+    def _release(self, block: _SharedBlock) -> None:
+        block.users -= 1
+        if block.users:
+            return
+        if self._shared.get(id(block.source)) is block:
+            del self._shared[id(block.source)]
+        block.source = None
+        block.memory.close()
+        block.memory.unlink()
+
+    def _pickle_shared(self, func: Callable, args: tuple, kwargs: dict[str, Any],
+                       blocks: list[_SharedBlock]) -> tuple[bytes, tuple[tuple[str, int], ...]]:
+        """
+        Pickle a call with protocol 5, the buffers above the threshold are placed in shared memory out of band\n
+        Binary arguments are wrapped so that the large ones are sent out of band,
+        other objects send their buffers out of band if their own pickling supports it, as numpy arrays do
+        :param blocks: Collects the shared blocks used, they must be released once the call is over
+        """
+        threshold = self._zero_copy_threshold
+        wrap = self._wrap_buffer
+        args = tuple(wrap(arg, threshold) for arg in args)
+        kwargs = {key: wrap(value, threshold) for key, value in kwargs.items()}
+        buffers = []
+
+        def out_of_band(buffer: PickleBuffer) -> bool:
+            raw = buffer.raw()
+            if raw.nbytes < threshold:
+                return True
+            block = self._share(raw)
+            blocks.append(block)
+            buffers.append((block.memory.name, raw.nbytes))
+            return False
+
+        payload = pickle.dumps((func, args, kwargs), 5, buffer_callback=out_of_band)
+        return payload, tuple(buffers)
+
+    async def run_in_thread(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a synchronous function on the thread pool and wait for its result\n
+        With zero copy enabled, large binary arguments are passed as read-only memoryviews
+        :param func: Original synchronous function
+        """
+        self._submitted += 1
+        if self._zero_copy_threshold is not None:
+            args, kwargs = self._as_views(args, kwargs)
+        try:
+            result = await get_running_loop().run_in_executor(self.thread_pool, partial(func, *args, **kwargs))
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._completed += 1
+        return result
+
+    async def run_in_process(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a synchronous function on the process pool and wait for its result\n
+        The function and its arguments are pickled up front on the calling thread,
+        so an argument that can not be pickled fails here with a clear error
+        instead of inside the pool.
+        With zero copy enabled, large buffers are placed in shared memory and arrive as read-only views
+        :param func: Original synchronous function, must be importable from the worker processes
+        """
+        self._submitted += 1
+        blocks: list[_SharedBlock] = []
+        try:
+            try:
+                if self._zero_copy_threshold is None:
+                    payload = pickle.dumps((func, args, kwargs), pickle.HIGHEST_PROTOCOL)
+                    call = partial(_call_pickled, payload)
+                else:
+                    payload, buffers = self._pickle_shared(func, args, kwargs, blocks)
+                    call = partial(_call_shared, payload, buffers) if buffers else partial(_call_pickled, payload)
+            except Exception as e:
+                name = getattr(func, "__name__", func)
+                raise TypeError(f"Arguments of {name} can not be sent to a process: {e}") from e
+            result = await get_running_loop().run_in_executor(self.process_pool, call)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._completed += 1
+            for block in blocks:
+                self._release(block)
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shut the pools down, they are recreated if a handler needs them again
+        :param wait: Wait for the running handlers to finish
+        """
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait)
+            self._process_pool = None
+
+    @property
+    def thread_pool_size(self) -> Optional[int]:
+        return self._thread_pool_size
+
+    @thread_pool_size.setter
+    def thread_pool_size(self, value: Optional[int]) -> None:
+        if self._thread_pool is not None:
+            raise RuntimeError("The thread pool is already running, shut it down before resizing it")
+        self._thread_pool_size = value
+
+    @property
+    def zero_copy_threshold(self) -> Optional[int]:
+        """
+        Size in bytes from which binary arguments of offloaded handlers are passed without copies, None disables it\n
+        Handlers on the thread pool receive read-only memoryviews of bytes, bytearray and memoryview arguments
+        instead of the objects themselves, so that they can slice them without copying and can not modify them.
+        For handlers on the process pool such arguments, and any object that pickles its buffers out of band,
+        are pickled with protocol 5 and their buffers are copied once into shared memory,
+        where all the handlers of the emit read them as read-only memoryviews.
+        Handlers must accept memoryviews and must not return them\n
+        Example:
+            event_bus.executor.zero_copy_threshold = 1024 * 1024
+        """
+        return self._zero_copy_threshold
+
+    @zero_copy_threshold.setter
+    def zero_copy_threshold(self, value: Optional[int]) -> None:
+        self._zero_copy_threshold = self._check_threshold(value)
+
+    @property
+    def shared_copies(self) -> int:
+        """
+        The number of buffers copied into shared memory for the process pool
+        """
+        return self._shared_copies
+
+    @property
+    def submitted(self) -> int:
+        return self._submitted
+
+    @property
+    def completed(self) -> int:
+        return self._completed
+
+    @property
+    def failed(self) -> int:
+        return self._failed
+
+    @property
+    def active(self) -> int:
+        return self._submitted - self._completed
@@ -1,9 +1,15 @@
-from typing import Awaitable, Callable, Type, Union
+from asyncio import as_completed, ensure_future, gather
+from functools import partial
+from itertools import groupby
+from typing import Awaitable, Callable, Optional, Type, Union
 
 from loguru import logger
 
 from .base_module import BaseModule
-from ..event import EventType, EventCallbackContainer
+from .bus_metrics import FILTER
+from .callback_cache import CacheOption, CallbackCache, apply_caches, resolve_cache
+from .dispatch_plan import CallbackEntry
+from ..event import EventCallbackContainer, EventType
 
 FilterCallback: Type = Callable[..., Union[bool, Awaitable[bool]]]
 
@@ -11,44 +17,111 @@ FilterCallback: Type = Callable[..., Union[bool, Awaitable[bool]]]
 class BusFilter(BaseModule):
     """
     The event bus filter module is responsible for filtering the event
-    and determining whether to continue to propagate the event
+    and determining whether to continue to propagate the event\n
+    In concurrent mode, asynchronous filters of the same weight run together,
+    the first one that drops the event cancels the others, and weight tiers still run in order
     """
 
     def __init__(self):
         self._filters: dict[str, EventCallbackContainer] = {}
         self._global_filters: EventCallbackContainer = EventCallbackContainer()
+        # Keyed by the event of the filter, None for global filters, and the filter function
+        self._filter_caches: dict[tuple[Optional[EventType], Callable], CallbackCache] = {}
+        self._concurrent_filters = False
 
     def clear(self):
         self._filters.clear()
         self._global_filters.clear()
+        self._filter_caches.clear()
+        self._invalidate_plan()
 
     async def resolve(self, event: EventType, args, kwargs) -> bool:
-        if await self._apply_global_filter(event, *args, **kwargs):
-            return True
-        if await self._apply_filter(event, *args, **kwargs):
-            return True
-        return False
+        global_filters, filters = self._collect_filters(event, self._measure(event, FILTER))
+        return await self._apply_filters(event, global_filters, filters, args, kwargs)
 
-    async def _apply_filter(self, event: EventType, *args, **kwargs) -> bool:
-        if event in self._filters:
-            for callback in self._filters[event].sync_callback:
-                if callback(*args, **kwargs):
-                    return True
-            for callback in self._filters[event].async_callback:
-                if await callback(*args, **kwargs):
+    def _collect_filters(self, event: EventType,
+                         wrap: Optional[Callable[[tuple[CallbackEntry, ...]], tuple[CallbackEntry, ...]]] = None
+                         ) -> tuple[tuple[CallbackEntry, ...], tuple[CallbackEntry, ...]]:
+        """
+        Flatten the global filters and the filters of an event in execution order
+        :param event: Event to collect filters for
+        :param wrap: Applied to the filters before they are grouped into concurrent tiers
+        :return: The global filters and the event filters
+        """
+        global_filters = self._flatten_filters(None, self._global_filters, wrap)
+        if event not in self._filters:
+            return global_filters, ()
+        return global_filters, self._flatten_filters(event, self._filters[event], wrap)
+
+    def _flatten_filters(self, event: Optional[EventType], container: EventCallbackContainer,
+                         wrap: Optional[Callable]) -> tuple[CallbackEntry, ...]:
+        entries = apply_caches(self._filter_caches, event, container.flatten())
+        if wrap is not None:
+            entries = wrap(entries)
+        if not self._concurrent_filters:
+            return entries
+        # Asynchronous filters come last in weight order, each run of equal weight becomes one tier
+        async_callbacks = container.async_callback
+        sync_count = len(entries) - len(async_callbacks)
+        tiered = list(entries[:sync_count])
+        for _, tier in groupby(zip(async_callbacks, entries[sync_count:]), key=lambda pair: pair[0].weight):
+            callbacks = tuple(func for _, (func, _) in tier)
+            tiered.append((callbacks[0], True) if len(callbacks) == 1
+                          else (partial(self._race_filters, callbacks), True))
+        return tuple(tiered)
+
+    @staticmethod
+    async def _race_filters(callbacks: tuple[Callable, ...], *args, **kwargs) -> bool:
+        """
+        Run asynchronous filters concurrently
+        :return: True as soon as one of them drops the event, the others are cancelled
+        """
+        tasks = [ensure_future(callback(*args, **kwargs)) for callback in callbacks]
+        try:
+            for next_done in as_completed(tasks):
+                if await next_done:
                     return True
-        return False
+            return False
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await gather(*pending, return_exceptions=True)
+
+    def _set_filter_cache(self, event: Optional[EventType], callback: FilterCallback, cache: CacheOption) -> None:
+        if (cache := resolve_cache(cache)) is None:
+            self._filter_caches.pop((event, callback), None)
+        else:
+            self._filter_caches[(event, callback)] = cache
 
-    async def _apply_global_filter(self, event: EventType, *args, **kwargs) -> bool:
-        for callback in self._global_filters.sync_callback:
-            if callback(event, *args, **kwargs):
+    def get_filter_cache(self, callback: FilterCallback, event: Optional[EventType] = None) -> Optional[CallbackCache]:
+        """
+        Get the cache of a filter to inspect its counters or invalidate results
+        :param callback: Event filter function
+        :param event: The event of the filter, None for a global filter
+        """
+        return self._filter_caches.get((event, callback))
+
+    @staticmethod
+    async def _apply_filters(event: EventType, global_filters: tuple[CallbackEntry, ...],
+                             filters: tuple[CallbackEntry, ...], args, kwargs) -> bool:
+        for callback, is_async in global_filters:
+            result = callback(event, *args, **kwargs)
+            if is_async:
+                result = await result
+            if result:
                 return True
-        for callback in self._global_filters.async_callback:
-            if await callback(event, *args, **kwargs):
+        for callback, is_async in filters:
+            result = callback(*args, **kwargs)
+            if is_async:
+                result = await result
+            if result:
                 return True
         return False
 
-    def global_event_filter(self, weight: int = 1) -> Callable[[FilterCallback], FilterCallback]:
+    def global_event_filter(self, weight: int = 1, *,
+                            cache: CacheOption = None) -> Callable[[FilterCallback], FilterCallback]:
         """
         Register to global filters by decorator\n
         Use decorator to register a global event filter function to the event bus,
@@ -70,18 +143,24 @@ class BusFilter(BaseModule):
             @event_bus.on_global_event_filter(10)
             async def message_filter(message, *_, **__):
                 await ...
+            # Results of pure filters can be memoized, the event is the first argument of the key
+            @event_bus.on_global_event_filter(cache=CallbackCache(ttl=60))
+            def banned_filter(event, message, *_, **__):
+                return ...
 
         :param weight: The selection weight of the filter
+        :param cache: Memoize the results of the filter, True for a default **CallbackCache** or a configured one.
+            Only for filters whose result depends on nothing but their arguments
         :return: The decorator function
         """
 
         def decorator(func: FilterCallback):
-            self.add_global_filter(func, weight)
+            self.add_global_filter(func, weight, cache=cache)
             return func
 
         return decorator
 
-    def add_global_filter(self, callback: FilterCallback, weight: int = 1) -> None:
+    def add_global_filter(self, callback: FilterCallback, weight: int = 1, *, cache: CacheOption = None) -> None:
         """
         Register for global filters\n
         Functions used to register to global filters inside, or can be used separately\n
@@ -101,8 +180,11 @@ class BusFilter(BaseModule):
 
         :param callback: Event filter function
         :param weight: The selection weight of the filter
+        :param cache: Memoize the results of the filter, please check **BusFilter.global_event_filter** for details
         """
+        self._set_filter_cache(None, callback, cache)
         self._global_filters.add_callback(callback, weight)
+        self._invalidate_plan()
         logger.debug(f"Global filter {callback.__name__} has been added, weight={weight}")
 
     def remove_global_filter(self, callback: FilterCallback) -> None:
@@ -116,8 +198,11 @@ class BusFilter(BaseModule):
         :param callback: Event filter function
         """
         self._global_filters.remove_callback(callback)
+        self._filter_caches.pop((None, callback), None)
+        self._invalidate_plan()
 
-    def event_filter(self, event: EventType, weight: int = 1) -> Callable[[FilterCallback], FilterCallback]:
+    def event_filter(self, event: EventType, weight: int = 1, *,
+                     cache: CacheOption = None) -> Callable[[FilterCallback], FilterCallback]:
         """
         Register to event filters by decorator\n
         Use decorator to register an event filter function to the event bus,
@@ -138,18 +223,26 @@ class BusFilter(BaseModule):
             @event_bus.event_filter('message_create', 10)
             async def message_filter(message, *_, **__):
                 await ...
+            # Results of pure filters can be memoized
+            @event_bus.event_filter('message_create', cache=CallbackCache(maxsize=10000, ttl=60,
+                                                                          key=lambda message, *_, **__: message.user))
+            async def blocklist_filter(message, *_, **__):
+                return await ...
 
         :param event: Event to filter to
         :param weight: The selection weight of the filter
+        :param cache: Memoize the results of the filter, True for a default **CallbackCache** or a configured one.
+            Only for filters whose result depends on nothing but their arguments
         """
 
         def decorator(func: FilterCallback):
-            self.add_filter(event, func, weight)
+            self.add_filter(event, func, weight, cache=cache)
             return func
 
         return decorator
 
-    def add_filter(self, event: EventType, callback: FilterCallback, weight: int = 1) -> None:
+    def add_filter(self, event: EventType, callback: FilterCallback, weight: int = 1, *,
+                   cache: CacheOption = None) -> None:
         """
         Register for event filters\n
         Functions used to register to event filters inside, or can be used separately\n
@@ -170,10 +263,13 @@ class BusFilter(BaseModule):
         :param event: Event to filter to
         :param callback: Event filter function
         :param weight: The selection weight of the filter
+        :param cache: Memoize the results of the filter, please check **BusFilter.event_filter** for details
         """
+        self._set_filter_cache(event, callback, cache)
         if event not in self._filters:
             self._filters[event] = EventCallbackContainer()
         self._filters[event].add_callback(callback, weight)
+        self._invalidate_plan(event)
         logger.debug(f"Event filter {callback.__name__} has been added to event {event}, weight={weight}")
 
     def remove_filter(self, event: EventType, callback: FilterCallback) -> None:
@@ -189,3 +285,14 @@ class BusFilter(BaseModule):
         """
         if event in self._filters:
             self._filters[event].remove_callback(callback)
+            self._filter_caches.pop((event, callback), None)
+            self._invalidate_plan(event)
+
+    @property
+    def concurrent_filters(self) -> bool:
+        return self._concurrent_filters
+
+    @concurrent_filters.setter
+    def concurrent_filters(self, value: bool) -> None:
+        self._concurrent_filters = value
+        self._invalidate_plan()
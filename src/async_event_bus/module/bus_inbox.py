@@ -0,0 +1,202 @@
+from asyncio import AbstractEventLoop, Task, get_running_loop, sleep, wait
+from collections import deque
+from threading import Condition
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from loguru import logger
+
+from .bus_queue import OverflowPolicy
+from .module_exceptions import QueueFullError
+from ..event import EventType
+
+if TYPE_CHECKING:
+    from .base_bus import BaseBus
+
+
+class ThreadInbox:
+    """
+    A bounded buffer that lets other threads hand events to the event loop of the bus without blocking\n
+    Producers append to the buffer under a lock, only the producer that finds it empty wakes the loop up,
+    so a burst of events costs a single **call_soon_threadsafe**.
+    The loop then takes the whole batch at once and starts one **BaseBus.emit** task per event.
+    Errors raised while handling an event are logged and counted\n
+    Example:
+        inbox = event_bus.enable_inbox(maxsize=100000, policy=OverflowPolicy.DROP_OLDEST)
+        # In a thread that does not run the loop
+        event_bus.emit_threadsafe('message_create', "This is a message")
+        print(inbox.depth, inbox.dropped)
+
+    :param bus: The event bus the buffered events are emitted on
+    :param loop_getter: Returns the loop the events are emitted on, it is called for every wake-up
+    :param maxsize: The maximum number of buffered events
+    :param policy: What to do when the buffer is full
+    """
+
+    def __init__(self, bus: "BaseBus", loop_getter: Callable[[], AbstractEventLoop], maxsize: int = 65536,
+                 policy: OverflowPolicy = OverflowPolicy.BLOCK):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than 0")
+        self._bus = bus
+        self._loop_getter = loop_getter
+        self._maxsize = maxsize
+        self._policy = policy
+        self._buffer: deque[tuple[EventType, tuple, dict[str, Any]]] = deque()
+        self._lock = Condition()
+        # Whether a drain is already scheduled on the loop, producers only wake the loop up when it is not
+        self._scheduled = False
+        self._loop: Optional[AbstractEventLoop] = None
+        self._tasks: set[Task] = set()
+        self._batches = 0
+        self._dropped = 0
+        self._processed = 0
+        self._failed = 0
+
+    def put(self, event: EventType, args: tuple, kwargs: dict[str, Any], timeout: Optional[float] = None) -> bool:
+        """
+        Buffer an event, may be called from any thread\n
+        With the BLOCK policy a full buffer makes the producer wait for the loop to take a batch,
+        except on the thread of the loop itself, where waiting would deadlock and RAISE applies instead
+        :param timeout: Seconds the BLOCK policy may wait, QueueFullError is raised after that
+        :return: False if the event was dropped
+        """
+        item = (event, args, kwargs)
+        with self._lock:
+            if len(self._buffer) >= self._maxsize and not self._overflow(timeout):
+                return False
+            self._buffer.append(item)
+            if self._scheduled:
+                return True
+            self._scheduled = True
+            loop = self._loop = self._loop_getter()
+        try:
+            loop.call_soon_threadsafe(self._drain)
+        except RuntimeError:
+            with self._lock:
+                self._scheduled = False
+            raise
+        return True
+
+    def _overflow(self, timeout: Optional[float]) -> bool:
+        """
+        Make room in the full buffer, called with the lock held
+        :return: False if the new event must be dropped
+        """
+        if self._policy is OverflowPolicy.DROP_NEWEST:
+            self._dropped += 1
+            return False
+        if self._policy is OverflowPolicy.DROP_OLDEST:
+            self._buffer.popleft()
+            self._dropped += 1
+            return True
+        if self._policy is OverflowPolicy.BLOCK and not self._in_loop_thread():
+            if self._lock.wait_for(lambda: len(self._buffer) < self._maxsize, timeout):
+                return True
+        raise QueueFullError(f"Thread inbox is full, maxsize={self._maxsize}")
+
+    def _in_loop_thread(self) -> bool:
+        try:
+            return get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _take(self) -> deque[tuple[EventType, tuple, dict[str, Any]]]:
+        with self._lock:
+            batch, self._buffer = self._buffer, deque()
+            self._scheduled = False
+            self._lock.notify_all()
+        return batch
+
+    def _drain(self) -> None:
+        batch = self._take()
+        if not batch:
+            return
+        self._batches += 1
+        loop = get_running_loop()
+        emit = self._bus.emit
+        for event, args, kwargs in batch:
+            task = loop.create_task(emit(event, *args, **kwargs))
+            self._tasks.add(task)
+            task.add_done_callback(self._settle)
+
+    def _settle(self, task: Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            self._processed += 1
+            return
+        self._failed += 1
+        logger.opt(exception=error).error("Event handed over by another thread failed")
+
+    async def join(self) -> None:
+        """
+        Wait until every buffered event has been handled, must be awaited on the loop of the inbox
+        """
+        while True:
+            self._drain()
+            pending = [task for task in self._tasks if not task.done()]
+            if not pending:
+                # Let the done callbacks of the finished tasks count them
+                await sleep(0)
+                if not self._buffer:
+                    return
+                continue
+            await wait(pending)
+
+    async def close(self, drain: bool = True) -> None:
+        """
+        Stop handling buffered events, must be awaited on the loop of the inbox
+        :param drain: Handle the events that are still buffered before stopping
+        """
+        if drain:
+            await self.join()
+            return
+        self._dropped += len(self._take())
+        tasks = tuple(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await wait(tasks)
+        await sleep(0)
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of events waiting for the loop to take them
+        """
+        return len(self._buffer)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        The number of events taken by the loop whose handlers are still running
+        """
+        return len(self._tasks)
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @property
+    def policy(self) -> OverflowPolicy:
+        return self._policy
+
+    @property
+    def batches(self) -> int:
+        """
+        The number of times the loop took events from the buffer, each one cost a single wake-up
+        """
+        return self._batches
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @property
+    def processed(self) -> int:
+        return self._processed
+
+    @property
+    def failed(self) -> int:
+        return self._failed
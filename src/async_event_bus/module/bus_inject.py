@@ -1,9 +1,14 @@
-from typing import Any, Awaitable, Callable, Type, Union
+from asyncio import ensure_future, gather
+from functools import partial
+from typing import Any, Awaitable, Callable, Optional, Type, Union
 
 from loguru import logger
 
 from .base_module import BaseModule
-from ..event import EventType, EventCallbackContainer
+from .bus_metrics import INJECT
+from .callback_cache import CacheOption, CallbackCache, apply_caches, resolve_cache
+from .dispatch_plan import CallbackEntry
+from ..event import EventCallbackContainer, EventType
 
 InjectCallback: Type = Callable[..., Union[dict[str, Any], Awaitable[dict[str, Any]]]]
 
@@ -11,66 +16,216 @@ InjectCallback: Type = Callable[..., Union[dict[str, Any], Awaitable[dict[str, A
 class BusInject(BaseModule):
     """
     The event bus injector module is responsible for injecting parameters into events to achieve special operations,
-    such as user authentication
+    such as user authentication\n
+    Injectors receive the arguments of the emit, an injector registered with depends also receives
+    what the injectors before it returned. In concurrent mode, asynchronous injectors run together
+    until the next dependent injector, and their results are merged in weight order like in sequential mode
     """
 
     def __init__(self):
         self._injects: dict[str, EventCallbackContainer] = {}
         self._global_injects: EventCallbackContainer = EventCallbackContainer()
+        # Keyed by the event of the injector, None for global injectors, and the injector function
+        self._inject_caches: dict[tuple[Optional[EventType], Callable], CallbackCache] = {}
+        # Injectors that receive the output of the injectors before them, keyed like the caches
+        self._dependent_injects: set[tuple[Optional[EventType], Callable]] = set()
+        self._concurrent_injects = False
 
     def clear(self) -> None:
         self._injects.clear()
         self._global_injects.clear()
+        self._inject_caches.clear()
+        self._dependent_injects.clear()
+        self._invalidate_plan()
 
     async def resolve(self, event: EventType, args: tuple, kwargs: dict[str, Any]) -> bool:
-        kwargs.update(await self._apply_global_injects(*args, **kwargs))
-        kwargs.update(await self._apply_event_injects(event, *args, **kwargs))
+        global_injects, injects = self._collect_injects(event, self._measure(event, INJECT))
+        if global_injects:
+            kwargs.update(await self._apply_injects(global_injects, args, kwargs))
+        if injects:
+            kwargs.update(await self._apply_injects(injects, args, kwargs))
         return True
 
-    async def _apply_event_injects(self, event: EventType, *args, **kwargs) -> dict[str, Any]:
+    def _collect_injects(self, event: EventType,
+                         wrap: Optional[Callable[[tuple[CallbackEntry, ...]], tuple[CallbackEntry, ...]]] = None
+                         ) -> tuple[tuple[CallbackEntry, ...], tuple[CallbackEntry, ...]]:
+        """
+        Flatten the global injectors and the injectors of an event in execution order
+        :param event: Event to collect injectors for
+        :param wrap: Applied to the injectors before they are grouped into stages
+        :return: The global injectors and the event injectors
+        """
+        global_injects = self._flatten_injects(None, self._global_injects, wrap)
+        if event not in self._injects:
+            return global_injects, ()
+        return global_injects, self._flatten_injects(event, self._injects[event], wrap)
+
+    def _flatten_injects(self, event: Optional[EventType], container: EventCallbackContainer,
+                         wrap: Optional[Callable]) -> tuple[CallbackEntry, ...]:
+        raw = container.flatten()
+        entries = apply_caches(self._inject_caches, event, raw)
+        if wrap is not None:
+            entries = wrap(entries)
+        dependents = tuple((event, callback) in self._dependent_injects for callback, _ in raw)
+        if not entries or not (self._concurrent_injects or any(dependents)):
+            return entries
+        # Split the injectors into stages, a stage starts at every dependent injector,
+        # and at every injector in sequential mode
+        stages = []
+        for entry, dependent in zip(entries, dependents):
+            if dependent or not self._concurrent_injects or not stages:
+                stages.append([])
+            stages[-1].append((*entry, dependent))
+        return (partial(self._run_inject_stages, tuple(tuple(stage) for stage in stages)), True),
+
+    @staticmethod
+    async def _run_inject_stages(stages: tuple[tuple[tuple[Callable, bool, bool], ...], ...], *args,
+                                 **kwargs) -> dict[str, Any]:
+        """
+        Run injectors stage by stage, the injectors of a stage run concurrently\n
+        Dependent injectors see the emit arguments merged with the results of the previous stages,
+        results are merged in the order of the injectors
+        :param stages: Stages of (function, is asynchronous, is dependent) entries
+        """
         add_kwargs = {}
-        if event in self._injects:
-            for callback in self._injects[event].sync_callback:
-                add_kwargs.update(callback(*args, **kwargs))
-            for callback in self._injects[event].async_callback:
-                add_kwargs.update(await callback(*args, **kwargs))
+        for stage in stages:
+            if len(stage) == 1:
+                callback, is_async, dependent = stage[0]
+                result = callback(*args, **({**kwargs, **add_kwargs} if dependent else kwargs))
+                add_kwargs.update(await result if is_async else result)
+                continue
+            results = []
+            pending = []
+            try:
+                for callback, is_async, dependent in stage:
+                    result = callback(*args, **({**kwargs, **add_kwargs} if dependent else kwargs))
+                    if is_async:
+                        pending.append((len(results), result))
+                    results.append(result)
+            except Exception:
+                # A synchronous injector failed before the stage started
+                for _, coroutine in pending:
+                    coroutine.close()
+                raise
+            tasks = [ensure_future(coroutine) for _, coroutine in pending]
+            try:
+                done = await gather(*tasks)
+            except BaseException:
+                # Like in sequential mode, the first failure stops the injectors
+                for task in tasks:
+                    task.cancel()
+                raise
+            for (index, _), result in zip(pending, done):
+                results[index] = result
+            for result in results:
+                add_kwargs.update(result)
         return add_kwargs
 
-    async def _apply_global_injects(self, *args, **kwargs) -> dict[str, Any]:
+    @staticmethod
+    async def _apply_injects(injects: tuple[CallbackEntry, ...], args: tuple,
+                             kwargs: dict[str, Any]) -> dict[str, Any]:
         add_kwargs = {}
-        for callback in self._global_injects.sync_callback:
-            add_kwargs.update(callback(*args, **kwargs))
-        for callback in self._global_injects.async_callback:
-            add_kwargs.update(await callback(*args, **kwargs))
+        for callback, is_async in injects:
+            result = callback(*args, **kwargs)
+            if is_async:
+                result = await result
+            add_kwargs.update(result)
         return add_kwargs
 
-    def global_event_inject(self, weight: int = 1) -> Callable[[InjectCallback], InjectCallback]:
+    def _set_inject_options(self, event: Optional[EventType], callback: InjectCallback, cache: CacheOption,
+                            depends: bool) -> None:
+        if (cache := resolve_cache(cache)) is None:
+            self._inject_caches.pop((event, callback), None)
+        else:
+            self._inject_caches[(event, callback)] = cache
+        if depends:
+            self._dependent_injects.add((event, callback))
+        else:
+            self._dependent_injects.discard((event, callback))
+
+    def _forget_inject(self, event: Optional[EventType], callback: InjectCallback) -> None:
+        self._inject_caches.pop((event, callback), None)
+        self._dependent_injects.discard((event, callback))
+
+    def get_inject_cache(self, callback: InjectCallback, event: Optional[EventType] = None) -> Optional[CallbackCache]:
+        """
+        Get the cache of an injector to inspect its counters or invalidate results
+        :param callback: Injector function
+        :param event: The event of the injector, None for a global injector
+        """
+        return self._inject_caches.get((event, callback))
+
+    def global_event_inject(self, weight: int = 1, *, cache: CacheOption = None,
+                            depends: bool = False) -> Callable[[InjectCallback], InjectCallback]:
+        """
+        Register to global injectors by decorator\n
+        The dict returned by an injector is merged into the keyword arguments of the handlers\n
+        Example:
+            @event_bus.global_event_inject()
+            async def time_inject(*_, **__):
+                return {"time": time.time()}
+            # Lookups can be cached, concurrent emits with the same key share one asynchronous lookup
+            @event_bus.global_event_inject(cache=CallbackCache(ttl=30, key=lambda *_, session, **__: session))
+            async def user_inject(*_, session, **__):
+                return {"user": await ...}
+            # A lower weight runs later, depends passes it the results of the injectors before it
+            @event_bus.global_event_inject(weight=0, depends=True)
+            async def permission_inject(*_, user, **__):
+                return {"permissions": await ...}
+
+        :param weight: The selection weight of the injector
+        :param cache: Memoize the results of the injector, True for a default **CallbackCache** or a configured one.
+            Cached dicts are shared between emits and must not be modified
+        :param depends: The injector receives the results of the injectors that run before it,
+            in concurrent mode it waits for them to finish
+        """
+
         def decorator(func: InjectCallback):
-            self.add_global_inject(func, weight)
+            self.add_global_inject(func, weight, cache=cache, depends=depends)
             return func
 
         return decorator
 
-    def add_global_inject(self, callback: InjectCallback, weight: int = 1) -> None:
+    def add_global_inject(self, callback: InjectCallback, weight: int = 1, *, cache: CacheOption = None,
+                          depends: bool = False) -> None:
+        self._set_inject_options(None, callback, cache, depends)
         self._global_injects.add_callback(callback, weight)
+        self._invalidate_plan()
         logger.debug(f"Global inject {callback.__name__} has been added, weight={weight}")
 
     def remove_global_inject(self, callback: InjectCallback) -> None:
         self._global_injects.remove_callback(callback)
+        self._forget_inject(None, callback)
+        self._invalidate_plan()
 
-    def event_inject(self, event: EventType, weight: int = 1) -> Callable[[InjectCallback], InjectCallback]:
+    def event_inject(self, event: EventType, weight: int = 1, *, cache: CacheOption = None,
+                     depends: bool = False) -> Callable[[InjectCallback], InjectCallback]:
         def decorator(func: InjectCallback):
-            self.add_inject(event, func, weight)
+            self.add_inject(event, func, weight, cache=cache, depends=depends)
             return func
 
         return decorator
 
-    def add_inject(self, event: EventType, callback: InjectCallback, weight: int = 1) -> None:
+    def add_inject(self, event: EventType, callback: InjectCallback, weight: int = 1, *,
+                   cache: CacheOption = None, depends: bool = False) -> None:
+        self._set_inject_options(event, callback, cache, depends)
         if event not in self._injects:
             self._injects[event] = EventCallbackContainer()
         self._injects[event].add_callback(callback, weight)
+        self._invalidate_plan(event)
         logger.debug(f"Event inject {callback.__name__} has been added to event {event}, weight={weight}")
 
     def remove_inject(self, event: EventType, callback: InjectCallback) -> None:
         if event in self._injects:
             self._injects[event].remove_callback(callback)
+            self._forget_inject(event, callback)
+            self._invalidate_plan(event)
+
+    @property
+    def concurrent_injects(self) -> bool:
+        return self._concurrent_injects
+
+    @concurrent_injects.setter
+    def concurrent_injects(self, value: bool) -> None:
+        self._concurrent_injects = value
+        self._invalidate_plan()
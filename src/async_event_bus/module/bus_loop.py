@@ -0,0 +1,104 @@
+import atexit
+from asyncio import (AbstractEventLoop, all_tasks, current_task, gather, new_event_loop, run_coroutine_threadsafe,
+                     set_event_loop)
+from threading import Event, Lock, Thread, get_ident
+from typing import Any, Coroutine, Optional
+
+from loguru import logger
+
+
+class BackgroundLoop:
+    """
+    A long-lived event loop running on its own daemon thread, used to emit from synchronous code\n
+    The thread is started on first use and reused by every later call,
+    it is shut down by **BackgroundLoop.shutdown** or when the interpreter exits
+    :param name: Name of the loop thread
+    """
+
+    def __init__(self, name: str = "event-bus-loop"):
+        self._name = name
+        self._loop: Optional[AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+
+    @staticmethod
+    def _serve(loop: AbstractEventLoop, ready: Event) -> None:
+        set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            set_event_loop(None)
+
+    @property
+    def loop(self) -> AbstractEventLoop:
+        """
+        The background loop, started if it is not running yet
+        """
+        loop = self._loop
+        if loop is not None:
+            return loop
+        with self._lock:
+            if self._loop is None:
+                loop = new_event_loop()
+                ready = Event()
+                thread = Thread(target=self._serve, args=(loop, ready), name=self._name, daemon=True)
+                thread.start()
+                ready.wait()
+                self._loop, self._thread = loop, thread
+                atexit.register(self.shutdown)
+                logger.debug(f"Background event loop started on thread {self._name}")
+            return self._loop
+
+    def in_loop_thread(self) -> bool:
+        """
+        Whether the caller runs on the thread of the background loop
+        """
+        thread = self._thread
+        return thread is not None and thread.ident == get_ident()
+
+    def run(self, coroutine: Coroutine) -> Any:
+        """
+        Run a coroutine on the background loop and block until it finishes
+        :param coroutine: Coroutine to run
+        :return: The result of the coroutine, its exception is raised here
+        """
+        if self.in_loop_thread():
+            coroutine.close()
+            raise RuntimeError("Can not block the thread of the background loop on itself, await the coroutine instead")
+        return run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    @staticmethod
+    async def _cancel_tasks() -> None:
+        loop_tasks = [task for task in all_tasks() if task is not current_task()]
+        for task in loop_tasks:
+            task.cancel()
+        await gather(*loop_tasks, return_exceptions=True)
+
+    def shutdown(self, timeout: Optional[float] = 5) -> None:
+        """
+        Cancel the tasks still running on the background loop, stop it and join its thread\n
+        The loop is started again if it is needed after this
+        :param timeout: Seconds to wait for the tasks and the thread, None waits forever
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None:
+                return
+            # Checked before anything changes, the loop must stay usable when this is refused
+            if thread.ident == get_ident():
+                raise RuntimeError("The background loop can not be shut down from its own thread")
+            self._loop = self._thread = None
+        atexit.unregister(self.shutdown)
+        try:
+            run_coroutine_threadsafe(self._cancel_tasks(), loop).result(timeout)
+            run_coroutine_threadsafe(loop.shutdown_asyncgens(), loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
@@ -0,0 +1,272 @@
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Callable, Iterable, Optional
+
+from ..event import EventType
+
+HANDLER = "handler"
+FILTER = "filter"
+INJECT = "inject"
+
+# Upper bounds in seconds, from 100us up to 10s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+
+def _label(event: Any) -> str:
+    return event.__name__ if isinstance(event, type) else str(event)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    return ",".join(f"{key}=\"{_escape(value)}\"" for key, value in labels.items())
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    A fixed bucket latency histogram with the cumulative semantics of Prometheus
+    :param buckets: Sorted upper bounds in seconds, an implicit +Inf bucket is added
+    """
+    __slots__ = ("_buckets", "_counts", "_sum", "_count")
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def clear(self) -> None:
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self._buckets, value)] += 1
+        self._sum += value
+        self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """
+        Pairs of upper bound and the number of observations less than or equal to it, the last bound is +Inf
+        """
+        total = 0
+        result = []
+        for bound, count in zip((*self._buckets, float("inf")), self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"count": self._count, "sum": self._sum, "buckets": dict(self.cumulative())}
+
+
+class BusMetrics:
+    """
+    Counters, gauges and latency histograms of an event bus\n
+    Collected once enabled with **BaseBus.enable_metrics**. Handlers, filters and injectors are measured by
+    wrappers compiled into the dispatch plans, so a bus without metrics runs exactly the same plans as before.
+    Filters and injectors run through **resolve** of their module are wrapped the same way.
+    Every metric is labelled with the event, callbacks also with their stage and qualified name\n
+    Example:
+        metrics = event_bus.enable_metrics()
+        ...
+        print(metrics.snapshot()["emits"])
+        print(metrics.to_prometheus())
+
+    :param buckets: Upper bounds of the latency histograms in seconds
+    """
+
+    def __init__(self, buckets: Optional[Iterable[float]] = None):
+        self._buckets = tuple(sorted(buckets)) if buckets is not None else DEFAULT_BUCKETS
+        self._emits: dict[EventType, int] = {}
+        self._dropped: dict[EventType, int] = {}
+        self._in_flight: dict[EventType, int] = {}
+        self._emit_latency: dict[EventType, Histogram] = {}
+        self._wait_time: dict[EventType, Histogram] = {}
+        # Keyed by event, stage and callback name
+        self._callback_latency: dict[tuple[EventType, str, str], Histogram] = {}
+        self._errors: dict[tuple[EventType, str, str], int] = {}
+
+    @staticmethod
+    def callback_name(func: Callable) -> str:
+        """
+        The name a callback is labelled with, its qualified name when it has one
+        """
+        return getattr(func, "__qualname__", None) or getattr(func, "__name__", None) or repr(func)
+
+    def _histogram(self, histograms: dict, key: Any) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self._buckets)
+        return histogram
+
+    def record_emit(self, event: EventType, duration: Optional[float] = None) -> None:
+        """
+        Count an emit of the event
+        :param duration: Seconds the emit took end to end, None when it is not measured on its own
+        """
+        self._emits[event] = self._emits.get(event, 0) + 1
+        if duration is not None:
+            self._histogram(self._emit_latency, event).observe(duration)
+
+    def record_drop(self, event: EventType) -> None:
+        """
+        Count an emit of the event that was dropped by a filter
+        """
+        self._dropped[event] = self._dropped.get(event, 0) + 1
+
+    def record_wait(self, event: EventType, duration: float) -> None:
+        """
+        Record the seconds a handler of the event waited for its concurrency limiters
+        """
+        self._histogram(self._wait_time, event).observe(duration)
+
+    def measure_sync(self, event: EventType, stage: str, func: Callable, name: Optional[str] = None) -> Callable:
+        """
+        Wrap a synchronous callback so that its latency and errors are recorded
+        :param event: The event the callback runs for
+        :param stage: "handler", "filter" or "inject"
+        :param func: Original synchronous function
+        :param name: Name of the callback, defaults to the qualified name of func
+        """
+        key = (event, stage, name or self.callback_name(func))
+        histogram = self._histogram(self._callback_latency, key)
+        errors = self._errors
+        errors.setdefault(key, 0)
+
+        def measured(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                errors[key] += 1
+                raise
+            finally:
+                histogram.observe(perf_counter() - start)
+
+        return measured
+
+    def measure_async(self, event: EventType, stage: str, func: Callable, name: Optional[str] = None) -> Callable:
+        """
+        Wrap an asynchronous callback so that its latency, errors and in-flight count are recorded
+        :param event: The event the callback runs for
+        :param stage: "handler", "filter" or "inject"
+        :param func: Original asynchronous function
+        :param name: Name of the callback, defaults to the qualified name of func
+        """
+        key = (event, stage, name or self.callback_name(func))
+        histogram = self._histogram(self._callback_latency, key)
+        errors = self._errors
+        errors.setdefault(key, 0)
+        in_flight = self._in_flight
+        in_flight.setdefault(event, 0)
+
+        async def measured(*args, **kwargs):
+            in_flight[event] += 1
+            start = perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                errors[key] += 1
+                raise
+            finally:
+                histogram.observe(perf_counter() - start)
+                in_flight[event] -= 1
+
+        return measured
+
+    def reset(self) -> None:
+        """
+        Reset every counter and histogram, in-flight gauges keep counting the callbacks still running
+        """
+        self._emits.clear()
+        self._dropped.clear()
+        self._emit_latency.clear()
+        self._wait_time.clear()
+        # Histograms and error counters are captured by the compiled wrappers, so they are emptied in place
+        for histogram in self._callback_latency.values():
+            histogram.clear()
+        for key in self._errors:
+            self._errors[key] = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Take a snapshot of every metric\n
+        Events are given by their label, callbacks by (event, stage, name) tuples
+        :return: A dict of plain values that is safe to keep or serialize
+        """
+        callbacks = {}
+        for key, histogram in self._callback_latency.items():
+            event, stage, name = key
+            callbacks[(_label(event), stage, name)] = {**histogram.snapshot(), "errors": self._errors.get(key, 0)}
+        return {
+            "emits": {_label(event): count for event, count in self._emits.items()},
+            "dropped": {_label(event): count for event, count in self._dropped.items()},
+            "in_flight": {_label(event): count for event, count in self._in_flight.items()},
+            "emit_latency": {_label(event): histogram.snapshot() for event, histogram in self._emit_latency.items()},
+            "wait_time": {_label(event): histogram.snapshot() for event, histogram in self._wait_time.items()},
+            "callbacks": callbacks
+        }
+
+    def to_prometheus(self, prefix: str = "event_bus") -> str:
+        """
+        Export every metric in the Prometheus text exposition format
+        :param prefix: Prefix of the metric names
+        """
+        lines = []
+
+        def scalar(name: str, kind: str, help_text: str, samples: Iterable[tuple[dict[str, str], float]]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{{{_format_labels(labels)}}} {_format_number(value)}")
+
+        def histogram(name: str, help_text: str, samples: Iterable[tuple[dict[str, str], Histogram]]) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for labels, value in samples:
+                for bound, count in value.cumulative():
+                    bucket_labels = _format_labels({**labels, "le": _format_number(bound)})
+                    lines.append(f"{prefix}_{name}_bucket{{{bucket_labels}}} {count}")
+                formatted = _format_labels(labels)
+                lines.append(f"{prefix}_{name}_sum{{{formatted}}} {_format_number(value.sum)}")
+                lines.append(f"{prefix}_{name}_count{{{formatted}}} {value.count}")
+
+        scalar("emits_total", "counter", "Number of emitted events",
+               (({"event": _label(event)}, count) for event, count in self._emits.items()))
+        scalar("dropped_total", "counter", "Number of emitted events dropped by a filter",
+               (({"event": _label(event)}, count) for event, count in self._dropped.items()))
+        scalar("errors_total", "counter", "Number of errors raised by handlers, filters and injectors",
+               (({"event": _label(event), "stage": stage, "callback": name}, count)
+                for (event, stage, name), count in self._errors.items()))
+        scalar("in_flight", "gauge", "Number of asynchronous callbacks running",
+               (({"event": _label(event)}, count) for event, count in self._in_flight.items()))
+        histogram("emit_duration_seconds", "End to end latency of emits",
+                  (({"event": _label(event)}, value) for event, value in self._emit_latency.items()))
+        histogram("callback_duration_seconds", "Latency of handlers, filters and injectors",
+                  (({"event": _label(event), "stage": stage, "callback": name}, value)
+                   for (event, stage, name), value in self._callback_latency.items()))
+        histogram("limiter_wait_seconds", "Time handlers waited for their concurrency limiters",
+                  (({"event": _label(event)}, value) for event, value in self._wait_time.items()))
+        return "\n".join(lines) + "\n"
+
+    @property
+    def buckets(self) -> tuple[float, ...]:
+        return self._buckets
@@ -0,0 +1,270 @@
+import reprlib
+from contextvars import ContextVar, Token
+from heapq import heappush, heappushpop
+from itertools import count
+from random import random
+from time import perf_counter, thread_time
+from typing import Any, Callable, Coroutine, Generator, NamedTuple, Optional
+
+from loguru import logger
+
+from ..event import EventType
+
+_repr = reprlib.Repr()
+_repr.maxstring = 80
+_repr.maxother = 80
+
+
+class SlowCall(NamedTuple):
+    """
+    Arguments of one of the slowest calls of a callback, kept as their truncated representation
+    """
+    wall_time: float
+    cpu_time: float
+    args: str
+    kwargs: str
+
+
+class CallbackProfile(NamedTuple):
+    """
+    Timing summary of a callback over the sampled emits, times are in seconds
+    """
+    event: EventType
+    stage: str
+    name: str
+    calls: int
+    wall_time: float
+    cpu_time: float
+    max_wall_time: float
+    slowest: tuple[SlowCall, ...]
+
+    @property
+    def mean_wall_time(self) -> float:
+        return self.wall_time / self.calls if self.calls else 0.0
+
+
+class _CallbackStats:
+    __slots__ = ("calls", "wall_time", "cpu_time", "max_wall_time", "slowest")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.max_wall_time = 0.0
+        # Min-heap of (wall time, tie breaker, SlowCall), so the fastest of the kept calls is dropped first
+        self.slowest: list[tuple[float, int, SlowCall]] = []
+
+
+class _CpuTimer:
+    """
+    Awaitable that drives a coroutine and adds up the CPU time of each of its steps,
+    so the time other tasks run while it is suspended is not counted
+    """
+    __slots__ = ("_coroutine", "cpu_time")
+
+    def __init__(self, coroutine: Coroutine):
+        self._coroutine = coroutine
+        self.cpu_time = 0.0
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        coroutine = self._coroutine
+        value = None
+        error = None
+        while True:
+            start = thread_time()
+            try:
+                if error is None:
+                    future = coroutine.send(value)
+                else:
+                    future = coroutine.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.cpu_time += thread_time() - start
+            try:
+                value = yield future
+                error = None
+            except GeneratorExit:
+                coroutine.close()
+                raise
+            except BaseException as e:
+                value = None
+                error = e
+
+
+class BusProfiler:
+    """
+    Sampling profiler of the handlers, filters and injectors of an event bus\n
+    A fraction of the emits is sampled, every callback that runs for a sampled emit records its wall time
+    and on-CPU time, and the arguments of its slowest calls are kept.
+    Callbacks slower than the threshold are logged as warnings.
+    For asynchronous callbacks only the CPU time of their own steps is counted,
+    for offloaded handlers it is the share of the event loop thread\n
+    Example:
+        profiler = event_bus.enable_profiler(sample_rate=0.05, threshold=0.1)
+        ...
+        print(profiler.format_report(top=10))
+
+    :param sample_rate: Fraction of emits to sample, between 0 and 1
+    :param threshold: Seconds of wall time above which a sampled call is logged, None disables the log
+    :param keep_slowest: How many of the slowest calls to keep the arguments of, per callback
+    """
+
+    def __init__(self, sample_rate: float = 0.01, threshold: Optional[float] = None, keep_slowest: int = 5):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self._sample_rate = sample_rate
+        self._threshold = threshold
+        self._keep_slowest = keep_slowest
+        # Per profiler, so that emits on another bus from inside a sampled handler are sampled on their own
+        self._sampled: ContextVar[bool] = ContextVar(f"event_bus_profiler_{id(self)}", default=False)
+        self._stats: dict[tuple[EventType, str, str], _CallbackStats] = {}
+        self._emits = 0
+        self._sampled_emits = 0
+        self._counter = count()
+
+    def begin(self) -> Token:
+        """
+        Decide whether the emit that is starting is sampled, the decision holds for everything it runs
+        :return: The token to pass to **BusProfiler.end**
+        """
+        self._emits += 1
+        sampled = random() < self._sample_rate
+        if sampled:
+            self._sampled_emits += 1
+        return self._sampled.set(sampled)
+
+    def end(self, token: Token) -> None:
+        self._sampled.reset(token)
+
+    def _record(self, event: EventType, stage: str, name: str, stats: _CallbackStats, wall_time: float,
+                cpu_time: float, args: tuple, kwargs: dict) -> None:
+        stats.calls += 1
+        stats.wall_time += wall_time
+        stats.cpu_time += cpu_time
+        if wall_time > stats.max_wall_time:
+            stats.max_wall_time = wall_time
+        if self._keep_slowest > 0 and (len(stats.slowest) < self._keep_slowest or wall_time > stats.slowest[0][0]):
+            call = SlowCall(wall_time, cpu_time, _repr.repr(args), _repr.repr(kwargs))
+            if len(stats.slowest) < self._keep_slowest:
+                heappush(stats.slowest, (wall_time, next(self._counter), call))
+            else:
+                heappushpop(stats.slowest, (wall_time, next(self._counter), call))
+        if self._threshold is not None and wall_time > self._threshold:
+            logger.warning(f"Slow {stage} {name} of event {event}: {wall_time * 1000:.2f}ms wall, "
+                           f"{cpu_time * 1000:.2f}ms cpu, args={_repr.repr(args)}, kwargs={_repr.repr(kwargs)}")
+
+    def _stats_of(self, event: EventType, stage: str, name: str) -> _CallbackStats:
+        key = (event, stage, name)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = _CallbackStats()
+        return stats
+
+    def profile_sync(self, event: EventType, stage: str, func: Callable, name: str) -> Callable:
+        """
+        Wrap a synchronous callback so that it is timed when its emit is sampled
+        :param event: The event the callback runs for
+        :param stage: "handler", "filter" or "inject"
+        :param func: Original synchronous function
+        :param name: Name of the callback
+        """
+        stats = self._stats_of(event, stage, name)
+        sampled = self._sampled
+
+        def profiled(*args, **kwargs):
+            if not sampled.get():
+                return func(*args, **kwargs)
+            start, cpu_start = perf_counter(), thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._record(event, stage, name, stats, perf_counter() - start, thread_time() - cpu_start,
+                             args, kwargs)
+
+        return profiled
+
+    def profile_async(self, event: EventType, stage: str, func: Callable, name: str) -> Callable:
+        """
+        Wrap an asynchronous callback so that it is timed when its emit is sampled
+        :param event: The event the callback runs for
+        :param stage: "handler", "filter" or "inject"
+        :param func: Original asynchronous function
+        :param name: Name of the callback
+        """
+        stats = self._stats_of(event, stage, name)
+        sampled = self._sampled
+
+        async def profiled(*args, **kwargs):
+            if not sampled.get():
+                return await func(*args, **kwargs)
+            timer = _CpuTimer(func(*args, **kwargs))
+            start = perf_counter()
+            try:
+                return await timer
+            finally:
+                self._record(event, stage, name, stats, perf_counter() - start, timer.cpu_time, args, kwargs)
+
+        return profiled
+
+    def report(self, top: Optional[int] = 10) -> list[CallbackProfile]:
+        """
+        Get the costliest callbacks
+        :param top: How many callbacks to return, None returns all of them
+        :return: Profiles sorted by total wall time, costliest first
+        """
+        profiles = [
+            CallbackProfile(event, stage, name, stats.calls, stats.wall_time, stats.cpu_time, stats.max_wall_time,
+                            tuple(call for _, _, call in sorted(stats.slowest, reverse=True)))
+            for (event, stage, name), stats in self._stats.items() if stats.calls
+        ]
+        profiles.sort(key=lambda profile: profile.wall_time, reverse=True)
+        return profiles if top is None else profiles[:top]
+
+    def format_report(self, top: Optional[int] = 10) -> str:
+        """
+        Render **BusProfiler.report** as a text table, times are in milliseconds
+        """
+        lines = [f"Sampled {self._sampled_emits} of {self._emits} emits",
+                 f"{'event':<24} {'stage':<8} {'callback':<32} {'calls':>7} {'total':>10} {'cpu':>10} "
+                 f"{'mean':>9} {'max':>9}"]
+        for profile in self.report(top):
+            lines.append(f"{str(profile.event):<24.24} {profile.stage:<8} {profile.name:<32.32} {profile.calls:>7} "
+                         f"{profile.wall_time * 1000:>10.2f} {profile.cpu_time * 1000:>10.2f} "
+                         f"{profile.mean_wall_time * 1000:>9.3f} {profile.max_wall_time * 1000:>9.3f}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """
+        Forget every recorded call
+        """
+        for stats in self._stats.values():
+            stats.__init__()
+        self._emits = 0
+        self._sampled_emits = 0
+
+    @property
+    def sample_rate(self) -> float:
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, value: float) -> None:
+        if not 0 <= value <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self._sample_rate = value
+
+    @property
+    def threshold(self) -> Optional[float]:
+        return self._threshold
+
+    @threshold.setter
+    def threshold(self, value: Optional[float]) -> None:
+        self._threshold = value
+
+    @property
+    def emits(self) -> int:
+        return self._emits
+
+    @property
+    def sampled_emits(self) -> int:
+        return self._sampled_emits
@@ -0,0 +1,162 @@
+from asyncio import CancelledError, Queue, QueueEmpty, QueueFull, Task, gather, get_running_loop
+from enum import Enum, auto
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+from .module_exceptions import QueueFullError
+from ..event import EventType
+
+if TYPE_CHECKING:
+    from .base_bus import BaseBus
+
+
+class OverflowPolicy(Enum):
+    """
+    What to do with an event that is published to a full queue
+    """
+    # Wait until there is room in the queue
+    BLOCK = auto()
+    # Discard the oldest queued event to make room
+    DROP_OLDEST = auto()
+    # Discard the event being published
+    DROP_NEWEST = auto()
+    # Raise QueueFullError
+    RAISE = auto()
+
+
+class EventQueue:
+    """
+    A bounded queue drained by a pool of worker tasks, used by the queued mode of the event bus\n
+    Producers only pay for putting the event on the queue, the workers call **BaseBus.emit** for them.
+    Workers are started lazily on the running event loop when the first event is queued
+    :param bus: The event bus the queued events are emitted on
+    :param maxsize: The maximum number of queued events
+    :param workers: The number of worker tasks
+    :param policy: What to do when the queue is full
+    """
+
+    def __init__(self, bus: "BaseBus", maxsize: int = 1024, workers: int = 4,
+                 policy: OverflowPolicy = OverflowPolicy.BLOCK):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than 0")
+        if workers <= 0:
+            raise ValueError("workers must be greater than 0")
+        self._bus = bus
+        self._queue: Queue[tuple[EventType, tuple, dict[str, Any]]] = Queue(maxsize)
+        self._worker_count = workers
+        self._workers: list[Task] = []
+        self._policy = policy
+        self._dropped = 0
+        self._processed = 0
+        self._failed = 0
+
+    def _start(self) -> None:
+        if self._workers:
+            return
+        loop = get_running_loop()
+        self._workers = [loop.create_task(self._worker()) for _ in range(self._worker_count)]
+        logger.debug(f"Event queue started with {self._worker_count} workers, maxsize={self._queue.maxsize}")
+
+    async def _worker(self) -> None:
+        while True:
+            event, args, kwargs = await self._queue.get()
+            try:
+                await self._bus.emit(event, *args, **kwargs)
+                self._processed += 1
+            except CancelledError:
+                raise
+            except Exception as e:
+                self._failed += 1
+                logger.opt(exception=e).error(f"Queued event {event} failed")
+            finally:
+                self._queue.task_done()
+
+    def put_nowait(self, event: EventType, args: tuple, kwargs: dict[str, Any]) -> bool:
+        """
+        Queue an event without waiting\n
+        As this never waits, the BLOCK policy behaves like RAISE here
+        :return: False if the event was dropped
+        """
+        self._start()
+        try:
+            self._queue.put_nowait((event, args, kwargs))
+            return True
+        except QueueFull:
+            return self._overflow(event, args, kwargs)
+
+    async def put(self, event: EventType, args: tuple, kwargs: dict[str, Any]) -> bool:
+        """
+        Queue an event, waiting for room if the policy is BLOCK
+        :return: False if the event was dropped
+        """
+        self._start()
+        if self._policy is OverflowPolicy.BLOCK:
+            await self._queue.put((event, args, kwargs))
+            return True
+        return self.put_nowait(event, args, kwargs)
+
+    def _overflow(self, event: EventType, args: tuple, kwargs: dict[str, Any]) -> bool:
+        if self._policy is OverflowPolicy.DROP_NEWEST:
+            self._dropped += 1
+            return False
+        if self._policy is OverflowPolicy.DROP_OLDEST:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self._dropped += 1
+            except QueueEmpty:
+                pass
+            self._queue.put_nowait((event, args, kwargs))
+            return True
+        raise QueueFullError(f"Event queue is full, maxsize={self._queue.maxsize}")
+
+    async def join(self) -> None:
+        """
+        Wait until every queued event has been handled
+        """
+        await self._queue.join()
+
+    async def close(self, drain: bool = True) -> None:
+        """
+        Stop the workers
+        :param drain: Handle the events that are still queued before stopping
+        """
+        if drain and self._workers:
+            await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self._dropped += 1
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def maxsize(self) -> int:
+        return self._queue.maxsize
+
+    @property
+    def policy(self) -> OverflowPolicy:
+        return self._policy
+
+    @property
+    def workers(self) -> int:
+        return self._worker_count
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @property
+    def processed(self) -> int:
+        return self._processed
+
+    @property
+    def failed(self) -> int:
+        return self._failed
@@ -0,0 +1,219 @@
+from asyncio import Task, ensure_future, shield
+from collections import OrderedDict
+from functools import partial
+from time import monotonic
+from typing import Any, Callable, Hashable, Optional, Type, Union
+
+from .dispatch_plan import CallbackEntry
+
+_MISSING = object()
+
+CacheOption: Type = Union[bool, "CallbackCache", None]
+
+
+class CallbackCache:
+    """
+    A bounded LRU cache with optional expiry that memoizes the results of a callback\n
+    The cache key is computed from the arguments of the call, by default from all of them,
+    so every argument must be hashable. Calls whose key can not be hashed are not cached.
+    Global filters receive the event as first argument, so it is part of their key.\n
+    With single flight, concurrent calls of an asynchronous callback that miss the cache with the same key
+    share one call instead of each starting its own, the shared call keeps running if its callers are cancelled\n
+    Example:
+        cache = CallbackCache(maxsize=10000, ttl=60, key=lambda user_id, *_, **__: user_id)
+        event_bus.add_filter('message_create', is_blocked, cache=cache)
+        ...
+        cache.invalidate(user_id)
+
+    :param maxsize: The maximum number of cached results, the least recently used one is evicted first
+    :param ttl: Seconds a result stays valid, None means until it is evicted or invalidated
+    :param key: Computes the cache key from the arguments of the call
+    :param single_flight: Share the in-flight call of an asynchronous callback between concurrent misses
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None,
+                 key: Optional[Callable[..., Hashable]] = None, single_flight: bool = True):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than 0")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be greater than 0")
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._key = key
+        self._single_flight = single_flight
+        self._in_flight: dict[Hashable, Task] = {}
+        # Key to (result, expiry time or None)
+        self._entries: OrderedDict[Hashable, tuple[Any, Optional[float]]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+
+    def make_key(self, args: tuple, kwargs: dict) -> Hashable:
+        if self._key is not None:
+            return self._key(*args, **kwargs)
+        if kwargs:
+            return args, tuple(sorted(kwargs.items()))
+        return args
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Look a result up, counting the hit or the miss
+        :return: The cached result, or **_MISSING**
+        """
+        entry = self._entries.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, expires = entry
+            if expires is None or expires > monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+            del self._entries[key]
+        self._misses += 1
+        return _MISSING
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (value, monotonic() + self._ttl if self._ttl is not None else None)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def wrap(self, func: Callable, is_async: bool) -> Callable:
+        """
+        Wrap a callback so that its results are served from this cache
+        :param func: Original function
+        :param is_async: Whether the function is asynchronous
+        """
+        make_key = self.make_key
+        get = self.get
+        put = self.put
+
+        if is_async and self._single_flight:
+            in_flight = self._in_flight
+
+            def settle(key: Hashable, task: Task) -> None:
+                in_flight.pop(key, None)
+                # Failed and cancelled calls are not cached, every caller sees their error
+                if not task.cancelled() and task.exception() is None:
+                    put(key, task.result())
+
+            async def cached(*args, **kwargs):
+                try:
+                    key = make_key(args, kwargs)
+                    task = in_flight.get(key)
+                except TypeError:
+                    return await func(*args, **kwargs)
+                if task is not None:
+                    self._shared += 1
+                    return await shield(task)
+                value = get(key)
+                if value is _MISSING:
+                    task = in_flight[key] = ensure_future(func(*args, **kwargs))
+                    task.add_done_callback(partial(settle, key))
+                    return await shield(task)
+                return value
+        elif is_async:
+            async def cached(*args, **kwargs):
+                try:
+                    key = make_key(args, kwargs)
+                    value = get(key)
+                except TypeError:
+                    # Unhashable arguments are not cached
+                    return await func(*args, **kwargs)
+                if value is _MISSING:
+                    value = await func(*args, **kwargs)
+                    put(key, value)
+                return value
+        else:
+            def cached(*args, **kwargs):
+                try:
+                    key = make_key(args, kwargs)
+                    value = get(key)
+                except TypeError:
+                    return func(*args, **kwargs)
+                if value is _MISSING:
+                    value = func(*args, **kwargs)
+                    put(key, value)
+                return value
+
+        cached.__qualname__ = getattr(func, "__qualname__", cached.__qualname__)
+        cached.__name__ = getattr(func, "__name__", cached.__name__)
+        return cached
+
+    def invalidate(self, *args, **kwargs) -> bool:
+        """
+        Drop the result cached for these arguments, they are passed to the key function like a call would
+        :return: Whether a result was cached
+        """
+        return self._entries.pop(self.make_key(args, kwargs), _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        """
+        Drop every cached result, the hit and miss counters are kept
+        """
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @property
+    def ttl(self) -> Optional[float]:
+        return self._ttl
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def shared(self) -> int:
+        """
+        The number of calls that joined a call already in flight instead of running the callback
+        """
+        return self._shared
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def __str__(self) -> str:
+        return (f"CallbackCache(size={len(self._entries)}, maxsize={self._maxsize}, ttl={self._ttl}, "
+                f"hits={self._hits}, misses={self._misses}, shared={self._shared})")
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+def resolve_cache(cache: CacheOption) -> Optional[CallbackCache]:
+    """
+    Turn the cache option of a registration into a cache, True creates one with the default settings
+    """
+    if cache is None or cache is False:
+        return None
+    if cache is True:
+        return CallbackCache()
+    if not isinstance(cache, CallbackCache):
+        raise TypeError(f"cache must be a bool or a CallbackCache, not {type(cache).__name__}")
+    return cache
+
+
+def apply_caches(caches: dict[tuple[Any, Callable], CallbackCache], scope: Any,
+                 entries: tuple[CallbackEntry, ...]) -> tuple[CallbackEntry, ...]:
+    """
+    Put the callbacks that were registered with a cache behind it
+    :param caches: Caches keyed by scope and raw function
+    :param scope: The event the callbacks are registered for, None for global callbacks
+    :param entries: Flattened callbacks
+    """
+    if not caches:
+        return entries
+    return tuple((cache.wrap(callback, is_async), is_async)
+                 if (cache := caches.get((scope, callback))) is not None
+                 else (callback, is_async)
+                 for callback, is_async in entries)
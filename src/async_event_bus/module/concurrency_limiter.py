@@ -0,0 +1,53 @@
+from asyncio import Semaphore
+
+
+class ConcurrencyLimiter:
+    """
+    A semaphore that reports how many tasks hold it and how many are waiting for it
+    :param limit: The maximum number of tasks that can hold the limiter at the same time
+    """
+
+    def __init__(self, limit: int):
+        if limit <= 0:
+            raise ValueError("limit must be greater than 0")
+        self._limit = limit
+        self._semaphore = Semaphore(limit)
+        self._in_flight = 0
+        self._waiters = 0
+
+    async def acquire(self) -> None:
+        self._waiters += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiters -= 1
+        self._in_flight += 1
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        self.release()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiters(self) -> int:
+        return self._waiters
+
+    def __str__(self) -> str:
+        return f"ConcurrencyLimiter(limit={self._limit}, in_flight={self._in_flight}, waiters={self._waiters})"
+
+    def __repr__(self) -> str:
+        return str(self)
@@ -0,0 +1,29 @@
+from types import MappingProxyType
+from typing import Callable, Mapping, NamedTuple, Type
+
+# A raw callback function and whether it is asynchronous
+CallbackEntry: Type = tuple[Callable, bool]
+
+
+class DispatchPlan(NamedTuple):
+    """
+    Immutable snapshot of everything needed to emit an event\n
+    The event bus builds a plan the first time an event is emitted and reuses it afterward,
+    the plan is dropped as soon as a subscription, filter or injector of the event changes.
+    Every handler field is a flat tuple that is already in execution order.
+    Handlers are the raw callback functions, or the limiter and executor wrappers they need,
+    filters and injectors are pairs of raw function and whether it is asynchronous.
+    **intercept** tells whether **before_emit** has to run at all.
+    **routes** holds the handlers of the subscriptions with **where** predicates,
+    as pairs of the tested fields and the compiled handlers keyed by the expected values.
+    **handler_names** maps the awaited handlers to the name of their subscribed function, for the errors of a deadline
+    """
+    sync_handlers: tuple[Callable, ...] = ()
+    async_handlers: tuple[Callable, ...] = ()
+    global_injects: tuple[CallbackEntry, ...] = ()
+    injects: tuple[CallbackEntry, ...] = ()
+    global_filters: tuple[CallbackEntry, ...] = ()
+    filters: tuple[CallbackEntry, ...] = ()
+    intercept: bool = True
+    routes: tuple[tuple[tuple[str, ...], dict[tuple, tuple[tuple[Callable, ...], tuple[Callable, ...]]]], ...] = ()
+    handler_names: Mapping[Callable, str] = MappingProxyType({})
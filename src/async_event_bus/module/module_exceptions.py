@@ -1,3 +1,6 @@
+from typing import Any, Optional
+
+
 class MultipleError(Exception):
     def __init__(self, exceptions: list[Exception]):
         self._exceptions = exceptions
@@ -12,3 +15,35 @@ class MultipleError(Exception):
 
     def __repr__(self) -> str:
         return self._info
+
+
+class QueueFullError(Exception):
+    """
+    Raised when an event is published to a full queue whose overflow policy does not allow waiting or dropping
+    """
+    pass
+
+
+class HandlerTimeoutError(TimeoutError):
+    """
+    Raised when a handler overruns its timeout or the deadline of the emit, the handler has been cancelled
+    """
+
+    def __init__(self, event: Any, timeout: float, handler: Optional[str] = None):
+        self._event = event
+        self._timeout = timeout
+        self._handler = handler
+        target = f"Handler {handler}" if handler is not None else "Handler"
+        super().__init__(f"{target} of event {event} did not finish within {timeout}s and was cancelled")
+
+    @property
+    def event(self) -> Any:
+        return self._event
+
+    @property
+    def timeout(self) -> float:
+        return self._timeout
+
+    @property
+    def handler(self) -> Optional[str]:
+        return self._handler
@@ -0,0 +1,402 @@
+from abc import ABC, abstractmethod
+from asyncio import AbstractEventLoop, Task, TimerHandle, get_running_loop, sleep, wait
+from math import inf
+from typing import Any, Callable, Hashable, Optional, Type, Union
+
+from loguru import logger
+
+from ..event import EventType
+from ..event.route_index import resolve_field
+
+# A field of the emit, read like the fields of **where**, or a function called with the arguments of the emit
+KeyFunction: Type = Union[str, Callable[..., Hashable]]
+
+
+class _Pending:
+    """
+    What a policy keeps for one key of one handler, the call it holds back and the timer that releases it
+    """
+
+    __slots__ = ("handler", "is_async", "args", "kwargs", "loop", "timer", "deadline", "limit", "waiting", "expired")
+
+    def __init__(self, handler: Callable, is_async: bool, args: tuple, kwargs: dict[str, Any],
+                 loop: AbstractEventLoop):
+        self.handler = handler
+        self.is_async = is_async
+        self.args = args
+        self.kwargs = kwargs
+        self.loop = loop
+        self.timer: Optional[TimerHandle] = None
+        self.deadline = 0.0
+        self.limit = inf
+        # Whether the arguments are a call that has not run yet
+        self.waiting = True
+        # Whether the timer fired while the previous call of the key was still running
+        self.expired = False
+
+
+class RatePolicy(ABC):
+    """
+    Base class of the policies that cut down how often a handler runs during a burst of events\n
+    A handler behind a policy is detached from the emit, the emit hands the call over to the policy and returns,
+    the policy runs it later on the same loop. Errors raised by the handler are logged and counted by the policy.
+    Every handler and every key has its own state, the key is read from each emit,
+    so that the events of different entities are held back separately.
+    One policy can be given to several subscriptions, its counters are the sum of them\n
+    Example:
+        policy = Debounce(0.5, key="tenant")
+        event_bus.subscribe('config_changed', reload_config, policy=policy)
+        ...
+        await policy.flush()
+
+    :param key: A field of the emit, read like the fields of **where**, or a function called with the arguments
+        of the emit that returns a hashable key, None puts every emit under the same key
+    """
+
+    def __init__(self, key: Optional[KeyFunction] = None):
+        if key is not None and not isinstance(key, str) and not callable(key):
+            raise TypeError("key must be a field name or a function")
+        self._key = key
+        self._pending: dict[tuple, _Pending] = {}
+        self._tasks: dict[Task, tuple] = {}
+        self._received = 0
+        self._runs = 0
+        self._suppressed = 0
+        self._failed = 0
+
+    def bind(self, event: EventType, subscribed: EventType, origin: Callable, handler: Callable,
+             is_async: bool) -> Callable:
+        """
+        Put a compiled handler of the bus behind the policy
+        :param event: The emitted event, it is part of the state key
+        :param subscribed: The event, pattern or event class the function subscribed to, it is part of the state key
+        :param origin: The subscribed function, it is part of the state key
+        :param handler: The function that runs the handler with its executor, timeout and limiters
+        :param is_async: Whether handler returns a coroutine
+        :return: A synchronous function the emit calls instead of the handler
+        """
+        key = self._key
+        submit = self._submit
+        if key is None:
+            state_key = (event, origin, None, subscribed)
+
+            def gate(*args, **kwargs) -> None:
+                submit(state_key, handler, is_async, args, kwargs)
+        elif isinstance(key, str):
+            def gate(*args, **kwargs) -> None:
+                submit((event, origin, resolve_field(args[0] if args else None, kwargs, key), subscribed),
+                       handler, is_async, args, kwargs)
+        else:
+            def gate(*args, **kwargs) -> None:
+                submit((event, origin, key(*args, **kwargs), subscribed), handler, is_async, args, kwargs)
+        return gate
+
+    @abstractmethod
+    def _submit(self, state_key: tuple, handler: Callable, is_async: bool, args: tuple,
+                kwargs: dict[str, Any]) -> None:
+        """
+        Take one emit of a handler, called synchronously by the emit
+        """
+        raise NotImplementedError
+
+    def _run(self, state_key: tuple, pending: _Pending) -> None:
+        self._runs += 1
+        pending.waiting = False
+        if not pending.is_async:
+            try:
+                pending.handler(*pending.args, **pending.kwargs)
+            except Exception as e:
+                self._fail(state_key, e)
+            self._finished(state_key)
+            return
+        task = pending.loop.create_task(pending.handler(*pending.args, **pending.kwargs))
+        self._tasks[task] = state_key
+        task.add_done_callback(self._settle)
+
+    def _settle(self, task: Task) -> None:
+        state_key = self._tasks.pop(task)
+        if not task.cancelled() and (error := task.exception()) is not None:
+            self._fail(state_key, error)
+        self._finished(state_key)
+
+    def _fail(self, state_key: tuple, error: BaseException) -> None:
+        self._failed += 1
+        name = getattr(state_key[1], "__name__", state_key[1])
+        logger.opt(exception=error).error(f"Handler {name} of {state_key[0]} failed behind {type(self).__name__}")
+
+    def _finished(self, state_key: tuple) -> None:
+        """
+        Called when a call of the key returned
+        """
+
+    def _flush(self, state_key: tuple) -> None:
+        """
+        Release the call held for a key right away
+        """
+        pending = self._pending.pop(state_key)
+        if pending.timer is not None:
+            pending.timer.cancel()
+        if pending.waiting:
+            self._run(state_key, pending)
+
+    async def flush(self) -> None:
+        """
+        Run the calls being held back without waiting for their timers, then wait until every call has finished,
+        must be awaited on the loop of the emits
+        """
+        while True:
+            for state_key in tuple(self._pending):
+                if state_key in self._pending:
+                    self._flush(state_key)
+            running = [task for task in self._tasks if not task.done()]
+            if running:
+                await wait(running)
+                continue
+            # Let the done callbacks of the finished tasks count them
+            await sleep(0)
+            if not self._pending and not self._tasks:
+                return
+
+    def cancel(self, callback: Optional[Callable] = None, subscribed: Optional[EventType] = None) -> None:
+        """
+        Drop the calls being held back, calls that already started are left to finish
+        :param callback: Only drop the calls of this subscribed function, None drops every call
+        :param subscribed: Only drop the calls of the subscription of callback to this event, pattern or event class
+        """
+        stale = [state_key for state_key in self._pending
+                 if callback is None or state_key[1] == callback and subscribed in (None, state_key[3])]
+        for state_key in stale:
+            pending = self._pending.pop(state_key)
+            if pending.timer is not None:
+                pending.timer.cancel()
+            if pending.waiting:
+                self._suppressed += 1
+
+    @property
+    def key(self) -> Optional[KeyFunction]:
+        return self._key
+
+    @property
+    def received(self) -> int:
+        """
+        The number of emits handed over to the policy
+        """
+        return self._received
+
+    @property
+    def runs(self) -> int:
+        """
+        The number of times a handler was run
+        """
+        return self._runs
+
+    @property
+    def suppressed(self) -> int:
+        """
+        The number of emits that did not get a run of their own, because they were replaced, merged or dropped
+        """
+        return self._suppressed
+
+    @property
+    def pending(self) -> int:
+        """
+        The number of calls being held back
+        """
+        return sum(1 for pending in self._pending.values() if pending.waiting)
+
+    @property
+    def in_flight(self) -> int:
+        """
+        The number of asynchronous or offloaded calls that are running
+        """
+        return len(self._tasks)
+
+    @property
+    def failed(self) -> int:
+        return self._failed
+
+
+class Debounce(RatePolicy):
+    """
+    Runs a handler once the events of a key have stopped for a quiet period, with the arguments of the last one\n
+    Every emit moves the end of the quiet period, the timer itself is only moved when it fires,
+    so a burst costs one timer per key instead of one per emit\n
+    Example:
+        # Reload once the configuration has not changed for half a second, but at least every 5 seconds
+        event_bus.subscribe('config_changed', reload_config, policy=Debounce(0.5, max_wait=5))
+
+    :param wait: Seconds without an emit of the key before the handler runs
+    :param max_wait: Seconds the first held back emit may wait at most, None lets a steady stream wait forever
+    :param key: Please check **RatePolicy**
+    """
+
+    def __init__(self, wait: float, *, max_wait: Optional[float] = None, key: Optional[KeyFunction] = None):
+        if wait <= 0:
+            raise ValueError("wait must be greater than 0")
+        if max_wait is not None and max_wait < wait:
+            raise ValueError("max_wait must not be less than wait")
+        super().__init__(key)
+        self._wait = wait
+        self._max_wait = max_wait
+
+    def _submit(self, state_key: tuple, handler: Callable, is_async: bool, args: tuple,
+                kwargs: dict[str, Any]) -> None:
+        self._received += 1
+        pending = self._pending.get(state_key)
+        if pending is not None:
+            self._suppressed += 1
+            pending.handler, pending.args, pending.kwargs = handler, args, kwargs
+            pending.deadline = min(pending.loop.time() + self._wait, pending.limit)
+            return
+        loop = get_running_loop()
+        pending = self._pending[state_key] = _Pending(handler, is_async, args, kwargs, loop)
+        now = loop.time()
+        pending.deadline = now + self._wait
+        if self._max_wait is not None:
+            pending.limit = now + self._max_wait
+        pending.timer = loop.call_at(pending.deadline, self._expire, state_key)
+
+    def _expire(self, state_key: tuple) -> None:
+        pending = self._pending[state_key]
+        if pending.loop.time() < pending.deadline:
+            pending.timer = pending.loop.call_at(pending.deadline, self._expire, state_key)
+            return
+        del self._pending[state_key]
+        self._run(state_key, pending)
+
+    @property
+    def wait(self) -> float:
+        return self._wait
+
+    @property
+    def max_wait(self) -> Optional[float]:
+        return self._max_wait
+
+
+class Throttle(RatePolicy):
+    """
+    Runs a handler at most once per interval for each key\n
+    The first emit of a key runs right away and opens the interval, the emits during the interval are held back,
+    only the last one runs when the interval ends, and opens the next one\n
+    Example:
+        # Refresh the cache of a tenant at most once per second
+        event_bus.subscribe('cache_invalidated', refresh_cache, policy=Throttle(1, key="tenant"))
+
+    :param interval: Seconds between two runs of the handler for the same key
+    :param leading: Run the first emit right away, otherwise it waits for the end of the interval too
+    :param trailing: Run the last emit of the interval when it ends, otherwise the emits during it are dropped
+    :param key: Please check **RatePolicy**
+    """
+
+    def __init__(self, interval: float, *, leading: bool = True, trailing: bool = True,
+                 key: Optional[KeyFunction] = None):
+        if interval <= 0:
+            raise ValueError("interval must be greater than 0")
+        if not leading and not trailing:
+            raise ValueError("A throttle that runs neither the leading nor the trailing emit never runs")
+        super().__init__(key)
+        self._interval = interval
+        self._leading = leading
+        self._trailing = trailing
+
+    def _submit(self, state_key: tuple, handler: Callable, is_async: bool, args: tuple,
+                kwargs: dict[str, Any]) -> None:
+        self._received += 1
+        pending = self._pending.get(state_key)
+        if pending is not None:
+            if pending.waiting or not self._trailing:
+                self._suppressed += 1
+            if self._trailing:
+                pending.handler, pending.args, pending.kwargs = handler, args, kwargs
+                pending.waiting = True
+            return
+        loop = get_running_loop()
+        pending = self._pending[state_key] = _Pending(handler, is_async, args, kwargs, loop)
+        pending.timer = loop.call_later(self._interval, self._expire, state_key)
+        if self._leading:
+            self._run(state_key, pending)
+
+    def _expire(self, state_key: tuple) -> None:
+        pending = self._pending[state_key]
+        if not pending.waiting:
+            del self._pending[state_key]
+            return
+        pending.timer = pending.loop.call_later(self._interval, self._expire, state_key)
+        self._run(state_key, pending)
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+
+class Coalesce(RatePolicy):
+    """
+    Merges the payloads of the emits of a key with a reducer, the handler runs once with the merged payload\n
+    The first emit of a key opens a window, the payloads emitted until it closes are folded into the first one.
+    The payload is the first positional argument, the other arguments are those of the last emit.
+    Calls of the same key never overlap, emits that arrive while the handler runs are merged into the next call,
+    which starts when the running one returns\n
+    Example:
+        # Invalidate the keys collected during 100 ms in one call
+        event_bus.subscribe('cache_invalidated', invalidate_keys,
+                            policy=Coalesce(lambda keys, key: keys | {key}, initial=set, window=0.1))
+
+    :param reducer: Called with the merged payload and the payload of the next emit, returns the new merged payload
+    :param window: Seconds to collect payloads, 0 merges the emits made before the loop gets back to its timers
+    :param initial: Returns the value the first payload is folded into, None starts from the first payload itself
+    :param key: Please check **RatePolicy**
+    """
+
+    def __init__(self, reducer: Callable[[Any, Any], Any], *, window: float = 0.0,
+                 initial: Optional[Callable[[], Any]] = None, key: Optional[KeyFunction] = None):
+        if window < 0:
+            raise ValueError("window must not be negative")
+        super().__init__(key)
+        self._reducer = reducer
+        self._window = window
+        self._initial = initial
+        # Keys whose handler is running
+        self._running: set[tuple] = set()
+
+    def _submit(self, state_key: tuple, handler: Callable, is_async: bool, args: tuple,
+                kwargs: dict[str, Any]) -> None:
+        self._received += 1
+        payload = args[0] if args else None
+        pending = self._pending.get(state_key)
+        if pending is not None:
+            merged = self._reducer(pending.args[0], payload)
+            self._suppressed += 1
+            pending.handler, pending.args, pending.kwargs = handler, (merged, *args[1:]), kwargs
+            return
+        if self._initial is not None:
+            payload = self._reducer(self._initial(), payload)
+        loop = get_running_loop()
+        pending = self._pending[state_key] = _Pending(handler, is_async, (payload, *args[1:]), kwargs, loop)
+        pending.timer = loop.call_later(self._window, self._expire, state_key)
+
+    def _expire(self, state_key: tuple) -> None:
+        pending = self._pending[state_key]
+        pending.timer = None
+        if state_key in self._running:
+            # Released when the running call returns
+            pending.expired = True
+            return
+        del self._pending[state_key]
+        self._running.add(state_key)
+        self._run(state_key, pending)
+
+    def _finished(self, state_key: tuple) -> None:
+        self._running.discard(state_key)
+        pending = self._pending.get(state_key)
+        if pending is not None and pending.expired:
+            self._expire(state_key)
+
+    def _flush(self, state_key: tuple) -> None:
+        pending = self._pending[state_key]
+        if pending.timer is not None:
+            pending.timer.cancel()
+        self._expire(state_key)
+
+    @property
+    def window(self) -> float:
+        return self._window
@@ -0,0 +1,21 @@
+from .bus_bridge import BridgePeer, BusBridge
+from .bus_forwarder import EventForwarder, RemoteEmitter
+from .framing import FrameDecoder, decode_payload, encode_frame, encode_payload
+from .shm_ring import ShmPublisher, ShmRing, ShmSubscriber
+from .transport_exceptions import FrameError, HandshakeError
+
+__ALL__ = [
+    BridgePeer,
+    BusBridge,
+    EventForwarder,
+    RemoteEmitter,
+    FrameDecoder,
+    FrameError,
+    HandshakeError,
+    ShmPublisher,
+    ShmRing,
+    ShmSubscriber,
+    decode_payload,
+    encode_frame,
+    encode_payload
+]
@@ -0,0 +1,353 @@
+import hmac
+import os
+from asyncio import (AbstractServer, CancelledError, Event, IncompleteReadError, StreamReader, StreamWriter, Task,
+                     TimeoutError as AsyncTimeoutError, current_task, gather, get_running_loop, open_connection,
+                     open_unix_connection, sleep, start_server, start_unix_server, wait_for)
+from functools import partial
+from typing import TYPE_CHECKING, Awaitable, Callable, Iterable, Optional, Union
+
+from loguru import logger
+
+from .bus_forwarder import EventForwarder
+from .framing import (DIGEST_SIZE, FrameDecoder, HELLO, NONCE_SIZE, auth_digest, check_hello, decode_payload,
+                      frame_payload)
+from .transport_exceptions import FrameError, HandshakeError
+from ..event import EventType
+
+if TYPE_CHECKING:
+    from ..module import BaseBus
+
+Connector: type = Callable[[], Awaitable[tuple[StreamReader, StreamWriter]]]
+
+
+class BridgePeer:
+    """
+    One end a bridge exchanges events with, an accepted connection or a dialed address\n
+    Frames are queued while the peer is disconnected, up to the limit of the bridge, and sent once it is back
+    """
+
+    def __init__(self, name: str, dialed: bool):
+        self._name = name
+        self._dialed = dialed
+        self._pending: list[bytes] = []
+        self._wakeup = Event()
+        self._writer: Optional[StreamWriter] = None
+        self._sent = 0
+        self._received = 0
+        self._flushes = 0
+        self._dropped = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def dialed(self) -> bool:
+        return self._dialed
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def sent(self) -> int:
+        return self._sent
+
+    @property
+    def received(self) -> int:
+        return self._received
+
+    @property
+    def flushes(self) -> int:
+        """
+        The number of writes, each one carries every frame queued since the previous one
+        """
+        return self._flushes
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def __str__(self) -> str:
+        return (f"BridgePeer({self._name}, connected={self.connected}, sent={self._sent}, "
+                f"received={self._received}, pending={len(self._pending)}, dropped={self._dropped})")
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+class BusBridge(EventForwarder):
+    """
+    Connects event buses of different processes on the same host over Unix domain sockets or TCP\n
+    The events the bridge forwards are sent to every connected peer and emitted there with **BaseBus.emit**,
+    please check **EventForwarder** for what is sent.
+    Events that arrive from a peer are not forwarded again, unless relay is enabled,
+    in which case they are passed on to the other peers, which lets one process act as the hub of a star.\n
+    Frames are queued and written in batches, one write per peer per loop iteration, without waiting for the peer.
+    Dialed peers are reconnected with an exponential backoff, frames are queued for them in the meantime.\n
+    Frames are pickled, and unpickling runs code of the sender's choosing, so a peer must be trusted.
+    With a secret, both ends prove they know it with an HMAC challenge before any frame is read,
+    a peer that does not know it is disconnected. Unix sockets are only accessible to their owner by default.
+    TCP is reachable by every local process, so it requires a secret unless insecure is explicitly set\n
+    Example:
+        bridge = BusBridge(event_bus, ['cache_invalidate', 'config_refresh'], secret=os.environ['BUS_SECRET'])
+        await bridge.serve_unix('/run/service/bus.sock')
+        # In the other processes
+        bridge = BusBridge(event_bus, ['cache_invalidate', 'config_refresh'], secret=os.environ['BUS_SECRET'])
+        bridge.connect_unix('/run/service/bus.sock')
+
+    :param bus: The local event bus
+    :param events: The events to forward, wildcard patterns are not supported
+    :param relay: Pass the events received from a peer on to the other peers
+    :param max_pending: The maximum number of frames queued for one peer, newer frames are dropped beyond it
+    :param max_frame_size: The largest frame accepted from a peer, a bigger one closes the connection
+    :param reconnect_delay: Seconds to wait before the first reconnect attempt, doubled after each failure
+    :param max_reconnect_delay: The longest wait between two reconnect attempts
+    :param secret: The secret shared by the bridges that may connect to each other, None accepts any peer
+    :param handshake_timeout: Seconds a new connection may take to complete the handshake
+    """
+
+    def __init__(self, bus: "BaseBus", events: Iterable[EventType] = (), *, relay: bool = False,
+                 max_pending: int = 65536, max_frame_size: int = 64 * 1024 * 1024, reconnect_delay: float = 0.1,
+                 max_reconnect_delay: float = 5.0, secret: Optional[Union[bytes, str]] = None,
+                 handshake_timeout: float = 5.0):
+        if max_pending <= 0:
+            raise ValueError("max_pending must be greater than 0")
+        if reconnect_delay <= 0 or max_reconnect_delay < reconnect_delay:
+            raise ValueError("reconnect_delay must be greater than 0 and not greater than max_reconnect_delay")
+        self._relay = relay
+        self._max_pending = max_pending
+        self._max_frame_size = max_frame_size
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        if isinstance(secret, str):
+            secret = secret.encode()
+        if secret is not None and not secret:
+            raise ValueError("secret must not be empty")
+        self._secret: Optional[bytes] = secret
+        self._handshake_timeout = handshake_timeout
+        self._peers: list[BridgePeer] = []
+        self._servers: list[AbstractServer] = []
+        self._tasks: set[Task] = set()
+        # Connections accepted by the servers, they run in tasks of the servers and are closed rather than cancelled
+        self._connections: set[Task] = set()
+        self._closed = False
+        super().__init__(bus, events)
+
+    def _ready(self) -> bool:
+        return bool(self._peers)
+
+    def _send(self, payload: bytes, exclude: Optional[BridgePeer] = None) -> None:
+        frame = frame_payload(payload)
+        for peer in self._peers:
+            if peer is exclude:
+                continue
+            if len(peer._pending) >= self._max_pending:
+                peer._dropped += 1
+                continue
+            peer._pending.append(frame)
+            peer._wakeup.set()
+
+    async def serve_unix(self, path: str, mode: int = 0o600) -> AbstractServer:
+        """
+        Accept peers on a Unix domain socket
+        :param path: Path of the socket file
+        :param mode: Permissions of the socket file, by default only processes of the same user can connect
+        """
+        server = await start_unix_server(partial(self._accept, f"unix:{path}"), path)
+        os.chmod(path, mode)
+        self._servers.append(server)
+        logger.debug(f"Event bridge listening on unix:{path}")
+        return server
+
+    async def serve_tcp(self, host: str = "127.0.0.1", port: int = 0, *, insecure: bool = False) -> AbstractServer:
+        """
+        Accept peers on a TCP socket, by default on the loopback interface only
+        :param host: Address to listen on
+        :param port: Port to listen on, 0 picks a free port, read it from the sockets of the returned server
+        :param insecure: Accept peers without a secret, any process that reaches the port can then run code here
+        """
+        self._check_secret(insecure)
+        server = await start_server(partial(self._accept, f"tcp:{host}"), host, port)
+        self._servers.append(server)
+        logger.debug(f"Event bridge listening on tcp:{host}:{server.sockets[0].getsockname()[1]}")
+        return server
+
+    def connect_unix(self, path: str) -> BridgePeer:
+        """
+        Dial a bridge that serves a Unix domain socket, and keep dialing it whenever the connection is lost\n
+        Must be called with a running event loop
+        :param path: Path of the socket file
+        """
+        return self._dial(f"unix:{path}", partial(open_unix_connection, path))
+
+    def connect_tcp(self, host: str, port: int, *, insecure: bool = False) -> BridgePeer:
+        """
+        Dial a bridge that serves a TCP socket, and keep dialing it whenever the connection is lost\n
+        Must be called with a running event loop
+        :param host: Address of the bridge
+        :param port: Port of the bridge
+        :param insecure: Connect without a secret, whatever process listens on the port can then run code here
+        """
+        self._check_secret(insecure)
+        return self._dial(f"tcp:{host}:{port}", partial(open_connection, host, port))
+
+    def _check_secret(self, insecure: bool) -> None:
+        if self._secret is None and not insecure:
+            raise ValueError("A TCP bridge needs a secret, pass insecure=True to trust every process of the host")
+
+    def _dial(self, name: str, connector: Connector) -> BridgePeer:
+        if self._closed:
+            raise RuntimeError("The bridge is closed")
+        peer = BridgePeer(name, dialed=True)
+        self._peers.append(peer)
+        self._spawn(self._keep_connected(peer, connector))
+        return peer
+
+    def _spawn(self, coroutine) -> Task:
+        task = get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _keep_connected(self, peer: BridgePeer, connector: Connector) -> None:
+        delay = self._reconnect_delay
+        while not self._closed:
+            try:
+                reader, writer = await connector()
+            except OSError as e:
+                logger.debug(f"Event bridge could not reach {peer.name}: {e}, retrying in {delay}s")
+            else:
+                if await self._run_connection(peer, reader, writer):
+                    delay = self._reconnect_delay
+                if self._closed:
+                    return
+            await sleep(delay)
+            delay = min(delay * 2, self._max_reconnect_delay)
+
+    async def _accept(self, name: str, reader: StreamReader, writer: StreamWriter) -> None:
+        if self._closed:
+            writer.close()
+            return
+        peer = BridgePeer(name, dialed=False)
+        self._peers.append(peer)
+        task = current_task()
+        self._connections.add(task)
+        try:
+            await self._run_connection(peer, reader, writer)
+        finally:
+            self._connections.discard(task)
+            if peer in self._peers:
+                self._peers.remove(peer)
+
+    async def _run_connection(self, peer: BridgePeer, reader: StreamReader, writer: StreamWriter) -> bool:
+        """
+        Exchange frames with a peer until the connection is lost
+        :return: False if the peer failed the handshake
+        """
+        try:
+            await wait_for(self._handshake(peer, reader, writer), self._handshake_timeout)
+        except (ConnectionError, FrameError, IncompleteReadError, AsyncTimeoutError) as e:
+            logger.warning(f"Event bridge handshake with {peer.name} failed: {e or type(e).__name__}")
+            await self._close_writer(writer)
+            return False
+        peer._writer = writer
+        flusher = self._spawn(self._flush(peer, writer))
+        logger.debug(f"Event bridge connected to {peer.name}")
+        try:
+            await self._read(peer, reader)
+        except (ConnectionError, FrameError) as e:
+            logger.warning(f"Event bridge connection to {peer.name} failed: {e}")
+        finally:
+            peer._writer = None
+            flusher.cancel()
+            await self._close_writer(writer)
+            logger.debug(f"Event bridge disconnected from {peer.name}")
+        return True
+
+    async def _handshake(self, peer: BridgePeer, reader: StreamReader, writer: StreamWriter) -> None:
+        """
+        Exchange hellos and challenges, then prove the knowledge of the secret to each other.
+        Nothing the peer sends is unpickled before it has passed
+        """
+        nonce = os.urandom(NONCE_SIZE)
+        writer.write(HELLO + nonce)
+        hello = await reader.readexactly(len(HELLO) + NONCE_SIZE)
+        check_hello(hello)
+        challenge = hello[len(HELLO):]
+        role, peer_role = (b"dial", b"accept") if peer.dialed else (b"accept", b"dial")
+        writer.write(auth_digest(self._secret, role, challenge, nonce))
+        digest = await reader.readexactly(DIGEST_SIZE)
+        if self._secret is not None and not hmac.compare_digest(
+                digest, auth_digest(self._secret, peer_role, nonce, challenge)):
+            raise HandshakeError("The peer does not know the secret of the bridge")
+
+    @staticmethod
+    async def _close_writer(writer: StreamWriter) -> None:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, CancelledError):
+            pass
+
+    async def _flush(self, peer: BridgePeer, writer: StreamWriter) -> None:
+        wakeup = peer._wakeup
+        if peer._pending:
+            wakeup.set()
+        try:
+            while True:
+                await wakeup.wait()
+                wakeup.clear()
+                # Everything queued since the last write goes out in one write
+                batch, peer._pending = peer._pending, []
+                writer.writelines(batch)
+                peer._sent += len(batch)
+                peer._flushes += 1
+                await writer.drain()
+        except ConnectionError:
+            writer.close()
+
+    async def _read(self, peer: BridgePeer, reader: StreamReader) -> None:
+        decoder = FrameDecoder(self._max_frame_size, expect_hello=False)
+        loop = get_running_loop()
+        while data := await reader.read(65536):
+            for payload in decoder.feed(data):
+                peer._received += 1
+                if self._relay:
+                    self._send(payload, exclude=peer)
+                try:
+                    event, args, kwargs = decode_payload(payload)
+                except Exception as e:
+                    self._emitter.count_failure()
+                    logger.opt(exception=e).error(f"Event bridge could not decode a frame from {peer.name}")
+                    continue
+                self._emitter.emit(loop, event, args, kwargs)
+
+    async def close(self) -> None:
+        """
+        Stop forwarding, close the servers and every connection, the events being emitted are left to finish
+        """
+        self._closed = True
+        self.unforward(*tuple(self._forwarders))
+        for server in self._servers:
+            server.close()
+        tasks = tuple(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
+        for peer in self._peers:
+            if peer._writer is not None:
+                peer._writer.close()
+        await gather(*self._connections, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers.clear()
+        self._peers.clear()
+
+    @property
+    def peers(self) -> tuple[BridgePeer, ...]:
+        return tuple(self._peers)
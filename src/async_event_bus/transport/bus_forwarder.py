@@ -0,0 +1,169 @@
+import sys
+from abc import ABC, abstractmethod
+from asyncio import AbstractEventLoop, Task, sleep, wait
+from contextvars import ContextVar, copy_context
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
+
+from loguru import logger
+
+from .framing import encode_payload
+from ..event import AbstractEvent, EventType, TopicTrie
+
+if TYPE_CHECKING:
+    from ..module import BaseBus
+
+# Eager tasks run their first step right away, an emit whose handlers do not suspend is never scheduled
+_EAGER_TASKS = sys.version_info >= (3, 12)
+
+
+class RemoteEmitter:
+    """
+    Emits the events that arrived from another process on the local bus\n
+    Every event gets its own task, so a slow handler does not hold up the events behind it,
+    the task starts eagerly where the interpreter supports it.
+    The event is marked in the context of its task, forwarders that share the marker skip it,
+    so that it is not sent back to where it came from
+    :param bus: The local event bus
+    """
+
+    def __init__(self, bus: "BaseBus"):
+        self._bus = bus
+        # The remote event being emitted in this context
+        self.remote: ContextVar[Any] = ContextVar(f"event_bus_remote_{id(self)}", default=None)
+        self._tasks: set[Task] = set()
+        self._failed = 0
+
+    def emit(self, loop: AbstractEventLoop, event: EventType, args: tuple, kwargs: dict[str, Any]) -> None:
+        context = copy_context()
+        context.run(self.remote.set, type(event) if isinstance(event, AbstractEvent) else event)
+        coroutine = self._bus.emit(event, *args, **kwargs)
+        if _EAGER_TASKS:
+            task = Task(coroutine, loop=loop, context=context, eager_start=True)
+            if task.done():
+                self._settle(task)
+                return
+        else:
+            task = loop.create_task(coroutine, context=context)
+        self._tasks.add(task)
+        task.add_done_callback(self._settle)
+
+    def _settle(self, task: Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self._failed += 1
+            logger.opt(exception=error).error("Event received from another process failed")
+
+    def count_failure(self) -> None:
+        self._failed += 1
+
+    async def join(self) -> None:
+        """
+        Wait until the events being emitted have been handled
+        """
+        while pending := [task for task in self._tasks if not task.done()]:
+            await wait(pending)
+        # Let the done callbacks of the finished tasks count them
+        await sleep(0)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    @property
+    def failed(self) -> int:
+        """
+        The number of events that could not be decoded or whose emit raised
+        """
+        return self._failed
+
+
+class EventForwarder(ABC):
+    """
+    Base class of the transports that send the events of the local bus to other processes\n
+    The forwarder subscribes to the events like an inline handler, so an event is sent with the arguments
+    a handler receives, after the filters and the injectors, and the arguments must be picklable.
+    An emitted **AbstractEvent** instance is sent as itself, so the receiver dispatches it as its own class
+    :param bus: The local event bus
+    :param events: The events to forward, wildcard patterns are not supported
+    """
+
+    def __init__(self, bus: "BaseBus", events: Iterable[EventType] = ()):
+        self._bus = bus
+        self._emitter = RemoteEmitter(bus)
+        self._forwarders: dict[EventType, Callable] = {}
+        self.forward(*events)
+
+    def forward(self, *events: EventType) -> None:
+        """
+        Start forwarding events
+        """
+        for event in events:
+            if event in self._forwarders:
+                continue
+            if isinstance(event, str) and TopicTrie.is_pattern(event):
+                raise ValueError(f"Wildcard pattern {event} can not be forwarded")
+            forwarder = self._forwarders[event] = self._make_forwarder(event)
+            self._bus.subscribe(event, forwarder, executor="inline")
+
+    def unforward(self, *events: EventType) -> None:
+        """
+        Stop forwarding events
+        """
+        for event in events:
+            forwarder = self._forwarders.pop(event, None)
+            if forwarder is not None:
+                self._bus.unsubscribe(event, forwarder)
+
+    def _make_forwarder(self, event: EventType) -> Callable:
+        remote = self._emitter.remote
+        send = self._send
+        ready = self._ready
+        event_class = isinstance(event, type) and issubclass(event, AbstractEvent)
+
+        def forward_event(*args, **kwargs) -> None:
+            if not ready():
+                return
+            if event_class and args and isinstance(args[0], event):
+                # The instance is sent once, by the forwarder of its most specific forwarded class,
+                # and not at all if it came from another process
+                origin = type(args[0])
+                if remote.get() is origin or self._forwarded_class(origin) is not event:
+                    return
+                send(encode_payload(args[0], args[1:], kwargs))
+            elif remote.get() != event:
+                send(encode_payload(event, args, kwargs))
+
+        return forward_event
+
+    def _forwarded_class(self, event_class: type) -> Optional[type]:
+        """
+        The first class in the method resolution order of an event class that is forwarded
+        """
+        return next((cls for cls in event_class.__mro__ if cls in self._forwarders), None)
+
+    def _ready(self) -> bool:
+        """
+        Whether there is anyone to send to, events are not even serialized otherwise
+        """
+        return True
+
+    @abstractmethod
+    def _send(self, payload: bytes) -> None:
+        """
+        Send one serialized event, called on the thread of the loop
+        """
+        raise NotImplementedError
+
+    @property
+    def events(self) -> tuple[EventType, ...]:
+        return tuple(self._forwarders)
+
+    @property
+    def failed(self) -> int:
+        """
+        The number of received events that could not be decoded or whose emit raised
+        """
+        return self._emitter.failed
@@ -0,0 +1,116 @@
+import hmac
+import pickle
+from hashlib import sha256
+from struct import Struct
+from typing import Any, Optional
+
+from .transport_exceptions import FrameError, HandshakeError
+from ..event import EventType
+
+# Sent by both ends when a connection opens, followed by the protocol version
+MAGIC = b"AEB"
+VERSION = 2
+HELLO = MAGIC + bytes((VERSION,))
+
+# The hello is followed by a random challenge, each end then answers the challenge of the other with an HMAC
+NONCE_SIZE = 32
+DIGEST_SIZE = sha256().digest_size
+
+# Every frame is a 4 byte big-endian payload length followed by the pickled (event, args, kwargs)
+_HEADER = Struct("!I")
+HEADER_SIZE = _HEADER.size
+
+
+def encode_payload(event: EventType, args: tuple, kwargs: dict[str, Any]) -> bytes:
+    """
+    Serialize an emit, without the frame header
+    """
+    return pickle.dumps((event, args, kwargs), pickle.HIGHEST_PROTOCOL)
+
+
+def encode_frame(event: EventType, args: tuple, kwargs: dict[str, Any]) -> bytes:
+    """
+    Serialize an emit into one frame
+    """
+    return frame_payload(encode_payload(event, args, kwargs))
+
+
+def frame_payload(payload: bytes) -> bytes:
+    """
+    Put a serialized emit into a frame, a received payload is relayed this way without decoding it
+    """
+    return _HEADER.pack(len(payload)) + payload
+
+
+def check_hello(data: bytes) -> None:
+    """
+    Check the hello a peer opened the connection with
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise HandshakeError("The peer does not speak the event bus protocol")
+    if data[len(MAGIC)] != VERSION:
+        raise HandshakeError(f"Unsupported protocol version {data[len(MAGIC)]}, expected {VERSION}")
+
+
+def auth_digest(secret: Optional[bytes], role: bytes, challenge: bytes, nonce: bytes) -> bytes:
+    """
+    The answer of one end to the challenge of the other, it proves the end knows the shared secret\n
+    The role of the answering end is part of the message, so an answer can not be reflected back to its sender
+    :param secret: The shared secret, without one the answer proves nothing and is not checked
+    :param role: b"dial" or b"accept"
+    :param challenge: The challenge of the other end
+    :param nonce: The challenge of the answering end
+    """
+    return hmac.new(secret or b"", MAGIC + role + challenge + nonce, sha256).digest()
+
+
+def decode_payload(payload: bytes) -> tuple[EventType, tuple, dict[str, Any]]:
+    """
+    Deserialize the payload of a frame back into the event and its arguments
+    """
+    event, args, kwargs = pickle.loads(payload)
+    return event, args, kwargs
+
+
+class FrameDecoder:
+    """
+    Splits a byte stream into frame payloads\n
+    Data is fed as it arrives, however it is chunked, and every complete frame is returned at once,
+    so a read that carries a whole batch of frames costs a single call
+    :param max_frame_size: The largest accepted payload, a bigger one raises **FrameError**
+    :param expect_hello: Whether the stream starts with the hello, False once the handshake has read it
+    """
+
+    def __init__(self, max_frame_size: int = 64 * 1024 * 1024, expect_hello: bool = True):
+        self._max_frame_size = max_frame_size
+        self._buffer = bytearray()
+        self._hello = not expect_hello
+
+    def feed(self, data: bytes) -> list[bytes]:
+        """
+        Add received data
+        :return: The payloads of the frames it completed, in order
+        """
+        buffer = self._buffer
+        buffer += data
+        offset = 0
+        if not self._hello:
+            if len(buffer) < len(HELLO):
+                return []
+            check_hello(buffer)
+            self._hello = True
+            offset = len(HELLO)
+        payloads = []
+        end = len(buffer)
+        while end - offset >= HEADER_SIZE:
+            size, = _HEADER.unpack_from(buffer, offset)
+            if size > self._max_frame_size:
+                raise FrameError(f"Frame of {size} bytes exceeds the limit of {self._max_frame_size} bytes")
+            if end - offset - HEADER_SIZE < size:
+                break
+            start = offset + HEADER_SIZE
+            payloads.append(bytes(buffer[start:start + size]))
+            offset = start + size
+        if offset:
+            del buffer[:offset]
+        return payloads
@@ -0,0 +1,352 @@
+from asyncio import CancelledError, Task, get_running_loop, sleep
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+from typing import TYPE_CHECKING, Iterable, Optional
+from zlib import crc32
+
+from loguru import logger
+
+from .bus_forwarder import EventForwarder, RemoteEmitter
+from .framing import decode_payload
+from ..event import EventType
+
+if TYPE_CHECKING:
+    from ..module import BaseBus
+
+_MAGIC = b"AEBR"
+# Magic, slot count, slot size, then the sequence of the next slot to write
+_RING_HEADER = Struct("!4sII")
+_CURSOR = Struct("=Q")
+_CURSOR_OFFSET = 16
+_RING_HEADER_SIZE = 64
+# Sequence of the event the slot holds, 0 while it is being written, then the payload length and its checksum
+_SLOT_SEQUENCE = Struct("=Q")
+_SLOT_PAYLOAD = Struct("=II")
+_SLOT_HEADER_SIZE = 16
+
+# Names of the rings created by this process
+_created: set[str] = set()
+
+
+class ShmRing:
+    """
+    A ring of fixed-size slots in shared memory, written by a single producer and read by any number of consumers\n
+    Event number n is written to slot n modulo the slot count. The producer first clears the sequence of the slot,
+    then writes the payload, then the sequence n + 1, and finally advances the shared cursor.
+    A consumer copies a slot only if its sequence is the one it expects and checks the sequence again after the copy,
+    so a slot the producer overwrote meanwhile is detected and counted as an overrun instead of being read torn.
+    Nothing blocks and no system call is made, consumers poll the cursor\n
+    Python has no memory barriers, and the interpreter lock only orders the threads of one process.
+    On x86 the stores of the producer become visible to other processes in order,
+    on weakly ordered CPUs such as ARM a consumer can see the cursor or the sequence of a slot before its payload.
+    So the slot also holds a CRC32 of the payload, a slot whose payload does not match it yet is read again
+    on the next poll. This catches a payload that is not visible yet with the certainty of a CRC32, it is not
+    a barrier, use the bridge instead where that is not enough
+    :param name: Name of the shared memory block, None lets the producer pick one
+    :param create: Create the block as its producer, otherwise attach to an existing one as a consumer
+    :param slots: The number of slots, only used when creating
+    :param slot_size: The size of a slot in bytes including its 16 byte header, only used when creating
+    """
+
+    def __init__(self, name: Optional[str] = None, create: bool = False, slots: int = 4096, slot_size: int = 1024):
+        if create:
+            if slots <= 0:
+                raise ValueError("slots must be greater than 0")
+            if slot_size <= _SLOT_HEADER_SIZE:
+                raise ValueError(f"slot_size must be greater than {_SLOT_HEADER_SIZE}")
+            self._memory = SharedMemory(name, create=True, size=_RING_HEADER_SIZE + slots * slot_size)
+            _RING_HEADER.pack_into(self._memory.buf, 0, _MAGIC, slots, slot_size)
+            _CURSOR.pack_into(self._memory.buf, _CURSOR_OFFSET, 0)
+            _created.add(self._memory.name)
+        else:
+            if name is None:
+                raise ValueError("A consumer must name the ring it attaches to")
+            self._memory = self._attach(name)
+            magic, slots, slot_size = _RING_HEADER.unpack_from(self._memory.buf, 0)
+            if magic != _MAGIC:
+                self._memory.close()
+                raise ValueError(f"Shared memory {name} is not an event ring")
+        self._owner = create
+        self._buffer = self._memory.buf
+        self._slots = slots
+        self._slot_size = slot_size
+        self._cursor = _CURSOR.unpack_from(self._buffer, _CURSOR_OFFSET)[0]
+
+    @staticmethod
+    def _attach(name: str) -> SharedMemory:
+        try:
+            return SharedMemory(name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching registers the block with the resource tracker of this process,
+            # which would unlink it when this process exits although the producer still uses it.
+            # A child process shares the tracker of its parent, there the tracker logs a harmless KeyError
+            # when the producer removes the block
+            memory = SharedMemory(name)
+            if memory.name not in _created:
+                resource_tracker.unregister(memory._name, "shared_memory")
+            return memory
+
+    def write(self, payload: bytes) -> int:
+        """
+        Write one payload, only the producer may call it
+        :return: The sequence number of the payload
+        """
+        size = len(payload)
+        if size > self._slot_size - _SLOT_HEADER_SIZE:
+            raise ValueError(f"Payload of {size} bytes does not fit a slot of {self._slot_size} bytes")
+        buffer = self._buffer
+        sequence = self._cursor
+        offset = _RING_HEADER_SIZE + (sequence % self._slots) * self._slot_size
+        _SLOT_SEQUENCE.pack_into(buffer, offset, 0)
+        start = offset + _SLOT_HEADER_SIZE
+        buffer[start:start + size] = payload
+        # The length seeds the checksum, so a stale length does not match either
+        _SLOT_PAYLOAD.pack_into(buffer, offset + 8, size, crc32(payload, size))
+        _SLOT_SEQUENCE.pack_into(buffer, offset, sequence + 1)
+        self._cursor = sequence + 1
+        _CURSOR.pack_into(buffer, _CURSOR_OFFSET, sequence + 1)
+        return sequence
+
+    def read(self, position: int, limit: int) -> tuple[list[bytes], int, int]:
+        """
+        Read the payloads written from a position on
+        :param position: Sequence number of the next payload to read
+        :param limit: The maximum number of payloads to return
+        :return: The payloads, the position to continue from, and the number of payloads lost to overruns.
+            A slot that is not completely visible yet ends the read, it is read again from the returned position
+        """
+        buffer = self._buffer
+        slots, slot_size = self._slots, self._slot_size
+        cursor = _CURSOR.unpack_from(buffer, _CURSOR_OFFSET)[0]
+        lost = 0
+        if cursor - position > slots:
+            # The producer lapped this consumer, the oldest payloads are gone
+            lost = cursor - slots - position
+            position = cursor - slots
+        payloads = []
+        end = min(cursor, position + limit)
+        while position < end:
+            offset = _RING_HEADER_SIZE + (position % slots) * slot_size
+            expected = position + 1
+            if _SLOT_SEQUENCE.unpack_from(buffer, offset)[0] == expected:
+                size, checksum = _SLOT_PAYLOAD.unpack_from(buffer, offset + 8)
+                start = offset + _SLOT_HEADER_SIZE
+                payload = bytes(buffer[start:start + size])
+                if _SLOT_SEQUENCE.unpack_from(buffer, offset)[0] == expected and crc32(payload, size) == checksum:
+                    payloads.append(payload)
+                    position = expected
+                    continue
+            if _CURSOR.unpack_from(buffer, _CURSOR_OFFSET)[0] - position <= slots:
+                # The slot has not been lapped, so its payload is not visible to this process yet
+                break
+            lost += 1
+            position = expected
+        return payloads, position, lost
+
+    def close(self) -> None:
+        """
+        Detach from the block, the producer also removes it
+        """
+        if self._buffer is None:
+            return
+        self._buffer = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+            _created.discard(self._memory.name)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    @property
+    def cursor(self) -> int:
+        """
+        Sequence number of the next payload the producer writes
+        """
+        return _CURSOR.unpack_from(self._buffer, _CURSOR_OFFSET)[0]
+
+    @property
+    def slots(self) -> int:
+        return self._slots
+
+    @property
+    def slot_size(self) -> int:
+        return self._slot_size
+
+
+class ShmPublisher(EventForwarder):
+    """
+    Publishes events of the local bus into a shared memory ring, for **ShmSubscriber** in other processes\n
+    Only one publisher may write to a ring, please check **EventForwarder** for what is sent.
+    An event too large for a slot is dropped and logged, a consumer that falls a whole ring behind loses events,
+    the producer never waits for the consumers\n
+    Example:
+        publisher = ShmPublisher(event_bus, ['telemetry'], name='service-telemetry', slots=65536)
+        ...
+        publisher.close()
+
+    :param bus: The local event bus
+    :param events: The events to publish, wildcard patterns are not supported
+    :param name: Name of the shared memory block, None picks one, read it from **ShmPublisher.name**
+    :param slots: The number of slots of the ring
+    :param slot_size: The size of a slot in bytes, the largest event it holds is 16 bytes smaller
+    """
+
+    def __init__(self, bus: "BaseBus", events: Iterable[EventType] = (), *, name: Optional[str] = None,
+                 slots: int = 4096, slot_size: int = 1024):
+        self._ring = ShmRing(name, create=True, slots=slots, slot_size=slot_size)
+        self._dropped = 0
+        super().__init__(bus, events)
+
+    def _ready(self) -> bool:
+        return self._ring is not None
+
+    def _send(self, payload: bytes) -> None:
+        try:
+            self._ring.write(payload)
+        except ValueError as e:
+            self._dropped += 1
+            logger.error(f"Event not published to shared memory ring {self._ring.name}: {e}")
+
+    def close(self) -> None:
+        """
+        Stop publishing and remove the ring
+        """
+        self.unforward(*tuple(self._forwarders))
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+    @property
+    def name(self) -> str:
+        return self._ring.name
+
+    @property
+    def published(self) -> int:
+        return self._ring.cursor
+
+    @property
+    def dropped(self) -> int:
+        """
+        The number of events too large for a slot
+        """
+        return self._dropped
+
+
+class ShmSubscriber:
+    """
+    Reads the events of a **ShmPublisher** from shared memory and emits them on the local bus\n
+    A reader task polls the ring, it takes every event written since its last poll at once
+    and only sleeps when there was nothing to read. Events lost because the reader fell a whole ring behind
+    are counted in **ShmSubscriber.overruns**\n
+    Example:
+        subscriber = ShmSubscriber(event_bus, 'service-telemetry')
+        subscriber.start()
+        ...
+        await subscriber.close()
+
+    :param bus: The local event bus
+    :param name: Name of the shared memory block of the publisher
+    :param from_start: Read the events still in the ring, otherwise only the events published after attaching
+    :param poll_interval: Seconds to sleep when the ring has nothing new
+    :param batch: The maximum number of events emitted per poll, before the reader yields to the loop
+    """
+
+    def __init__(self, bus: "BaseBus", name: str, *, from_start: bool = False, poll_interval: float = 0.001,
+                 batch: int = 1024):
+        if poll_interval <= 0:
+            raise ValueError("poll_interval must be greater than 0")
+        if batch <= 0:
+            raise ValueError("batch must be greater than 0")
+        self._ring = ShmRing(name)
+        self._emitter = RemoteEmitter(bus)
+        self._poll_interval = poll_interval
+        self._batch = batch
+        cursor = self._ring.cursor
+        self._position = max(cursor - self._ring.slots, 0) if from_start else cursor
+        self._task: Optional[Task] = None
+        self._received = 0
+        self._overruns = 0
+
+    def start(self) -> Task:
+        """
+        Start the reader task on the running loop
+        """
+        if self._task is None:
+            self._task = get_running_loop().create_task(self._read())
+        return self._task
+
+    def poll(self) -> int:
+        """
+        Emit the events published since the last poll, up to the batch size
+        :return: The number of events read
+        """
+        payloads, self._position, lost = self._ring.read(self._position, self._batch)
+        if lost:
+            self._overruns += lost
+            logger.warning(f"Shared memory ring {self._ring.name} overran, {lost} events lost")
+        loop = get_running_loop()
+        for payload in payloads:
+            try:
+                event, args, kwargs = decode_payload(payload)
+            except Exception as e:
+                self._emitter.count_failure()
+                logger.opt(exception=e).error(f"Could not decode an event of shared memory ring {self._ring.name}")
+                continue
+            self._emitter.emit(loop, event, args, kwargs)
+        self._received += len(payloads)
+        return len(payloads)
+
+    async def _read(self) -> None:
+        while True:
+            if self.poll() < self._batch:
+                await sleep(self._poll_interval)
+            else:
+                await sleep(0)
+
+    async def join(self) -> None:
+        """
+        Wait until the events read so far have been handled
+        """
+        await self._emitter.join()
+
+    async def close(self) -> None:
+        """
+        Stop the reader task and detach from the ring, the events being emitted are left to finish
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                pass
+            self._task = None
+        self._ring.close()
+
+    @property
+    def name(self) -> str:
+        return self._ring.name
+
+    @property
+    def lag(self) -> int:
+        """
+        The number of published events this subscriber has not read yet
+        """
+        return self._ring.cursor - self._position
+
+    @property
+    def received(self) -> int:
+        return self._received
+
+    @property
+    def overruns(self) -> int:
+        """
+        The number of events lost because the publisher overwrote them before they were read
+        """
+        return self._overruns
+
+    @property
+    def failed(self) -> int:
+        return self._emitter.failed
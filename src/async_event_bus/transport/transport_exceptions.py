@@ -0,0 +1,12 @@
+class FrameError(Exception):
+    """
+    Raised when a peer sends data that does not follow the framing protocol, the connection is closed
+    """
+    pass
+
+
+class HandshakeError(FrameError):
+    """
+    Raised when a peer fails the opening handshake, it speaks another protocol or does not know the shared secret
+    """
+    pass
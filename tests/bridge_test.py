@@ -0,0 +1,168 @@
+import asyncio
+import os
+import stat
+import sys
+import tempfile
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import AbstractEvent, BusBridge, EventBus, FrameError, HandshakeError
+from async_event_bus.transport import FrameDecoder, encode_frame
+from async_event_bus.transport.framing import HELLO, check_hello
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+
+class UserEvent(AbstractEvent):
+    def __init__(self, user: int):
+        self.user = user
+
+
+class UserLoggedIn(UserEvent):
+    pass
+
+
+def make_bus(name: str, received: list) -> EventBus:
+    worker_bus = EventBus()
+
+    @worker_bus.on("invalidate")
+    def invalidate_handler(key: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+        received.append((name, key, kwargs))
+
+    return worker_bus
+
+
+async def wait_for(condition, timeout: float = 5) -> None:
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.005)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_frame_decoder():
+    stream = HELLO + encode_frame("invalidate", ("a",), {}) + encode_frame("invalidate", ("b",), {"user": 1})
+    decoder = FrameDecoder()
+    # Frames are split across reads in any way
+    payloads = [payload for index in range(0, len(stream), 7) for payload in decoder.feed(stream[index:index + 7])]
+    assert len(payloads) == 2
+
+    with pytest.raises(FrameError):
+        FrameDecoder().feed(b"HTTP/1.1 200 OK")
+    with pytest.raises(FrameError):
+        FrameDecoder(max_frame_size=4).feed(HELLO + encode_frame("invalidate", ("a",), {}))
+    with pytest.raises(HandshakeError):
+        check_hello(b"AEB\x01")
+
+
+@pytest.mark.asyncio
+async def test_bridge():
+    received: list[tuple[str, str, dict]] = []
+    hub_bus, worker_bus, other_bus = make_bus("hub", received), make_bus("worker", received), make_bus("other", received)
+    path = os.path.join(tempfile.mkdtemp(), "bus.sock")
+    hub = BusBridge(hub_bus, ["invalidate"], relay=True)
+    await hub.serve_unix(path)
+    # Only the owner may connect to the socket
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    worker = BusBridge(worker_bus, ["invalidate"], reconnect_delay=0.01)
+    other = BusBridge(other_bus, ["invalidate"], reconnect_delay=0.01)
+    worker_peer = worker.connect_unix(path)
+    other.connect_unix(path)
+    await wait_for(lambda: len(hub.peers) == 2 and worker_peer.connected)
+
+    for index in range(100):
+        await worker_bus.emit("invalidate", f"key-{index}", user=index)
+    await wait_for(lambda: len(received) == 300)
+    # The hub relays to the other worker, nothing is sent back to where it came from
+    assert sorted(name for name, _, _ in received) == ["hub"] * 100 + ["other"] * 100 + ["worker"] * 100
+    assert [key for name, key, _ in received if name == "other"] == [f"key-{index}" for index in range(100)]
+    assert worker_peer.sent == 100 and worker_peer.flushes < 100
+    await asyncio.sleep(0.05)
+    assert len(received) == 300
+
+    # Frames are queued while the hub is gone and delivered after reconnecting
+    await hub.close()
+    await wait_for(lambda: not worker_peer.connected)
+    await worker_bus.emit("invalidate", "late")
+    assert worker_peer.pending == 1
+    received.clear()
+    hub = BusBridge(hub_bus, ["invalidate"])
+    await hub.serve_unix(path)
+    await wait_for(lambda: ("hub", "late", {}) in received)
+
+    for bridge in (hub, worker, other):
+        await bridge.close()
+    assert worker.events == () and worker.peers == ()
+
+
+@pytest.mark.asyncio
+async def test_bridge_secret():
+    received: list[tuple[str, str, dict]] = []
+    hub_bus, worker_bus, intruder_bus = make_bus("hub", received), make_bus("worker", received), EventBus()
+    hub = BusBridge(hub_bus, ["invalidate"], secret="s3cret")
+    # TCP is reachable by every local process, it needs a secret or an explicit opt-out
+    with pytest.raises(ValueError):
+        await BusBridge(hub_bus).serve_tcp()
+    with pytest.raises(ValueError):
+        BusBridge(hub_bus, secret="")
+    server = await hub.serve_tcp()
+    port = server.sockets[0].getsockname()[1]
+
+    worker = BusBridge(worker_bus, ["invalidate"], secret=b"s3cret", reconnect_delay=0.01)
+    worker_peer = worker.connect_tcp("127.0.0.1", port)
+    intruder = BusBridge(intruder_bus, ["invalidate"], secret="guess", reconnect_delay=0.01)
+    intruder_peer = intruder.connect_tcp("127.0.0.1", port)
+    anonymous = BusBridge(intruder_bus, ["invalidate"], reconnect_delay=0.01)
+    anonymous.connect_tcp("127.0.0.1", port, insecure=True)
+    await wait_for(lambda: worker_peer.connected)
+
+    await worker_bus.emit("invalidate", "key")
+    await intruder_bus.emit("invalidate", "forged")
+    await wait_for(lambda: ("hub", "key", {}) in received)
+    await asyncio.sleep(0.05)
+    # The peers without the secret never get their frames read
+    assert ("hub", "forged", {}) not in received
+    assert not intruder_peer.connected and intruder_peer.pending == 1
+    assert sum(peer.connected for peer in hub.peers) == 1
+
+    for bridge in (hub, worker, intruder, anonymous):
+        await bridge.close()
+
+
+@pytest.mark.asyncio
+async def test_bridge_event_class():
+    received: list[tuple[str, int]] = []
+    a_bus, b_bus = EventBus(), EventBus()
+    for name, event_bus in (("a", a_bus), ("b", b_bus)):
+        event_bus.subscribe(UserEvent, lambda event, *_, name=name, **__: received.append((name, event.user)))
+    path = os.path.join(tempfile.mkdtemp(), "bus.sock")
+    # Forwarding a base class sends its subclasses, and a received subclass is not sent back
+    a = BusBridge(a_bus, [UserEvent])
+    await a.serve_unix(path)
+    b = BusBridge(b_bus, [UserEvent, UserLoggedIn], reconnect_delay=0.01)
+    b_peer = b.connect_unix(path)
+    await wait_for(lambda: b_peer.connected and any(peer.connected for peer in a.peers))
+
+    await a_bus.emit(UserLoggedIn(1))
+    await wait_for(lambda: ("b", 1) in received)
+    # A subclass forwarded together with its base class is still sent once
+    await b_bus.emit(UserLoggedIn(2))
+    await wait_for(lambda: ("a", 2) in received)
+    await asyncio.sleep(0.05)
+    assert sorted(received) == [("a", 1), ("a", 2), ("b", 1), ("b", 2)]
+    assert b_peer.sent == 1
+
+    for bridge in (a, b):
+        await bridge.close()
+
+
+if __name__ == "__main__":
+    test_frame_decoder()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_bridge())
+    loop.run_until_complete(test_bridge_secret())
+    loop.run_until_complete(test_bridge_event_class())
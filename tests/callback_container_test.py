@@ -0,0 +1,72 @@
+import sys
+from typing import Any
+
+from loguru import logger
+
+from async_event_bus import EventCallbackFactory
+from async_event_bus.event import EventCallbackContainer
+
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+
+def make_handler(name: str):
+    def handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+        pass
+
+    handler.__name__ = name
+    return handler
+
+
+async def async_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    pass
+
+
+def test_sorted_insert():
+    container = EventCallbackContainer()
+    first = make_handler("first")
+    second = make_handler("second")
+    heavy = make_handler("heavy")
+    container.add_callback(first, 1)
+    container.add_callback(second, 1)
+    container.add_callback(heavy, 5)
+    container.add_callback(first, 3)
+    container.add_callback(async_handler, 2)
+    assert [callback.callback for callback in container.sync_callback] == [heavy, first, second]
+    assert [callback.callback for callback in container.async_callback] == [async_handler]
+    assert first in container
+
+
+def test_remove_and_add_again():
+    container = EventCallbackContainer()
+    handlers = [make_handler(f"handler_{i}") for i in range(5)]
+    for weight, handler in enumerate(handlers):
+        container.add_callback(handler, weight)
+    container.remove_callback(handlers[1])
+    container.remove_callback(handlers[3])
+    container.remove_callback(async_handler)
+    assert handlers[1] not in container
+    assert [callback.callback for callback in container.sync_callback] == [handlers[4], handlers[2], handlers[0]]
+
+    callback = EventCallbackFactory.create(handlers[3], 10)
+    container.add_callback(callback)
+    container.remove_callback(callback)
+    container.add_callback(callback)
+    assert [item.callback for item in container.sync_callback] == [handlers[3], handlers[4], handlers[2], handlers[0]]
+
+
+def test_bulk_add():
+    container = EventCallbackContainer()
+    handlers = [make_handler(f"handler_{i}") for i in range(20000)]
+    container.add_callbacks(EventCallbackFactory.create(handler, i % 7) for i, handler in enumerate(handlers))
+    container.add_callbacks([async_handler, handlers[0]])
+    weights = [callback.weight for callback in container.sync_callback]
+    assert len(weights) == 20000
+    assert weights == sorted(weights, reverse=True)
+    assert len(container.async_callback) == 1
+
+
+if __name__ == "__main__":
+    test_sorted_insert()
+    test_remove_and_add_again()
+    test_bulk_add()
@@ -0,0 +1,57 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus
+
+bus = EventBus(max_concurrent_tasks=4)
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+release = asyncio.Event()
+
+
+@bus.on("bulk")
+async def bulk_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    await release.wait()
+
+
+@bus.on("critical", max_concurrent=1)
+async def critical_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limits():
+    bus.set_event_concurrency("bulk", 2)
+    bulk = [asyncio.ensure_future(bus.emit("bulk")) for _ in range(5)]
+    await asyncio.sleep(0.01)
+
+    event_limiter = bus.get_limiter("bulk")
+    assert event_limiter.in_flight == 2
+    assert event_limiter.waiters == 3
+    assert bus.get_limiter().in_flight == 2
+
+    critical = [asyncio.ensure_future(bus.emit("critical")) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    subscriber_limiter = bus.get_limiter("critical", critical_handler)
+    assert subscriber_limiter.in_flight == 1
+    assert subscriber_limiter.waiters == 2
+    assert bus.get_limiter().in_flight == 3
+
+    release.set()
+    await asyncio.gather(*bulk, *critical)
+    assert bus.get_limiter().in_flight == 0
+    assert event_limiter.in_flight == 0
+    assert subscriber_limiter.waiters == 0
+
+    bus.set_event_concurrency("bulk", None)
+    assert bus.get_limiter("bulk") is None
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_concurrency_limits())
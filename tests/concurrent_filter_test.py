@@ -0,0 +1,98 @@
+import asyncio
+import sys
+import time
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus
+
+bus = EventBus()
+bus.concurrent_filters = True
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+calls: list[str] = []
+cancelled: list[str] = []
+received: list[str] = []
+
+
+@bus.event_filter("request", weight=10)
+def sync_filter(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> bool:
+    calls.append("sync")
+    return False
+
+
+@bus.event_filter("request", weight=5)
+async def auth_filter(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> bool:
+    calls.append("auth")
+    try:
+        await asyncio.sleep(0.05 if message != "unauthorized" else 0.01)
+    except asyncio.CancelledError:
+        cancelled.append("auth")
+        raise
+    return message == "unauthorized"
+
+
+@bus.event_filter("request", weight=5)
+async def quota_filter(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> bool:
+    calls.append("quota")
+    try:
+        await asyncio.sleep(0.05 if message != "over quota" else 0.01)
+    except asyncio.CancelledError:
+        cancelled.append("quota")
+        raise
+    return message == "over quota"
+
+
+@bus.event_filter("request", weight=1)
+async def audit_filter(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> bool:
+    calls.append("audit")
+    return False
+
+
+@bus.on("request")
+async def request_handler(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(message)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_filters():
+    start = time.perf_counter()
+    await bus.emit("request", "hello")
+    # Filters of the same weight overlap instead of adding up
+    assert time.perf_counter() - start < 0.09
+    assert calls == ["sync", "auth", "quota", "audit"]
+    assert received == ["hello"]
+
+    calls.clear()
+    start = time.perf_counter()
+    await bus.emit("request", "over quota")
+    assert time.perf_counter() - start < 0.04
+    # The tier stops at the first drop, the next tier never runs
+    assert calls == ["sync", "auth", "quota"]
+    assert cancelled == ["auth"]
+    assert received == ["hello"]
+
+    calls.clear()
+    await bus.emit("request", "unauthorized")
+    assert cancelled == ["auth", "quota"]
+    assert "audit" not in calls and received == ["hello"]
+
+
+@pytest.mark.asyncio
+async def test_sequential_filters():
+    bus.concurrent_filters = False
+    calls.clear()
+    start = time.perf_counter()
+    await bus.emit("request", "hello")
+    assert time.perf_counter() - start >= 0.1
+    assert calls == ["sync", "auth", "quota", "audit"]
+    bus.concurrent_filters = True
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_concurrent_filters())
+    loop.run_until_complete(test_sequential_filters())
@@ -0,0 +1,86 @@
+import asyncio
+import sys
+import time
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+received: list[dict[str, Any]] = []
+
+
+@bus.event_inject("request", weight=10)
+def trace_inject(*args: list[Any], **kwargs: dict[str, Any]) -> dict[str, Any]:
+    return {"trace": "t-1", "source": "trace"}
+
+
+@bus.event_inject("request", weight=5)
+async def user_inject(*args: list[Any], **kwargs: dict[str, Any]) -> dict[str, Any]:
+    await asyncio.sleep(0.05)
+    return {"user": "Half", "source": "user"}
+
+
+@bus.event_inject("request", weight=4)
+async def locale_inject(*args: list[Any], **kwargs: dict[str, Any]) -> dict[str, Any]:
+    await asyncio.sleep(0.05)
+    return {"locale": "en", "source": "locale"}
+
+
+@bus.event_inject("request", weight=1, depends=True)
+async def permission_inject(*args: list[Any], user: str, **kwargs: dict[str, Any]) -> dict[str, Any]:
+    await asyncio.sleep(0.01)
+    return {"permissions": f"permissions of {user}"}
+
+
+@bus.on("request")
+async def request_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(kwargs)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_injects():
+    start = time.perf_counter()
+    await bus.emit("request")
+    sequential = time.perf_counter() - start
+    assert sequential >= 0.11
+
+    bus.concurrent_injects = True
+    start = time.perf_counter()
+    await bus.emit("request")
+    assert time.perf_counter() - start < sequential - 0.03
+    bus.concurrent_injects = False
+
+    # Both modes merge in weight order, so the lowest weight wins a conflicting key
+    assert received[0] == received[1] == {
+        "trace": "t-1", "user": "Half", "locale": "en", "source": "locale", "permissions": "permissions of Half"
+    }
+
+
+@pytest.mark.asyncio
+async def test_inject_failure():
+    failing = EventBus()
+    failing.concurrent_injects = True
+
+    @failing.event_inject("request")
+    async def slow_inject(*args: list[Any], **kwargs: dict[str, Any]) -> dict[str, Any]:
+        await asyncio.sleep(0.01)
+        return {}
+
+    @failing.event_inject("request")
+    async def broken_inject(*args: list[Any], **kwargs: dict[str, Any]) -> dict[str, Any]:
+        raise LookupError("session expired")
+
+    with pytest.raises(LookupError):
+        await failing.emit("request")
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_concurrent_injects())
+    loop.run_until_complete(test_inject_failure())
@@ -0,0 +1,101 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+received: list[str] = []
+
+
+@bus.on("plan")
+def sync_plan_handler(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(f"sync:{message}")
+
+
+@bus.on("plan")
+async def async_plan_handler(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(f"async:{message}")
+
+
+@bus.on("plan")
+async def another_async_plan_handler(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(f"another:{message}")
+
+
+@bus.on("other")
+def other_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    pass
+
+
+@pytest.mark.asyncio
+async def test_plan_is_cached():
+    await bus.emit("plan", "first")
+    plan = bus._get_plan("plan")
+    await bus.emit("plan", "second")
+    assert bus._get_plan("plan") is plan
+    assert len(plan.sync_handlers) == 1
+    assert len(plan.async_handlers) == 2
+    assert sorted(received) == ["another:first", "another:second", "async:first", "async:second",
+                                "sync:first", "sync:second"]
+
+
+@pytest.mark.asyncio
+async def test_plan_is_invalidated():
+    plan = bus._get_plan("plan")
+    other_plan = bus._get_plan("other")
+
+    def message_filter(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> bool:
+        return message == "blocked"
+
+    bus.add_filter("plan", message_filter)
+    assert bus._get_plan("other") is other_plan
+    assert bus._get_plan("plan") is not plan
+
+    received.clear()
+    await bus.emit("plan", "blocked")
+    assert received == []
+
+    plan = bus._get_plan("plan")
+    bus.add_global_inject(lambda *_, **__: {"injected": True})
+    assert bus._get_plan("other") is not other_plan
+    assert bus._get_plan("plan") is not plan
+
+    plan = bus._get_plan("plan")
+    bus.unsubscribe("plan", sync_plan_handler)
+    assert bus._get_plan("plan") is not plan
+    assert bus._get_plan("plan").sync_handlers == ()
+
+
+@pytest.mark.asyncio
+async def test_plan_cache_is_bounded():
+    small_bus = EventBus(plan_cache_size=2)
+    small_bus.subscribe("order.1", other_handler)
+    small_bus.subscribe("order.2", other_handler)
+    small_bus.subscribe("order.3", other_handler)
+    # Events nobody listens to are not cached
+    for index in range(1000):
+        await small_bus.emit(f"telemetry.{index}")
+    assert len(small_bus._plans) == 0
+
+    await small_bus.emit("order.1")
+    await small_bus.emit("order.2")
+    await small_bus.emit("order.1")
+    await small_bus.emit("order.3")
+    # The least recently emitted plan was evicted
+    assert list(small_bus._plans) == ["order.1", "order.3"]
+    with pytest.raises(ValueError):
+        EventBus(plan_cache_size=0)
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_plan_is_cached())
+    loop.run_until_complete(test_plan_is_invalidated())
+    loop.run_until_complete(test_plan_cache_is_bounded())
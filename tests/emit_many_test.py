@@ -0,0 +1,76 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus, MultipleError
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+received: list[tuple[str, Any, dict[str, Any]]] = []
+
+
+@bus.event_filter("order")
+def order_filter(order: int, *args: list[Any], **kwargs: dict[str, Any]) -> bool:
+    return order < 0
+
+
+@bus.event_inject("order")
+def order_inject(order: int, *args: list[Any], **kwargs: dict[str, Any]) -> dict[str, Any]:
+    return {"double": order * 2}
+
+
+@bus.on("order")
+def sync_order_handler(order: int, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    if order == 3:
+        raise ValueError("sync failure")
+    received.append(("sync", order, kwargs))
+
+
+@bus.on("order")
+async def async_order_handler(order: int, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    await asyncio.sleep(0.01)
+    if order == 3:
+        raise KeyError("async failure")
+    received.append(("async", order, kwargs))
+
+
+@bus.on("refund")
+async def async_refund_handler(refund: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    if refund == "bad":
+        raise ValueError("refund failure")
+    received.append(("refund", refund, kwargs))
+
+
+@pytest.mark.asyncio
+async def test_emit_many():
+    errors = await bus.emit_many("order", [1, -1, 2, 3], source="kafka")
+    assert errors[0] is None
+    assert errors[1] is None
+    assert errors[2] is None
+    assert isinstance(errors[3], MultipleError)
+    assert len(errors[3].exceptions) == 2
+    assert ("sync", 2, {"source": "kafka", "double": 4}) in received
+    assert ("async", 1, {"source": "kafka", "double": 2}) in received
+    assert not any(order == -1 for _, order, _ in received)
+
+
+@pytest.mark.asyncio
+async def test_emit_batch():
+    received.clear()
+    errors = await bus.emit_batch([("order", 5), ("refund", "ok"), ("refund", "bad"), ("unknown", None)])
+    assert errors[0] is None
+    assert errors[1] is None
+    assert isinstance(errors[2], ValueError)
+    assert errors[3] is None
+    assert sorted(kind for kind, _, _ in received) == ["async", "refund", "sync"]
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_emit_many())
+    loop.run_until_complete(test_emit_batch())
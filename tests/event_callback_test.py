@@ -0,0 +1,47 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventCallbackFactory
+from async_event_bus.event import AsyncEventCallback, SyncEventCallback
+
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+
+def double(value: int, *args: list[Any], **kwargs: dict[str, Any]) -> int:
+    return value * 2
+
+
+async def async_double(value: int, *args: list[Any], **kwargs: dict[str, Any]) -> int:
+    await asyncio.sleep(0)
+    return value * 2
+
+
+def test_callback_slots():
+    for callback in (EventCallbackFactory.create(double, 3), EventCallbackFactory.create(async_double, 3)):
+        assert not hasattr(callback, "__dict__")
+        with pytest.raises(AttributeError):
+            callback.name = "double"
+        # The weight orders the callbacks of a container, it can not change behind its back
+        with pytest.raises(AttributeError):
+            callback.weight = 5
+        assert callback.weight == 3
+
+
+@pytest.mark.asyncio
+async def test_callback_call():
+    sync_callback = EventCallbackFactory.create(double)
+    async_callback = EventCallbackFactory.create(async_double)
+    assert isinstance(sync_callback, SyncEventCallback) and isinstance(async_callback, AsyncEventCallback)
+    assert sync_callback(2, user="Half") == 4
+    assert await async_callback(3, user="Half") == 6
+
+
+if __name__ == "__main__":
+    test_callback_slots()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_callback_call())
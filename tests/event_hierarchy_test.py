@@ -0,0 +1,89 @@
+import asyncio
+import sys
+from dataclasses import dataclass
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import AbstractEvent, EventBus
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+received: list[tuple[str, str]] = []
+
+
+class UserEvent(AbstractEvent):
+    def __init__(self, user: str):
+        self.user = user
+
+
+class UserLoggedIn(UserEvent):
+    pass
+
+
+class UserLoggedOut(UserEvent):
+    pass
+
+
+# Dataclasses compare by value and are unhashable
+@dataclass
+class UserRenamed(UserEvent):
+    user: str
+    name: str
+
+
+@bus.on(AbstractEvent)
+def audit_handler(event: AbstractEvent, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(("audit", type(event).__name__))
+
+
+@bus.on(UserEvent)
+async def user_handler(event: UserEvent, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(("user", event.user))
+
+
+@bus.on(UserLoggedIn)
+def login_handler(event: UserLoggedIn, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(("login", event.user))
+
+
+@pytest.mark.asyncio
+async def test_hierarchy_dispatch():
+    await bus.emit(UserLoggedIn("half"))
+    assert received == [("login", "half"), ("audit", "UserLoggedIn"), ("user", "half")]
+
+    received.clear()
+    await bus.emit(UserLoggedOut, UserLoggedOut("nothing"))
+    assert received == [("audit", "UserLoggedOut"), ("user", "nothing")]
+    assert bus._get_plan(UserLoggedOut) is bus._get_plan(UserLoggedOut)
+
+
+@pytest.mark.asyncio
+async def test_hierarchy_invalidation():
+    plan = bus._get_plan(UserLoggedOut)
+    bus.unsubscribe(UserEvent, user_handler)
+    assert bus._get_plan(UserLoggedOut) is not plan
+
+    received.clear()
+    await bus.emit(UserLoggedOut("nothing"))
+    assert received == [("audit", "UserLoggedOut")]
+
+
+@pytest.mark.asyncio
+async def test_unhashable_event_instance():
+    received.clear()
+    await bus.emit(UserRenamed("half", "nothing"))
+    await bus.emit_many(UserRenamed, [UserRenamed("nothing", "half")])
+    assert received == [("audit", "UserRenamed"), ("audit", "UserRenamed")]
+    errors = await bus.emit_batch([(UserRenamed("half", "nothing"), None)])
+    assert errors == [None] and received[-1] == ("audit", "UserRenamed")
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_hierarchy_dispatch())
+    loop.run_until_complete(test_hierarchy_invalidation())
+    loop.run_until_complete(test_unhashable_event_instance())
@@ -0,0 +1,59 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus, EventType
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+received: list[dict[str, Any]] = []
+
+
+@bus.on("telemetry")
+def telemetry_handler(value: int, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(kwargs)
+
+
+class CountingEventBus(EventBus):
+    def __init__(self):
+        super().__init__()
+        self.before_emit_calls = 0
+
+    async def before_emit(self, event: EventType, *args, **kwargs) -> tuple[bool, dict]:
+        self.before_emit_calls += 1
+        return await super().before_emit(event, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_fast_path():
+    await bus.emit("telemetry", 1, source="sensor")
+    assert not bus._get_plan("telemetry").intercept
+    assert received == [{"source": "sensor"}]
+
+    bus.add_inject("telemetry", lambda *_, **__: {"injected": True})
+    assert bus._get_plan("telemetry").intercept
+    await bus.emit("telemetry", 2)
+    assert received[-1] == {"injected": True}
+
+    bus.clear()
+    assert not bus._get_plan("telemetry").intercept
+
+
+@pytest.mark.asyncio
+async def test_custom_before_emit_is_kept():
+    counting_bus = CountingEventBus()
+    counting_bus.subscribe("telemetry", telemetry_handler)
+    await counting_bus.emit("telemetry", 1)
+    assert counting_bus._get_plan("telemetry").intercept
+    assert counting_bus.before_emit_calls == 1
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_fast_path())
+    loop.run_until_complete(test_custom_before_emit_is_kept())
@@ -0,0 +1,84 @@
+import asyncio
+import sys
+import time
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import CallbackCache, EventBus
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+blocklist = {"mallory"}
+lookups: list[str] = []
+received: list[str] = []
+
+user_cache = CallbackCache(maxsize=2, key=lambda user, *_, **__: user)
+
+
+@bus.event_filter("message", cache=user_cache)
+async def blocklist_filter(user: str, *args: list[Any], **kwargs: dict[str, Any]) -> bool:
+    lookups.append(user)
+    return user in blocklist
+
+
+@bus.global_event_filter(cache=True)
+def global_filter(event: str, *args: list[Any], **kwargs: dict[str, Any]) -> bool:
+    lookups.append(event)
+    return False
+
+
+@bus.on("message")
+async def message_handler(user: str, text: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(text)
+
+
+@pytest.mark.asyncio
+async def test_filter_cache():
+    await bus.emit("message", "alice", "Hello")
+    await bus.emit("message", "alice", "World")
+    await bus.emit("message", "mallory", "Spam")
+    await bus.emit("message", "mallory", "Spam")
+    assert received == ["Hello", "World"]
+    assert lookups.count("alice") == 1 and lookups.count("mallory") == 1
+    assert user_cache.hits == 2 and user_cache.misses == 2
+    # The global filter is keyed on every argument, including the event
+    global_cache = bus.get_filter_cache(global_filter)
+    assert global_cache.hits == 1 and global_cache.misses == 3
+
+    blocklist.discard("mallory")
+    assert user_cache.invalidate("mallory")
+    await bus.emit("message", "mallory", "Sorry")
+    assert received[-1] == "Sorry"
+
+    # Only the two most recently used users are kept
+    await bus.emit("message", "bob", "Hi")
+    assert len(user_cache) == 2
+    await bus.emit("message", "alice", "Again")
+    assert lookups.count("alice") == 2
+
+    # Unhashable arguments bypass the cache
+    await bus.emit("message", "alice", ["unhashable"])
+    assert global_cache.misses == 6
+    assert lookups.count("message") == 7
+
+
+def test_cache_ttl():
+    cache = CallbackCache(ttl=0.01)
+    square = cache.wrap(lambda value: value * value, False)
+    assert square(3) == 9 and square(3) == 9
+    assert cache.hits == 1
+    time.sleep(0.02)
+    assert square(3) == 9
+    assert cache.misses == 2
+    with pytest.raises(TypeError):
+        bus.add_filter("message", global_filter, cache=10)
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_filter_cache())
+    test_cache_ttl()
@@ -0,0 +1,84 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import CallbackCache, EventBus
+
+bus = EventBus(max_concurrent_tasks=None)
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+lookups: list[str] = []
+users: list[str] = []
+session_cache = CallbackCache(maxsize=128, ttl=60, key=lambda *_, session, **__: session)
+
+
+@bus.global_event_inject(cache=session_cache)
+async def user_inject(*args: list[Any], session: str, **kwargs: dict[str, Any]) -> dict[str, Any]:
+    lookups.append(session)
+    await asyncio.sleep(0.01)
+    if session == "expired":
+        raise PermissionError(session)
+    return {"user": f"user of {session}"}
+
+
+@bus.on("request")
+async def request_handler(*args: list[Any], user: str, **kwargs: dict[str, Any]) -> None:
+    users.append(user)
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    await asyncio.gather(*(bus.emit("request", session="a") for _ in range(5)),
+                         bus.emit("request", session="b"))
+    assert sorted(lookups) == ["a", "b"]
+    assert session_cache.shared == 4 and session_cache.misses == 2
+    assert users.count("user of a") == 5
+    assert session_cache.in_flight == 0
+
+    await bus.emit("request", session="a")
+    assert session_cache.hits == 1 and len(lookups) == 2
+
+    # Failures are shared by the waiting emits but never cached
+    results = await asyncio.gather(*(bus.emit("request", session="expired") for _ in range(3)),
+                                   return_exceptions=True)
+    assert all(isinstance(result, PermissionError) for result in results)
+    assert lookups.count("expired") == 1
+    with pytest.raises(PermissionError):
+        await bus.emit("request", session="expired")
+    assert lookups.count("expired") == 2
+
+    assert session_cache.invalidate(session="a")
+    await bus.emit("request", session="a")
+    assert lookups.count("a") == 2
+    assert bus.get_inject_cache(user_inject) is session_cache
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller():
+    cache = CallbackCache()
+    calls: list[int] = []
+
+    async def lookup(value: int) -> int:
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    cached = cache.wrap(lookup, True)
+    first = asyncio.ensure_future(cached(21))
+    second = asyncio.ensure_future(cached(21))
+    await asyncio.sleep(0)
+    first.cancel()
+    # The shared call survives the cancellation of the caller that started it
+    assert await second == 42
+    assert calls == [21]
+    assert await cached(21) == 42 and cache.hits == 1
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_single_flight())
+    loop.run_until_complete(test_cancelled_caller())
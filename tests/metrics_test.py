@@ -0,0 +1,119 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus
+from async_event_bus.module import BusFilter, BusInject
+
+bus = EventBus(max_concurrent_tasks=None)
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+
+def drop_forbidden(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> bool:
+    return message == "forbidden"
+
+
+async def inject_user(*args: list[Any], **kwargs: dict[str, Any]) -> dict[str, Any]:
+    return {"user": "Half"}
+
+
+def message_logger(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    if message == "broken":
+        raise ValueError(message)
+
+
+async def message_recoder(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    assert kwargs["user"] == "Half"
+    await asyncio.sleep(0.01)
+
+
+async def message_notifier(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    await asyncio.sleep(0.01)
+
+
+bus.add_filter("message", drop_forbidden)
+bus.add_inject("message", inject_user)
+bus.subscribe("message", message_logger)
+bus.subscribe("message", message_recoder)
+bus.subscribe("message", message_notifier)
+
+
+@pytest.mark.asyncio
+async def test_metrics():
+    assert bus.metrics is None
+    bus.set_event_concurrency("message", 1)
+    await bus.emit("message", "not measured")
+    metrics = bus.enable_metrics()
+    assert bus.enable_metrics() is metrics
+
+    await bus.emit("message", "Hello")
+    await bus.emit("message", "forbidden")
+    with pytest.raises(ValueError):
+        await bus.emit("message", "broken")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["emits"] == {"message": 3}
+    assert snapshot["dropped"] == {"message": 1}
+    assert snapshot["emit_latency"]["message"]["count"] == 3
+    assert snapshot["in_flight"] == {"message": 0}
+    callbacks = snapshot["callbacks"]
+    assert callbacks[("message", "filter", "drop_forbidden")]["count"] == 3
+    assert callbacks[("message", "inject", "inject_user")]["count"] == 3
+    assert callbacks[("message", "handler", "message_logger")]["errors"] == 1
+    recoder = callbacks[("message", "handler", "message_recoder")]
+    assert recoder["count"] == 2
+    assert recoder["sum"] >= 0.02
+    assert recoder["buckets"][float("inf")] == 2
+    # Both handlers share the single slot of the event, so one of them always waits for the other
+    assert snapshot["wait_time"]["message"]["count"] == 4
+    assert snapshot["wait_time"]["message"]["sum"] >= 0.02
+
+    metrics.reset()
+    assert metrics.snapshot()["callbacks"][("message", "handler", "message_logger")]["errors"] == 0
+    assert bus.disable_metrics() is metrics
+    await bus.emit("message", "Hello")
+    assert metrics.snapshot()["emits"] == {}
+    bus.set_event_concurrency("message", None)
+
+
+@pytest.mark.asyncio
+async def test_prometheus_export():
+    metrics = bus.enable_metrics(buckets=(0.5, 0.001))
+    await bus.emit("message", "Hello")
+    bus.disable_metrics()
+
+    text = metrics.to_prometheus(prefix="bus")
+    assert "# TYPE bus_emits_total counter" in text
+    assert 'bus_emits_total{event="message"} 1' in text
+    assert 'bus_errors_total{event="message",stage="handler",callback="message_logger"} 0' in text
+    assert 'bus_callback_duration_seconds_bucket{event="message",stage="handler",callback="message_recoder",le="0.001"} 0' in text
+    assert 'bus_callback_duration_seconds_bucket{event="message",stage="handler",callback="message_recoder",le="+Inf"} 1' in text
+    assert 'bus_emit_duration_seconds_count{event="message"} 1' in text
+    assert text.endswith("\n")
+
+
+@pytest.mark.asyncio
+async def test_resolve_metrics():
+    metrics = bus.enable_metrics()
+    # Filters and injectors run through resolve, outside of an emit, are measured too
+    kwargs = {}
+    await BusInject.resolve(bus, "message", ("Hello",), kwargs)
+    assert kwargs == {"user": "Half"}
+    assert await BusFilter.resolve(bus, "message", ("forbidden",), {})
+    bus.disable_metrics()
+    await BusFilter.resolve(bus, "message", ("Hello",), {})
+
+    callbacks = metrics.snapshot()["callbacks"]
+    assert callbacks[("message", "inject", "inject_user")]["count"] == 1
+    assert callbacks[("message", "filter", "drop_forbidden")]["count"] == 1
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_metrics())
+    loop.run_until_complete(test_prometheus_export())
+    loop.run_until_complete(test_resolve_metrics())
@@ -0,0 +1,57 @@
+import asyncio
+import os
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus, MultipleError
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+results: list[tuple[int, int]] = []
+worker_state: dict[str, Any] = {}
+
+
+def warm_up(factor: int) -> None:
+    worker_state["factor"] = factor
+
+
+def score(numbers: list[int], *args: list[Any], **kwargs: dict[str, Any]) -> int:
+    if not numbers:
+        raise ValueError("nothing to score")
+    return sum(number * worker_state["factor"] for number in numbers)
+
+
+def worker_pid(numbers: list[int], *args: list[Any], **kwargs: dict[str, Any]) -> int:
+    if not numbers:
+        raise KeyError("nothing to score")
+    return os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_process_executor():
+    bus.executor.configure_process_pool(max_workers=2, initializer=warm_up, initargs=(3,))
+    bus.subscribe("score", score, executor="process")
+    bus.subscribe("score", worker_pid, executor="process")
+
+    await bus.emit("score", [1, 2, 3])
+    assert bus.executor.submitted == 2
+    assert bus.executor.failed == 0
+
+    with pytest.raises(MultipleError) as error:
+        await bus.emit("score", [])
+    assert {type(e) for e in error.value.exceptions} == {ValueError, KeyError}
+
+    with pytest.raises(MultipleError) as error:
+        await bus.emit("score", [1], context=lambda: None)
+    assert all(isinstance(e, TypeError) for e in error.value.exceptions)
+    bus.executor.shutdown()
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_process_executor())
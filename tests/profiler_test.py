@@ -0,0 +1,94 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus
+from async_event_bus.module import bus_profiler
+
+bus = EventBus(max_concurrent_tasks=None)
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+
+class FakeClock:
+    """
+    Wall and CPU clocks that only move when the handlers say so, so that the timings are exact
+    """
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def perf_counter(self) -> float:
+        return self.wall
+
+    def thread_time(self) -> float:
+        return self.cpu
+
+
+clock = FakeClock()
+
+
+def drop_nothing(*args: list[Any], **kwargs: dict[str, Any]) -> bool:
+    return False
+
+
+def busy_handler(delay: float, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    clock.wall += delay
+    clock.cpu += delay
+
+
+async def sleepy_handler(delay: float, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    clock.cpu += delay / 10
+    await asyncio.sleep(0)
+    clock.wall += delay * 2
+
+
+bus.add_filter("task", drop_nothing)
+bus.subscribe("task", busy_handler)
+bus.subscribe("task", sleepy_handler)
+
+
+@pytest.mark.asyncio
+async def test_profiler():
+    warnings: list[str] = []
+    sink = logger.add(lambda message: warnings.append(message), level="WARNING", format="{message}")
+    profiler = bus.enable_profiler(sample_rate=1, threshold=0.015, keep_slowest=2)
+    clocks = bus_profiler.perf_counter, bus_profiler.thread_time
+    bus_profiler.perf_counter, bus_profiler.thread_time = clock.perf_counter, clock.thread_time
+    try:
+        for delay in (0.001, 0.02, 0.005):
+            await bus.emit("task", delay)
+    finally:
+        bus_profiler.perf_counter, bus_profiler.thread_time = clocks
+        logger.remove(sink)
+    assert profiler.sampled_emits == 3
+
+    report = profiler.report(top=2)
+    assert [profile.name for profile in report] == ["sleepy_handler", "busy_handler"]
+    sleepy, busy = report
+    assert sleepy.calls == 3
+    # Only the steps of the coroutine count as CPU time, not the time it is suspended
+    assert sleepy.cpu_time == pytest.approx(0.0026) and sleepy.wall_time == pytest.approx(0.052)
+    assert busy.cpu_time == pytest.approx(0.026) and busy.wall_time == pytest.approx(0.026)
+    assert busy.max_wall_time == pytest.approx(0.02)
+    assert [call.args for call in busy.slowest] == ["(0.02,)", "(0.005,)"]
+    assert len(profiler.report(top=None)) == 3
+    assert sum("Slow handler" in message for message in warnings) == 2
+    assert "busy_handler" in profiler.format_report()
+
+    profiler.sample_rate = 0
+    profiler.reset()
+    await bus.emit("task", 0.001)
+    assert profiler.emits == 1 and profiler.sampled_emits == 0
+    assert profiler.report() == []
+    assert bus.disable_profiler() is profiler
+    assert bus.profiler is None
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_profiler())
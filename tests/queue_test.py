@@ -0,0 +1,108 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus, OverflowPolicy, QueueFullError
+
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+
+def make_bus(received: list[int], release: asyncio.Event) -> EventBus:
+    bus = EventBus()
+
+    @bus.on("ingest")
+    async def slow_handler(value: int, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+        await release.wait()
+        received.append(value)
+
+    return bus
+
+
+@pytest.mark.asyncio
+async def test_queue_drains():
+    received = []
+    release = asyncio.Event()
+    bus = make_bus(received, release)
+    queue = bus.enable_queue(maxsize=10, workers=2)
+    for value in range(5):
+        assert bus.emit_nowait("ingest", value)
+    assert await bus.publish("ingest", 5)
+    await asyncio.sleep(0)
+    assert received == []
+    release.set()
+    await queue.join()
+    assert sorted(received) == [0, 1, 2, 3, 4, 5]
+    assert queue.processed == 6
+    assert queue.depth == 0
+    await bus.disable_queue()
+    assert bus.queue is None
+
+
+@pytest.mark.asyncio
+async def test_queue_overflow_policies():
+    received = []
+    release = asyncio.Event()
+    bus = make_bus(received, release)
+
+    queue = bus.enable_queue(maxsize=2, workers=1, policy=OverflowPolicy.DROP_NEWEST)
+    bus.emit_nowait("ingest", 0)
+    await asyncio.sleep(0)
+    assert bus.emit_nowait("ingest", 1)
+    assert bus.emit_nowait("ingest", 2)
+    assert not bus.emit_nowait("ingest", 3)
+    assert queue.depth == 2
+    assert queue.dropped == 1
+    release.set()
+    await bus.disable_queue()
+    assert sorted(received) == [0, 1, 2]
+
+    received.clear()
+    release.clear()
+    queue = bus.enable_queue(maxsize=2, workers=1, policy=OverflowPolicy.DROP_OLDEST)
+    bus.emit_nowait("ingest", 0)
+    await asyncio.sleep(0)
+    for value in (1, 2, 3):
+        assert bus.emit_nowait("ingest", value)
+    assert queue.dropped == 1
+    release.set()
+    await bus.disable_queue()
+    assert sorted(received) == [0, 2, 3]
+
+    release.clear()
+    bus.enable_queue(maxsize=1, workers=1, policy=OverflowPolicy.RAISE)
+    bus.emit_nowait("ingest", 0)
+    await asyncio.sleep(0)
+    bus.emit_nowait("ingest", 1)
+    with pytest.raises(QueueFullError):
+        bus.emit_nowait("ingest", 2)
+    release.set()
+    await bus.disable_queue()
+
+
+@pytest.mark.asyncio
+async def test_queue_block_policy():
+    received = []
+    release = asyncio.Event()
+    bus = make_bus(received, release)
+    bus.enable_queue(maxsize=1, workers=1, policy=OverflowPolicy.BLOCK)
+    await bus.publish("ingest", 0)
+    await asyncio.sleep(0)
+    await bus.publish("ingest", 1)
+    blocked = asyncio.ensure_future(bus.publish("ingest", 2))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    release.set()
+    assert await blocked
+    await bus.disable_queue()
+    assert sorted(received) == [0, 1, 2]
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_queue_drains())
+    loop.run_until_complete(test_queue_overflow_policies())
+    loop.run_until_complete(test_queue_block_policy())
@@ -0,0 +1,178 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import Coalesce, Debounce, EventBus, Throttle
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+calls: list[tuple[str, Any, dict]] = []
+
+
+def config_handler(change: Any, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    calls.append(("config", change, kwargs))
+
+
+async def cache_handler(key: Any, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    await asyncio.sleep(0.01)
+    calls.append(("cache", key, kwargs))
+
+
+def invalidate_handler(keys: Any, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    calls.append(("invalidate", keys, kwargs))
+
+
+def broken_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    raise ValueError("broken handler")
+
+
+@pytest.mark.asyncio
+async def test_debounce():
+    calls.clear()
+    policy = Debounce(0.05, key="tenant")
+    bus.subscribe("config", config_handler, policy=policy)
+    for version in range(100):
+        await bus.emit("config", version, tenant="a")
+        await bus.emit("config", version, tenant="b")
+    # The emits return before the handler runs
+    assert calls == [] and policy.pending == 2
+    await asyncio.sleep(0.1)
+    assert sorted(calls, key=lambda call: call[2]["tenant"]) == [("config", 99, {"tenant": "a"}),
+                                                                  ("config", 99, {"tenant": "b"})]
+    assert policy.received == 200 and policy.runs == 2 and policy.suppressed == 198
+
+    # A steady stream still runs once max_wait has passed
+    calls.clear()
+    bus.unsubscribe("config", config_handler)
+    bus.subscribe("config", config_handler, policy=Debounce(0.03, max_wait=0.06))
+    for version in range(12):
+        await bus.emit("config", version)
+        await asyncio.sleep(0.01)
+    assert len(calls) >= 1 and calls[0][1] < 11
+    await bus.get_policy("config", config_handler).flush()
+    assert calls[-1][1] == 11
+    bus.clear()
+
+
+@pytest.mark.asyncio
+async def test_throttle():
+    calls.clear()
+    policy = Throttle(0.05, key=lambda key, *_, **__: key % 2)
+    bus.subscribe("cache", cache_handler, executor="inline", policy=policy)
+    for key in range(10):
+        await bus.emit("cache", key)
+    await asyncio.sleep(0.02)
+    # The leading emit of each key ran right away
+    assert sorted(key for _, key, _ in calls) == [0, 1]
+    await asyncio.sleep(0.06)
+    # The last emit of each key ran when the interval ended
+    assert sorted(key for _, key, _ in calls) == [0, 1, 8, 9]
+    await policy.flush()
+    assert policy.runs == 4 and policy.suppressed == 6 and policy.in_flight == 0
+
+    calls.clear()
+    bus.unsubscribe("cache", cache_handler)
+    bus.subscribe("cache", cache_handler, policy=Throttle(0.05, trailing=False))
+    for key in range(10):
+        await bus.emit("cache", key)
+    await bus.get_policy("cache", cache_handler).flush()
+    assert [key for _, key, _ in calls] == [0]
+    with pytest.raises(ValueError):
+        Throttle(1, leading=False, trailing=False)
+    bus.clear()
+
+
+@pytest.mark.asyncio
+async def test_coalesce():
+    calls.clear()
+    policy = Coalesce(lambda keys, key: keys | {key}, initial=set, key="region")
+    bus.subscribe("invalidate", invalidate_handler, policy=policy)
+    for key in range(5):
+        await bus.emit("invalidate", key, region="eu")
+    await bus.emit("invalidate", 7, region="us")
+    await asyncio.sleep(0.01)
+    assert sorted(calls, key=lambda call: call[2]["region"]) == [("invalidate", {0, 1, 2, 3, 4}, {"region": "eu"}),
+                                                                  ("invalidate", {7}, {"region": "us"})]
+    assert policy.received == 6 and policy.runs == 2 and policy.suppressed == 4
+    bus.clear()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_does_not_overlap():
+    calls.clear()
+    policy = Coalesce(lambda total, amount: total + amount)
+    bus.subscribe("cache", cache_handler, policy=policy)
+    await bus.emit("cache", 1)
+    await asyncio.sleep(0.001)
+    # The first call is running, these are merged into the next one
+    for _ in range(10):
+        await bus.emit("cache", 2)
+    await asyncio.sleep(0)
+    assert policy.in_flight == 1 and policy.pending == 1
+    await policy.flush()
+    assert [total for _, total, _ in calls] == [1, 20]
+    bus.clear()
+
+
+@pytest.mark.asyncio
+async def test_event_policy():
+    calls.clear()
+    bus.subscribe("config", config_handler)
+    bus.subscribe("config", broken_handler)
+    policy = Debounce(1)
+    bus.set_event_policy("config", policy)
+    for version in range(3):
+        await bus.emit("config", version)
+    assert policy.pending == 2
+    # Errors of the handlers behind a policy do not reach the emit
+    await policy.flush()
+    assert calls == [("config", 2, {})]
+    assert policy.runs == 2 and policy.failed == 1
+
+    await bus.emit("config", 3)
+    bus.set_event_policy("config", None)
+    assert policy.pending == 0 and bus.get_policy("config") is None
+    bus.unsubscribe("config", broken_handler)
+    await bus.emit("config", 4)
+    assert calls[-1] == ("config", 4, {})
+    bus.clear()
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe_keeps_other_subscriptions():
+    calls.clear()
+    bus.subscribe("config", config_handler, policy=Debounce(1))
+    bus.subscribe("cache", config_handler, policy=Debounce(1))
+    await bus.emit("config", 1)
+    await bus.emit("cache", 2)
+    # Leaving one event drops only the calls held back for that subscription
+    bus.unsubscribe("config", config_handler)
+    await bus.get_policy("cache", config_handler).flush()
+    assert calls == [("config", 2, {})]
+
+    calls.clear()
+    shared = Debounce(1)
+    bus.subscribe("x", config_handler, policy=shared)
+    bus.subscribe("y", config_handler, policy=shared)
+    await bus.emit("x", 3)
+    await bus.emit("y", 4)
+    bus.unsubscribe("x", config_handler)
+    assert shared.pending == 1
+    await shared.flush()
+    assert calls == [("config", 4, {})]
+    bus.clear()
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_debounce())
+    loop.run_until_complete(test_throttle())
+    loop.run_until_complete(test_coalesce())
+    loop.run_until_complete(test_coalesce_does_not_overlap())
+    loop.run_until_complete(test_event_policy())
+    loop.run_until_complete(test_unsubscribe_keeps_other_subscriptions())
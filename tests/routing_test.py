@@ -0,0 +1,121 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import AbstractEvent, EventBus
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+received: list[str] = []
+
+
+class OrderEvent(AbstractEvent):
+    def __init__(self, region: str, tier: str):
+        self.region = region
+        self.tier = tier
+
+
+@bus.on("order")
+def order_logger(order: dict[str, Any], *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append("all")
+
+
+@bus.on("order", where={"region": "eu", "tier": "gold"})
+def gold_eu_order(order: dict[str, Any], *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append("gold eu")
+
+
+@bus.on("order", where={"region": ["eu", "us"]})
+async def western_order(order: dict[str, Any], *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append("western")
+
+
+@bus.on(OrderEvent, where={"tier": "gold"})
+async def gold_order_event(order: OrderEvent, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(f"gold {order.region}")
+
+
+@pytest.mark.asyncio
+async def test_routing():
+    await bus.emit("order", {"region": "eu", "tier": "gold"})
+    assert received == ["all", "gold eu", "western"]
+
+    received.clear()
+    await bus.emit("order", {"region": "us", "tier": "gold"})
+    assert received == ["all", "western"]
+
+    received.clear()
+    # Keyword arguments take precedence over the payload, missing and unhashable fields match nothing
+    await bus.emit("order", {"region": "us"}, region="eu", tier="gold")
+    await bus.emit("order", {"tier": "gold"})
+    await bus.emit("order", {"region": ["eu"]})
+    assert received == ["all", "gold eu", "western", "all", "all"]
+
+    received.clear()
+    await bus.emit(OrderEvent("asia", "gold"))
+    await bus.emit(OrderEvent("asia", "silver"))
+    assert received == ["gold asia"]
+
+    received.clear()
+    errors = await bus.emit_many("order", [{"region": "eu", "tier": "gold"}, {"region": "asia"}])
+    assert errors == [None, None]
+    assert received == ["all", "gold eu", "all", "western"]
+
+    bus.unsubscribe("order", gold_eu_order)
+    received.clear()
+    await bus.emit("order", {"region": "eu", "tier": "gold"})
+    assert received == ["all", "western"]
+
+
+def test_where_validation():
+    with pytest.raises(ValueError):
+        bus.subscribe("order.*", order_logger, where={"region": "eu"})
+    with pytest.raises(ValueError):
+        bus.subscribe("order", order_logger, where={})
+
+
+@pytest.mark.asyncio
+async def test_where_is_replaced():
+    shipments = EventBus()
+    hits: list[str] = []
+
+    def shipment_handler(shipment: dict[str, Any], *args: list[Any], **kwargs: dict[str, Any]) -> None:
+        hits.append(shipment["region"])
+
+    shipments.subscribe("shipment", shipment_handler, where={"region": "eu"})
+    # The second predicate of the same handler replaces the first one
+    shipments.subscribe("shipment", shipment_handler, where={"region": "us"})
+    await shipments.emit("shipment", {"region": "eu"})
+    await shipments.emit("shipment", {"region": "us"})
+    assert hits == ["us"]
+
+
+@pytest.mark.asyncio
+async def test_many_tenants():
+    tenants = EventBus()
+    hits: list[int] = []
+
+    def tenant_handler(tenant: int):
+        def handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+            hits.append(tenant)
+
+        return handler
+
+    for tenant in range(1000):
+        tenants.subscribe("request", tenant_handler(tenant), where={"tenant": tenant})
+    await tenants.emit("request", tenant=421)
+    await tenants.emit("request", {"tenant": 7})
+    assert hits == [421, 7]
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_routing())
+    test_where_validation()
+    loop.run_until_complete(test_where_is_replaced())
+    loop.run_until_complete(test_many_tenants())
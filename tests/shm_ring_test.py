@@ -0,0 +1,104 @@
+import asyncio
+import multiprocessing
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus, ShmPublisher, ShmSubscriber
+from async_event_bus.transport import ShmRing
+
+bus = EventBus(max_concurrent_tasks=None)
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+received: list[tuple[int, dict]] = []
+
+
+@bus.on("telemetry")
+def telemetry_handler(sample: int, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append((sample, kwargs))
+
+
+def publish_from_child(name: str, count: int, ready, go, finished) -> None:
+    child_bus = EventBus()
+    publisher = ShmPublisher(child_bus, ["telemetry"], name=name, slots=count, slot_size=128)
+    ready.set()
+    go.wait()
+    for sample in range(count):
+        child_bus.emit_sync("telemetry", sample, host="child")
+    finished.wait()
+    publisher.close()
+
+
+@pytest.mark.asyncio
+async def test_shm_ring_across_processes():
+    received.clear()
+    context = multiprocessing.get_context("spawn")
+    ready, go, finished = context.Event(), context.Event(), context.Event()
+    name = f"aeb-test-{id(ready)}"
+    child = context.Process(target=publish_from_child, args=(name, 500, ready, go, finished))
+    child.start()
+    try:
+        assert await asyncio.to_thread(ready.wait, 30)
+        subscriber = ShmSubscriber(bus, name)
+        subscriber.start()
+        go.set()
+        while len(received) < 500:
+            await asyncio.sleep(0.005)
+        assert received == [(sample, {"host": "child"}) for sample in range(500)]
+        assert subscriber.received == 500 and subscriber.overruns == 0 and subscriber.lag == 0
+        await subscriber.close()
+    finally:
+        finished.set()
+        await asyncio.to_thread(child.join, 30)
+    assert child.exitcode == 0
+
+
+@pytest.mark.asyncio
+async def test_shm_ring_overrun():
+    received.clear()
+    publisher_bus = EventBus()
+    publisher = ShmPublisher(publisher_bus, ["telemetry"], slots=8, slot_size=128)
+    subscriber = ShmSubscriber(bus, publisher.name)
+    for sample in range(20):
+        await publisher_bus.emit("telemetry", sample)
+    # The ring only holds the newest 8 events, the reader lost the others
+    assert subscriber.lag == 20
+    assert subscriber.poll() == 8
+    await subscriber.join()
+    assert [sample for sample, _ in received] == list(range(12, 20))
+    assert subscriber.overruns == 12
+
+    await publisher_bus.emit("telemetry", "x" * 200)
+    assert publisher.dropped == 1 and publisher.published == 20
+
+    # A late subscriber may start with what is still in the ring
+    late = ShmSubscriber(bus, publisher.name, from_start=True)
+    assert late.lag == 8
+    await late.close()
+    await subscriber.close()
+    publisher.close()
+
+
+def test_shm_ring_payload_not_visible():
+    ring = ShmRing(create=True, slots=4, slot_size=64)
+    reader = ShmRing(ring.name)
+    ring.write(b"first")
+    ring.write(b"second")
+    # A payload byte the consumer does not see yet, as a weakly ordered CPU may show it the sequence first
+    start = 64 + 64 + 16
+    ring._buffer[start] = ord("x")
+    assert reader.read(0, 10) == ([b"first"], 1, 0)
+    ring._buffer[start] = ord("s")
+    assert reader.read(1, 10) == ([b"second"], 2, 0)
+    reader.close()
+    ring.close()
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_shm_ring_across_processes())
+    loop.run_until_complete(test_shm_ring_overrun())
+    test_shm_ring_payload_not_visible()
@@ -0,0 +1,74 @@
+import asyncio
+import sys
+import threading
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+threads: list[str] = []
+
+
+@bus.on("job")
+async def job_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    threads.append(threading.current_thread().name)
+
+
+@bus.on("broken")
+def broken_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    raise ValueError("broken")
+
+
+def test_background_loop():
+    for _ in range(100):
+        bus.emit_sync("job")
+    # Every call reuses the same loop thread
+    assert set(threads) == {"event-bus-loop"}
+    loop = bus.sync_loop.loop
+    bus.emit_sync("job")
+    assert bus.sync_loop.loop is loop
+
+    with pytest.raises(ValueError):
+        bus.emit_sync("broken")
+
+    # Refusing to shut down from the loop thread leaves the loop in place
+    async def shutdown_on_loop_thread() -> None:
+        bus.shutdown_sync_loop()
+
+    loop_threads = {thread for thread in threading.enumerate() if thread.name == "event-bus-loop"}
+    with pytest.raises(RuntimeError):
+        bus.sync_loop.run(shutdown_on_loop_thread())
+    assert bus.sync_loop.loop is loop
+    bus.emit_sync("job")
+    assert {thread for thread in threading.enumerate() if thread.name == "event-bus-loop"} == loop_threads
+
+    bus.shutdown_sync_loop()
+    assert not bus.sync_loop.running and loop.is_closed()
+    bus.emit_sync("job")
+    assert bus.sync_loop.running
+    bus.shutdown_sync_loop()
+
+
+@pytest.mark.asyncio
+async def test_emit_sync_in_loop():
+    # Blocking a running loop on itself would deadlock
+    with pytest.raises(RuntimeError):
+        bus.emit_sync("job")
+
+    threads.clear()
+    bus.bind_loop()
+    await asyncio.to_thread(bus.emit_sync, "job")
+    assert threads == [threading.current_thread().name]
+    assert not bus.sync_loop.running
+
+
+if __name__ == "__main__":
+    test_background_loop()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_emit_sync_in_loop())
@@ -0,0 +1,86 @@
+import asyncio
+import sys
+import threading
+import time
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus
+
+bus = EventBus(thread_pool_size=2)
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+threads: dict[str, str] = {}
+order: list[str] = []
+
+
+@bus.on("write", executor="thread")
+def blocking_writer(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    time.sleep(0.2)
+    threads["writer"] = threading.current_thread().name
+    order.append("writer")
+
+
+@bus.on("write", weight=2)
+def inline_first(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    threads["inline_first"] = threading.current_thread().name
+    order.append("inline_first")
+
+
+@bus.on("write")
+def inline_second(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    order.append("inline_second")
+
+
+@pytest.mark.asyncio
+async def test_thread_executor():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.ensure_future(ticker())
+    await bus.emit("write", "This is a test message")
+    task.cancel()
+    assert ticks > 5
+    assert order == ["inline_first", "inline_second", "writer"]
+    assert threads["writer"].startswith("event-bus")
+    assert threads["inline_first"] == threading.current_thread().name
+    assert bus.executor.submitted == 1
+    assert bus.executor.active == 0
+
+
+@pytest.mark.asyncio
+async def test_default_executor():
+    threaded_bus = EventBus(sync_executor="thread")
+    errors = []
+
+    @threaded_bus.on("write")
+    def failing_writer(message: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+        errors.append(threading.current_thread().name)
+        raise ValueError(message)
+
+    with pytest.raises(ValueError):
+        await threaded_bus.emit("write", "failure")
+    assert errors[0].startswith("event-bus")
+    assert threaded_bus.executor.failed == 1
+    threaded_bus.executor.shutdown()
+
+    with pytest.raises(ValueError):
+        threaded_bus.subscribe("write", ticker_coroutine, executor="thread")
+
+
+async def ticker_coroutine(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    pass
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_thread_executor())
+    loop.run_until_complete(test_default_executor())
@@ -0,0 +1,93 @@
+import asyncio
+import sys
+import threading
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus, OverflowPolicy, QueueFullError
+
+bus = EventBus(max_concurrent_tasks=None)
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+received: list[tuple[int, int]] = []
+
+
+@bus.on("sample")
+async def sample_handler(producer: int, index: int, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append((producer, index))
+
+
+@bus.on("broken")
+def broken_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    raise ValueError("broken")
+
+
+def produce(producer: int, count: int) -> None:
+    for index in range(count):
+        bus.emit_threadsafe("sample", producer, index)
+
+
+@pytest.mark.asyncio
+async def test_emit_threadsafe():
+    bus.bind_loop()
+    producers = [threading.Thread(target=produce, args=(producer, 2000)) for producer in range(4)]
+    for producer in producers:
+        producer.start()
+    await asyncio.to_thread(lambda: [producer.join() for producer in producers])
+    await bus.inbox.join()
+
+    assert len(received) == 8000
+    # Every producer is seen in order
+    for producer in range(4):
+        assert [index for origin, index in received if origin == producer] == list(range(2000))
+    inbox = bus.inbox
+    assert inbox.processed == 8000 and inbox.dropped == 0
+    # Events that arrive while a batch is pending share its wake-up
+    assert inbox.batches < 8000
+    assert inbox.depth == 0 and inbox.in_flight == 0
+
+    await asyncio.to_thread(bus.emit_threadsafe, "broken")
+    await bus.inbox.join()
+    assert inbox.failed == 1
+    await bus.disable_inbox()
+    assert bus.inbox is None
+
+
+@pytest.mark.asyncio
+async def test_inbox_overflow():
+    bus.bind_loop()
+    received.clear()
+    # The loop can not take a batch before this coroutine yields, so the buffer fills up
+    inbox = bus.enable_inbox(maxsize=3, policy=OverflowPolicy.DROP_OLDEST)
+    assert all(bus.emit_threadsafe("sample", 0, index) for index in range(5))
+    assert inbox.depth == 3 and inbox.dropped == 2
+    await inbox.join()
+    assert received == [(0, 2), (0, 3), (0, 4)]
+    await bus.disable_inbox()
+
+    received.clear()
+    inbox = bus.enable_inbox(maxsize=3, policy=OverflowPolicy.DROP_NEWEST)
+    assert [bus.emit_threadsafe("sample", 0, index) for index in range(5)] == [True, True, True, False, False]
+    await inbox.join()
+    assert received == [(0, 0), (0, 1), (0, 2)]
+    await bus.disable_inbox()
+
+    # Waiting on the thread of the loop would deadlock, so BLOCK raises there
+    received.clear()
+    inbox = bus.enable_inbox(maxsize=1, policy=OverflowPolicy.BLOCK)
+    bus.emit_threadsafe("sample", 0, 0)
+    with pytest.raises(QueueFullError):
+        bus.emit_threadsafe("sample", 0, 1)
+    # Another thread waits until the loop takes the batch
+    await asyncio.to_thread(bus.emit_threadsafe, "sample", 0, 1)
+    await bus.disable_inbox()
+    assert received == [(0, 0), (0, 1)] and inbox.dropped == 0
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_emit_threadsafe())
+    loop.run_until_complete(test_inbox_overflow())
@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import time
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus, HandlerTimeoutError, MultipleError
+
+bus = EventBus(max_concurrent_tasks=2)
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+finished: list[str] = []
+
+
+@bus.on("request", timeout=0.05)
+async def hung_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    await asyncio.sleep(10)
+    finished.append("hung")
+
+
+@bus.on("slow")
+async def slow_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    await asyncio.sleep(10)
+    finished.append("slow")
+
+
+@bus.on("slow")
+async def fast_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+    finished.append("fast")
+
+
+@pytest.mark.asyncio
+async def test_handler_timeout():
+    start = time.perf_counter()
+    with pytest.raises(HandlerTimeoutError) as error:
+        await bus.emit("request")
+    assert time.perf_counter() - start < 1
+    assert error.value.handler == "hung_handler"
+    assert error.value.timeout == 0.05
+    assert bus.get_limiter().in_flight == 0
+    assert finished == []
+
+
+@pytest.mark.asyncio
+async def test_emit_deadline():
+    start = time.perf_counter()
+    with pytest.raises(HandlerTimeoutError) as error:
+        await bus.emit("slow", deadline=0.05)
+    assert time.perf_counter() - start < 1
+    # The error names the handler that overran and the deadline as it was given
+    assert error.value.handler == "slow_handler"
+    assert error.value.timeout == 0.05
+    assert finished == ["fast"]
+    assert bus.get_limiter().in_flight == 0
+    assert bus.get_limiter().waiters == 0
+
+
+def test_emit_sync_deadline():
+    sync_bus = EventBus()
+    sync_bus.subscribe("slow", slow_handler)
+    sync_bus.subscribe("slow", hung_handler, timeout=5)
+    with pytest.raises(MultipleError) as error:
+        sync_bus.emit_sync("slow", deadline=0.05)
+    assert all(isinstance(e, HandlerTimeoutError) for e in error.value.exceptions)
+    assert sorted(e.handler for e in error.value.exceptions) == ["hung_handler", "slow_handler"]
+
+
+@pytest.mark.asyncio
+async def test_handler_raises_timeout():
+    upstream_bus = EventBus()
+
+    @upstream_bus.on("fetch", timeout=30)
+    async def fetch_handler(*args: list[Any], **kwargs: dict[str, Any]) -> None:
+        raise TimeoutError("upstream http timeout")
+
+    @upstream_bus.event_filter("fetch")
+    async def fetch_filter(*args: list[Any], **kwargs: dict[str, Any]) -> bool:
+        if kwargs.get("cached"):
+            raise TimeoutError("cache lookup timeout")
+        return False
+
+    # A TimeoutError of the handler or a filter itself is not mistaken for an overrun
+    with pytest.raises(TimeoutError, match="upstream http timeout") as error:
+        await upstream_bus.emit("fetch")
+    assert not isinstance(error.value, HandlerTimeoutError)
+    with pytest.raises(TimeoutError, match="cache lookup timeout") as error:
+        await upstream_bus.emit("fetch", cached=True, deadline=30)
+    assert not isinstance(error.value, HandlerTimeoutError)
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_handler_timeout())
+    loop.run_until_complete(test_emit_deadline())
+    test_emit_sync_deadline()
+    loop.run_until_complete(test_handler_raises_timeout())
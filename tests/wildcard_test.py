@@ -0,0 +1,108 @@
+import asyncio
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus
+from async_event_bus.event import TopicTrie
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+received: list[tuple[str, str]] = []
+
+
+@bus.on("order.created", weight=1)
+def exact_handler(order: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(("exact", order))
+
+
+@bus.on("order.*", weight=5)
+def single_handler(order: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(("single", order))
+
+
+@bus.on("order.#")
+async def multi_handler(order: str, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    received.append(("multi", order))
+
+
+@pytest.mark.asyncio
+async def test_wildcard_subscribe():
+    await bus.emit("order.created", "1")
+    assert received == [("single", "1"), ("exact", "1"), ("multi", "1")]
+
+    received.clear()
+    await bus.emit("order.eu.created", "2")
+    assert received == [("multi", "2")]
+
+    received.clear()
+    await bus.emit("order", "3")
+    assert received == [("multi", "3")]
+
+    received.clear()
+    await bus.emit("payment.created", "4")
+    assert received == []
+
+
+@pytest.mark.asyncio
+async def test_wildcard_unsubscribe():
+    plan = bus._get_plan("order.created")
+    bus.unsubscribe("order.*", single_handler)
+    assert bus._get_plan("order.created") is not plan
+
+    received.clear()
+    await bus.emit("order.created", "5")
+    assert received == [("exact", "5"), ("multi", "5")]
+
+
+@pytest.mark.asyncio
+async def test_wildcard_topic_cache_is_bounded():
+    topic_bus = EventBus(topic_cache_size=100)
+    topic_bus.subscribe("order.created", exact_handler)
+    topic_bus.subscribe("order.#", multi_handler)
+    await topic_bus.emit("order.created", "6")
+    # Topics carrying ids only reach the pattern, their plans stay in a cache of their own
+    for index in range(1000):
+        await topic_bus.emit(f"order.{index}", str(index))
+    assert len(topic_bus._topic_plans) == 100
+    assert list(topic_bus._plans) == ["order.created"]
+    assert "order.999" in topic_bus._topic_plans and "order.0" not in topic_bus._topic_plans
+
+    # A topic that gets an exact subscription moves to the main cache
+    topic_bus.subscribe("order.999", exact_handler)
+    received.clear()
+    await topic_bus.emit("order.999", "7")
+    assert received == [("exact", "7"), ("multi", "7")]
+    assert "order.999" in topic_bus._plans and "order.999" not in topic_bus._topic_plans
+
+
+@pytest.mark.asyncio
+async def test_wildcard_unsubscribe_empties_trie():
+    topic_bus = EventBus()
+    topic_bus.subscribe("order.#", multi_handler)
+    topic_bus.subscribe("order.*.created", single_handler)
+    await topic_bus.emit("order.eu.created", "8")
+    topic_bus.unsubscribe("order.#", multi_handler)
+    topic_bus.unsubscribe("order.*.created", single_handler)
+    # Without patterns left, string emits no longer walk the trie or fill the topic cache
+    assert len(topic_bus._patterns) == 0 and topic_bus._patterns._root.children == {}
+    await topic_bus.emit("order.eu.created", "9")
+    assert len(topic_bus._topic_plans) == 0
+
+    trie = TopicTrie()
+    trie.add("order.#")
+    trie.add("order.*")
+    assert trie.remove("order.#") and not trie.remove("order.#") and not trie.remove("order")
+    assert len(trie) == 1 and [pattern for pattern, _ in trie.match("order.eu")] == ["order.*"]
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_wildcard_subscribe())
+    loop.run_until_complete(test_wildcard_unsubscribe())
+    loop.run_until_complete(test_wildcard_topic_cache_is_bounded())
+    loop.run_until_complete(test_wildcard_unsubscribe_empties_trie())
@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import sys
+from typing import Any
+
+import pytest
+from loguru import logger
+
+from async_event_bus import EventBus
+
+bus = EventBus()
+logger.remove()
+logger.add(sys.stdout, level="TRACE")
+
+BLOB = bytes(range(256)) * 4096
+DIGEST = hashlib.sha256(BLOB).hexdigest()
+views: list[Any] = []
+
+
+def check_blob(blob: Any, digest: str) -> None:
+    # Only the payloads above the threshold come from shared memory
+    if len(blob) >= 64 * 1024 and not (isinstance(blob, memoryview) and blob.readonly):
+        raise TypeError(f"expected a read-only memoryview, got {type(blob).__name__}")
+    if hashlib.sha256(blob).hexdigest() != digest:
+        raise ValueError("the blob arrived damaged")
+
+
+def first_reader(blob: Any, *args: list[Any], digest: str, **kwargs: dict[str, Any]) -> None:
+    check_blob(blob, digest)
+
+
+def second_reader(blob: Any, *args: list[Any], digest: str, **kwargs: dict[str, Any]) -> None:
+    check_blob(blob, digest)
+
+
+def third_reader(blob: Any, *args: list[Any], digest: str, **kwargs: dict[str, Any]) -> None:
+    check_blob(blob, digest)
+
+
+def thread_reader(blob: Any, *args: list[Any], **kwargs: dict[str, Any]) -> None:
+    views.append(blob)
+
+
+@pytest.mark.asyncio
+async def test_zero_copy_process():
+    bus.executor.configure_process_pool(max_workers=2)
+    bus.executor.zero_copy_threshold = 64 * 1024
+    for reader in (first_reader, second_reader, third_reader):
+        bus.subscribe("frame", reader, executor="process")
+
+    await bus.emit("frame", BLOB, digest=DIGEST)
+    # Every process handler reads the same shared copy
+    assert bus.executor.shared_copies == 1
+    await bus.emit("frame", bytearray(BLOB), digest=DIGEST)
+    assert bus.executor.shared_copies == 2
+    assert bus.executor.failed == 0
+
+    # Small payloads are pickled as usual
+    small = b"small frame"
+    await bus.emit("frame", memoryview(small), digest=hashlib.sha256(small).hexdigest())
+    assert bus.executor.shared_copies == 2
+    bus.executor.shutdown()
+    bus.clear()
+
+
+@pytest.mark.asyncio
+async def test_zero_copy_thread():
+    bus.executor.zero_copy_threshold = 1024
+    bus.subscribe("frame", thread_reader, executor="thread")
+    payload = bytearray(4096)
+    await bus.emit("frame", payload, b"tiny")
+    blob = views[0]
+    assert isinstance(blob, memoryview) and blob.readonly and blob.obj is payload
+    with pytest.raises(TypeError):
+        blob[0] = 1
+
+    bus.executor.zero_copy_threshold = None
+    await bus.emit("frame", payload)
+    assert views[1] is payload
+    with pytest.raises(ValueError):
+        bus.executor.zero_copy_threshold = 0
+    bus.executor.shutdown()
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(test_zero_copy_process())
+    loop.run_until_complete(test_zero_copy_thread())